@@ -1,13 +1,28 @@
 import io
+import os
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
 import numpy as np
 from datetime import datetime, timedelta
-import re
 import json
+import uuid
 from utils_pdf import make_asset_pdf
-from utils_prepare import prepare_dataframe, guess_columns, parse_coordinates
+from utils_prepare import parse_coordinates, COMMON_HEADERS
+import utils_profiles as column_profiles
+from utils_metrics import span, summary, export_openmetrics
+from utils_ingest import submit as submit_ingest, job as get_ingest_job, load_preview
+from utils_store import acquire as acquire_dataset, stats as store_stats
+from utils_persist import start as start_persistence, save_async as save_dataset_async, load_async as load_saved_dataset, save_session, load_session
+from utils_geo import MIN_ZOOM, MAX_ZOOM
+from utils_assistant import AssetAIAssistant, asset_columns
+from utils_query import ResultContext
+from utils_dedup import find_duplicates
+from utils_gl import read_trial_balance, reconcile_trial_balance, report_xlsx as gl_report_xlsx, MEASURE_NAMES as GL_MEASURE_NAMES
+from utils_reconcile import read_scans, reconcile, report_xlsx
+import utils_snapshot as snapshots
+from utils_rowstore import open_store
+from utils_dashboard import compute_aggregates, render_figures
+from utils_export import export, export_filename, EXPORT_FORMATS
 
 # إعداد الصفحة
 st.set_page_config(
@@ -85,402 +100,591 @@ with st.sidebar:
     st.header("🎯 خيارات العرض")
     display_mode = st.radio(
         "طريقة العرض:",
-        ["المساعد الذكي", "لوحة التحكم", "التحليل المالي", "جميع الوظائف"]
+        ["المساعد الذكي", "لوحة التحكم", "التحليل المالي", "كشف التكرار", "الجرد الفعلي", "المجموعات المحاسبية", "مقارنة الفترات", "خريطة الأصول", "بطاقة أصل", "جميع الوظائف"]
     )
     
     st.markdown("---")
     st.caption("الإصدار: 7.0 - المساعد الذكي المتكامل")
 
-# معالجة حالة عدم رفع ملف
-if uploaded_file is None:
-    st.info("👆 الرجاء رفع ملف السجل (Excel) لبدء استخدام النظام.")
-    st.stop()
+# ♻️ الاستعادة بعد إعادة تشغيل الخادم: تحميل آخر السجلات المستخدمة من القرص في الخلفية،
+# واستعادة محادثة الجلسة عبر معرف الجلسة المحفوظ في رابط الصفحة
+start_persistence()
+if "sid" not in st.session_state:
+    sid = st.query_params.get("sid")
+    saved_session = load_session(sid)
+    if saved_session is None:
+        sid = uuid.uuid4().hex
+        st.query_params["sid"] = sid
+    else:
+        st.session_state.chat_history = saved_session.get("chat_history", [])
+        st.session_state.restored_key = saved_session.get("dataset_key")
+    st.session_state.sid = sid
 
-# تحميل البيانات
-@st.cache_data(show_spinner="جاري تحميل البيانات...")
-def load_data(uploaded_file):
-    try:
-        df_raw = pd.read_excel(uploaded_file, header=1)
-        if df_raw.empty:
-            st.error("الملف المرفوع فارغ أو لا يحتوي على بيانات.")
-            return None
-        return df_raw
-    except Exception as e:
-        st.error(f"❌ تعذر قراءة الملف: {str(e)}")
-        return None
+# تحميل البيانات في الخلفية
+# يُقرأ السجل كاملاً في خيط منفصل، وتُعرض معاينة لأول الصفوف وتعيين الأعمدة حتى يكتمل التحميل
+def show_ingest_preview(dataset_key, uploaded_file, job):
+    """عرض معاينة سريعة أثناء تحميل السجل الكامل"""
+    if st.session_state.get("preview_key") != dataset_key:
+        try:
+            preview = load_preview(uploaded_file.getvalue())
+        except Exception:
+            preview = None  # سيظهر الخطأ عند انتهاء التحميل الكامل
+        st.session_state.preview_key = dataset_key
+        st.session_state.preview = preview
+    
+    preview = st.session_state.preview
+    st.info("⏳ جاري تحميل السجل كاملاً في الخلفية... تُعرض أدناه معاينة لأول الصفوف.")
+    
+    if preview is not None:
+        st.subheader(f"👀 معاينة أول {len(preview):,} صف")
+        st.dataframe(preview, use_container_width=True, height=300)
+        
+        preview_colmap, preview_profile = column_profiles.resolve_columns(preview.columns)
+        st.subheader("🧭 تعيين الأعمدة")
+        if preview_profile is not None:
+            st.caption(f"📌 ملف ربط محفوظ: {preview_profile['name']}")
+        st.dataframe(
+            pd.DataFrame({
+                "الحقل": list(preview_colmap.keys()),
+                "العمود في الملف": [c or "—" for c in preview_colmap.values()]
+            }),
+            hide_index=True,
+            use_container_width=True
+        )
+    
+    wait_for_job(job, "🔄 سيتم استبدال المعاينة بالبيانات الكاملة تلقائياً عند الانتهاء.")
 
-# تحضير البيانات وتحويل الأنواع
-@st.cache_data(show_spinner="جاري تحضير البيانات...")
-def process_data(df_raw):
-    try:
-        df_processed = prepare_dataframe(df_raw)
-        
-        # تحويل الأعمدة المالية إلى رقمية
-        financial_columns = ['Cost', 'Net Book Value', 'Accumulated Depreciation', 'Residual Value']
-        for col in financial_columns:
-            if col in df_processed.columns:
-                df_processed[col] = pd.to_numeric(df_processed[col], errors='coerce')
-        
-        return df_processed
-    except Exception as e:
-        st.error(f"❌ خطأ في معالجة البيانات: {str(e)}")
-        return None
+@st.fragment(run_every=1.0)
+def wait_for_job(job, message):
+    """إعادة تشغيل التطبيق فور اكتمال مهمة الخلفية"""
+    if job.done():
+        st.rerun()
+    st.caption(message)
 
-# تحميل ومعالجة البيانات
-with st.spinner("جاري تحميل البيانات..."):
-    df_raw = load_data(uploaded_file)
+# معالجة حالة عدم رفع ملف (مع استعادة سجل الجلسة السابقة إن وُجد)
+if uploaded_file is None:
+    dataset_key = st.session_state.get("restored_key")
+    ingest_job = load_saved_dataset(dataset_key) if dataset_key else None
+    if ingest_job is None:
+        st.info("👆 الرجاء رفع ملف السجل (Excel) لبدء استخدام النظام.")
+        st.stop()
+else:
+    upload_file_id, dataset_key = st.session_state.get("upload", (None, None))
+    ingest_job = get_ingest_job(dataset_key) if upload_file_id == uploaded_file.file_id else None
+    if ingest_job is None:
+        dataset_key, ingest_job = submit_ingest(uploaded_file.getvalue())
+        st.session_state.upload = (uploaded_file.file_id, dataset_key)
 
-if df_raw is None:
+if not ingest_job.done():
+    if uploaded_file is None:
+        st.info("♻️ جاري استعادة السجل المحفوظ من جلستك السابقة...")
+        wait_for_job(ingest_job, "🔄 ستظهر البيانات تلقائياً عند اكتمال الاستعادة.")
+    else:
+        show_ingest_preview(dataset_key, uploaded_file, ingest_job)
     st.stop()
 
-with st.spinner("جاري معالجة البيانات..."):
-    df = process_data(df_raw)
-
-if df is None:
+try:
+    dataset = ingest_job.result()
+except Exception as e:
+    st.error(f"❌ تعذر قراءة الملف: {str(e)}")
     st.stop()
 
-# تعيين الأعمدة
-colmap = guess_columns(df.columns)
+# حجز مرجع للنسخة المشتركة طوال الجلسة (يُحرَّر تلقائياً عند انتهاء الجلسة أو تغيير الملف)
+dataset_lease = st.session_state.get("dataset_lease")
+if dataset_lease is None or dataset_lease.key != dataset.key:
+    if dataset_lease is not None:
+        dataset_lease.release()
+    st.session_state.dataset_lease = acquire_dataset(dataset)
+df = dataset.df
+
+# تعيين الأعمدة: ملف الربط المحفوظ لهذا الشكل من السجل إن وُجد، وإلا التخمين التلقائي
+with span("column_mapping", rows=len(df.columns)):
+    colmap, column_profile = column_profiles.resolve_columns(df.columns)
 
 # الحصول على أعمدة البحث مع القيم الافتراضية
-unique_asset_col = colmap.get("Asset Unique No") or "Unique Asset Number in the entity"
-tag_col = colmap.get("Tag Number") or "Tag number"
-desc_col = colmap.get("Description") or "Asset Description"
-cost_col = colmap.get("Cost") or "Cost"
-nbv_col = colmap.get("Net Book Value") or "Net Book Value"
-city_col = colmap.get("City") or "City"
-building_col = colmap.get("Building") or "Building Numbe"
-floor_col = colmap.get("Floor") or "Floor"
-room_col = colmap.get("Room/Office") or "Room/Office"
-
-# 🔧 دالة لتحويل الأعمدة إلى رقمية
-def convert_to_numeric(df, column_name):
-    """تحويل عمود إلى قيم رقمية مع معالجة الأخطاء"""
-    if column_name not in df.columns:
-        return df, False
-    
-    original_dtype = df[column_name].dtype
-    if np.issubdtype(original_dtype, np.number):
-        return df, True
-    
-    df[column_name] = pd.to_numeric(df[column_name], errors='coerce')
-    successful_conversion = df[column_name].notna().any()
-    
-    return df, successful_conversion
-
-# 🤖 نظام الذكاء الاصطناعي للمساعد
-class AssetAIAssistant:
-    def __init__(self, df):
-        self.df = df
-        self.setup_columns()
-        self.prepare_data()
-        
-    def setup_columns(self):
-        """إعداد الأعمدة المستخدمة في التحليل"""
-        self.unique_asset_col = unique_asset_col
-        self.tag_col = tag_col
-        self.desc_col = desc_col
-        self.cost_col = cost_col
-        self.nbv_col = nbv_col
-        self.city_col = city_col
-        self.building_col = building_col
-        
-    def prepare_data(self):
-        """تحضير البيانات للتحليل"""
-        self.df_processed = self.df.copy()
-        
-        # تحويل الأعمدة المالية
-        if self.cost_col in self.df_processed.columns:
-            self.df_processed, self.cost_converted = convert_to_numeric(self.df_processed, self.cost_col)
-        if self.nbv_col in self.df_processed.columns:
-            self.df_processed, self.nbv_converted = convert_to_numeric(self.df_processed, self.nbv_col)
-        
-        # حساب الإحصائيات الأساسية
-        self.total_assets = len(self.df_processed)
-        self.total_cost = self.df_processed[self.cost_col].sum() if self.cost_converted else 0
-        self.total_nbv = self.df_processed[self.nbv_col].sum() if self.nbv_converted else 0
-        
-    def analyze_question(self, question):
-        """تحليل السؤال وتحديد نوعه"""
-        question = question.lower().strip()
-        
-        # أنماط الأسئلة
-        patterns = {
-            'count': r'(كم|عدد|كم عدد|ما عدد|كم يوجد|كم لدينا)',
-            'cost': r'(تكلفة|سعر|قيمة|ثمن|مبلغ|التكلفة|القيمة)',
-            'location': r'(أين|مكان|موقع|في أي|مكان وجود|أين يوجد)',
-            'search': r'(ابحث|عرض|أرني|اظهر|جد|ابحث عن|عرض لي)',
-            'summary': r'(ملخص|إحصائيات|نظرة|عرض عام|معلومات عامة)',
-            'depreciation': r'(استهلاك|إهلاك|مستهلَك|قيمة متبقية|صافي قيمة)',
-            'city': r'(مدينة|منطقة|موقع جغرافي|في الرياض|في جدة)',
-            'top': r'(أعلى|أكبر|أغلى|أعلى قيمة|أكبر تكلفة)'
-        }
-        
-        question_type = 'general'
-        for q_type, pattern in patterns.items():
-            if re.search(pattern, question):
-                question_type = q_type
-                break
-                
-        return question_type
-    
-    def generate_response(self, question):
-        """توليد رد بناءً على نوع السؤال"""
-        question_type = self.analyze_question(question)
-        
-        if question_type == 'count':
-            return self.handle_count_questions(question)
-        elif question_type == 'cost':
-            return self.handle_cost_questions(question)
-        elif question_type == 'location':
-            return self.handle_location_questions(question)
-        elif question_type == 'search':
-            return self.handle_search_questions(question)
-        elif question_type == 'summary':
-            return self.handle_summary_questions(question)
-        elif question_type == 'depreciation':
-            return self.handle_depreciation_questions(question)
-        elif question_type == 'city':
-            return self.handle_city_questions(question)
-        elif question_type == 'top':
-            return self.handle_top_questions(question)
+asset_cols = asset_columns(colmap)
+unique_asset_col = asset_cols["unique_asset_col"]
+tag_col = asset_cols["tag_col"]
+desc_col = asset_cols["desc_col"]
+cost_col = asset_cols["cost_col"]
+nbv_col = asset_cols["nbv_col"]
+city_col = asset_cols["city_col"]
+building_col = asset_cols["building_col"]
+floor_col = asset_cols["floor_col"]
+room_col = asset_cols["room_col"]
+service_date_col = asset_cols["service_date_col"]
+useful_life_col = asset_cols["useful_life_col"]
+residual_col = asset_cols["residual_col"]
+group_col = asset_cols["group_col"]
+group_code_col = asset_cols["group_code_col"]
+group_desc_col = asset_cols["group_desc_col"]
+accumulated_col = asset_cols["accumulated_col"]
+coord_col = asset_cols["coord_col"]
+
+# 🧩 تعديل ربط الأعمدة وحفظه لهذا الشكل من السجل (يُطبق تلقائياً عند رفع ملف بنفس الأعمدة)
+with st.sidebar:
+    with st.expander("🧩 ربط الأعمدة"):
+        if column_profile is not None:
+            st.caption(f"📌 مطبق ملف الربط المحفوظ: {column_profile['name']}")
         else:
-            return self.handle_general_questions(question)
+            st.caption("🔎 ربط مخمَّن تلقائياً؛ راجعه واحفظه ليُطبق على الملفات المماثلة.")
+        with st.form("column_profile"):
+            default_name = column_profile["name"] if column_profile else ""
+            entity_col = colmap.get("Entity Name")
+            if not default_name and entity_col in df.columns and df[entity_col].notna().any():
+                default_name = str(df[entity_col].dropna().iloc[0])
+            profile_name = st.text_input("اسم الجهة / الملف:", value=default_name or "سجل الأصول")
+            choices = [None] + list(df.columns)
+            header_id = column_profiles.signature(df.columns)
+            edited = {
+                key: st.selectbox(key, choices, index=choices.index(colmap.get(key)) if colmap.get(key) in choices else 0,
+                                  format_func=lambda c: "—" if c is None else str(c), key=f"colmap_{header_id}_{key}")
+                for key in COMMON_HEADERS
+            }
+            if st.form_submit_button("💾 حفظ ملف الربط", use_container_width=True):
+                column_profiles.save(df.columns, edited, profile_name.strip() or "سجل الأصول")
+                st.rerun()
+        if column_profile is not None and st.button("🗑️ حذف ملف الربط", use_container_width=True):
+            column_profiles.delete(df.columns)
+            st.rerun()
+
+# إنشاء المساعد الذكي (البيانات والفهارس مشتركة، والمساعد نفسه خاص بالجلسة)
+ai_assistant = AssetAIAssistant(df, dataset, colmap)
+
+# 📊 لوحات المعلومات (التجميعات والرسوم تُحسب مرة واحدة لكل مجموعة بيانات)
+def dashboard_data():
+    """التجميعات والرسوم الجاهزة للوحات، مخزنة مع البيانات المشتركة"""
+    cols = {
+        "cost": cost_col, "nbv": nbv_col, "city": city_col, "building": building_col,
+        "group": group_col, "service_date": service_date_col
+    }
     
-    def handle_count_questions(self, question):
-        """معالجة أسئلة العد والإحصاء"""
-        if 'أصل' in question or 'أصول' in question:
-            response = f"إجمالي عدد الأصول في النظام: **{self.total_assets:,}** أصل"
-            
-            if self.city_col in self.df_processed.columns:
-                city_counts = self.df_processed[self.city_col].value_counts().head(5)
-                if not city_counts.empty:
-                    response += "\n\n**التوزيع حسب المدن:**"
-                    for city, count in city_counts.items():
-                        response += f"\n• {city}: {count:,} أصل"
-            
-            return response
-        
-        return "يمكنني مساعدتك في معرفة عدد الأصول. هل تقصد عدد الأصول الكلي؟"
+    def build():
+        with span("dashboard", rows=len(df)):
+            aggs = compute_aggregates(ai_assistant.df_processed, cols)
+            return aggs, render_figures(aggs)
     
-    def handle_cost_questions(self, question):
-        """معالجة الأسئلة المتعلقة بالتكلفة والقيمة"""
-        if not self.cost_converted:
-            return "⚠️ عذراً، لا توجد بيانات مالية متاحة للتحليل."
-        
-        if 'إجمالي' in question or 'كلي' in question or 'مجموع' in question:
-            return f"**إجمالي قيمة الأصول:** {self.total_cost:,.0f} ريال\n\n**صافي القيمة الدفترية:** {self.total_nbv:,.0f} ريال"
-        
-        elif 'متوسط' in question or 'معدل' in question:
-            avg_cost = self.total_cost / self.total_assets if self.total_assets > 0 else 0
-            return f"**متوسط تكلفة الأصل الواحد:** {avg_cost:,.0f} ريال"
-        
-        elif 'أعلى' in question or 'أغلى' in question:
-            top_assets = self.df_processed.nlargest(5, self.cost_col)
-            response = "**أغلى 5 أصول:**\n"
-            for idx, asset in top_assets.iterrows():
-                asset_name = asset.get(self.desc_col, 'غير محدد')
-                cost = asset.get(self.cost_col, 0)
-                response += f"\n• {asset_name}: {cost:,.0f} ريال"
-            return response
-        
-        return f"إجمالي تكلفة جميع الأصول: **{self.total_cost:,.0f} ريال**"
+    return ai_assistant.artifact(("dashboard",) + tuple(cols.values()), build)
+
+def show_group_chart(title, aggs, figures, key):
+    """رسم التكلفة والقيمة الدفترية لمجموعة مع جدول القيم"""
+    if key not in figures:
+        return
+    st.subheader(title)
+    st.image(figures[key], use_container_width=True)
+    with st.expander("عرض الجدول"):
+        table = aggs[key].rename(columns={"count": "العدد", "cost": "التكلفة", "nbv": "القيمة الدفترية"})
+        st.dataframe(table.style.format("{:,.0f}"), use_container_width=True)
+
+def dashboard_view():
+    """لوحة التحكم: المؤشرات الرئيسية والتوزيع حسب المدينة والمبنى والمجموعة المحاسبية"""
+    aggs, figures = dashboard_data()
     
-    def handle_location_questions(self, question):
-        """معالجة الأسئلة المتعلقة بالمواقع"""
-        if self.city_col not in self.df_processed.columns:
-            return "⚠️ لا توجد بيانات عن مواقع الأصول."
-        
-        cities = self.df_processed[self.city_col].dropna().unique()
-        
-        if 'أين' in question or 'مكان' in question:
-            # البحث عن أصل محدد في السؤال
-            for word in question.split():
-                if len(word) > 2:
-                    found_assets = self.df_processed[
-                        self.df_processed[self.desc_col].astype(str).str.contains(word, na=False) |
-                        self.df_processed[self.tag_col].astype(str).str.contains(word, na=False)
-                    ]
-                    if not found_assets.empty:
-                        asset = found_assets.iloc[0]
-                        location = asset.get(self.city_col, 'غير محدد')
-                        building = asset.get(self.building_col, 'غير محدد')
-                        return f"**الموقع:** {location} - {building}"
-            
-            return "يرجى تحديد الأصل الذي تبحث عنه (رقم الوسم أو الوصف)"
-        
-        return f"**المدن المتاحة:** {', '.join([str(c) for c in cities])}"
-    
-    def handle_search_questions(self, question):
-        """معالجة أسئلة البحث"""
-        # استخراج كلمات البحث من السؤال
-        search_terms = []
-        for word in question.split():
-            if len(word) > 2 and word not in ['ابحث', 'عن', 'عرض', 'أرني', 'اظهر']:
-                search_terms.append(word)
-        
-        if not search_terms:
-            return "يرجى تحديد ما تريد البحث عنه (مثال: ابحث عن أجهزة كمبيوتر)"
-        
-        # البحث في البيانات
-        results = []
-        for term in search_terms:
-            mask = (
-                self.df_processed[self.desc_col].astype(str).str.contains(term, na=False, case=False) |
-                self.df_processed[self.tag_col].astype(str).str.contains(term, na=False, case=False) |
-                self.df_processed[self.unique_asset_col].astype(str).str.contains(term, na=False, case=False)
-            )
-            results.extend(self.df_processed[mask].to_dict('records'))
-        
-        if results:
-            response = f"**تم العثور على {len(results)} نتيجة:**\n"
-            for i, asset in enumerate(results[:5], 1):  # عرض أول 5 نتائج فقط
-                desc = asset.get(self.desc_col, 'غير محدد')
-                tag = asset.get(self.tag_col, 'غير محدد')
-                cost = asset.get(self.cost_col, 0)
-                response += f"\n{i}. {desc} (الوسم: {tag}) - {cost:,.0f} ريال"
-            
-            if len(results) > 5:
-                response += f"\n\n... وعرض {len(results) - 5} نتيجة إضافية"
-            
-            return response
-        else:
-            return "❌ لم يتم العثور على نتائج تطابق بحثك."
-    
-    def handle_summary_questions(self, question):
-        """معالجة أسئلة الملخص والإحصائيات"""
-        response = f"**ملخص شامل للأصول:**\n\n"
-        response += f"• إجمالي عدد الأصول: **{self.total_assets:,}**\n"
-        response += f"• إجمالي التكلفة: **{self.total_cost:,.0f} ريال**\n"
-        response += f"• صافي القيمة الدفترية: **{self.total_nbv:,.0f} ريال**\n"
-        
-        if self.cost_converted and self.nbv_converted:
-            depreciation = self.total_cost - self.total_nbv
-            dep_rate = (depreciation / self.total_cost * 100) if self.total_cost > 0 else 0
-            response += f"• إجمالي الاستهلاك: **{depreciation:,.0f} ريال**\n"
-            response += f"• معدل الاستهلاك: **{dep_rate:.1f}%**\n"
-        
-        if self.city_col in self.df_processed.columns:
-            city_stats = self.df_processed[self.city_col].value_counts().head(3)
-            response += f"\n**أهم المدن:**\n"
-            for city, count in city_stats.items():
-                response += f"• {city}: {count} أصل\n"
-        
-        return response
+    col1, col2, col3 = st.columns(3)
+    col1.metric("عدد الأصول", f"{aggs['rows']:,}")
+    if aggs["total_cost"] is not None:
+        col2.metric("إجمالي التكلفة", f"{aggs['total_cost']:,.0f} ريال")
+    if aggs["total_nbv"] is not None:
+        col3.metric("صافي القيمة الدفترية", f"{aggs['total_nbv']:,.0f} ريال")
     
-    def handle_depreciation_questions(self, question):
-        """معالجة أسئلة الاستهلاك والقيمة المتبقية"""
-        if not self.cost_converted or not self.nbv_converted:
-            return "⚠️ لا توجد بيانات مالية كافية لتحليل الاستهلاك."
-        
-        df_analysis = self.df_processed.dropna(subset=[self.cost_col, self.nbv_col])
-        df_analysis = df_analysis[df_analysis[self.cost_col] > 0]
-        
-        if df_analysis.empty:
-            return "❌ لا توجد بيانات صالحة لتحليل الاستهلاك."
-        
-        df_analysis['Depreciation Rate'] = (
-            (df_analysis[self.cost_col] - df_analysis[self.nbv_col]) / df_analysis[self.cost_col] * 100
-        ).round(1)
-        
-        high_dep = len(df_analysis[df_analysis['Depreciation Rate'] > 50])
-        avg_dep = df_analysis['Depreciation Rate'].mean()
-        
-        response = f"**تحليل الاستهلاك:**\n\n"
-        response += f"• متوسط معدل الاستهلاك: **{avg_dep:.1f}%**\n"
-        response += f"• عدد الأصول عالية الاستهلاك (أكثر من 50%): **{high_dep}**\n"
-        
-        # الأصول الأكثر استهلاكاً
-        high_dep_assets = df_analysis.nlargest(3, 'Depreciation Rate')
-        if not high_dep_assets.empty:
-            response += f"\n**أكثر الأصول استهلاكاً:**\n"
-            for idx, asset in high_dep_assets.iterrows():
-                desc = asset.get(self.desc_col, 'غير محدد')
-                dep_rate = asset['Depreciation Rate']
-                response += f"• {desc}: {dep_rate}%\n"
-        
-        return response
+    show_group_chart("🏙️ التكلفة والقيمة الدفترية حسب المدينة (مليون ريال)", aggs, figures, "by_city")
+    show_group_chart("🏢 حسب المبنى", aggs, figures, "by_building")
+    show_group_chart("📒 حسب المجموعة المحاسبية", aggs, figures, "by_group")
+
+def financial_view():
+    """التحليل المالي: توزيع نسب الاستهلاك وأعمار الأصول"""
+    aggs, figures = dashboard_data()
     
-    def handle_city_questions(self, question):
-        """معالجة الأسئلة المتعلقة بالمدن"""
-        if self.city_col not in self.df_processed.columns:
-            return "⚠️ لا توجد بيانات عن المدن."
-        
-        # استخراج اسم المدينة من السؤال
-        cities_in_data = self.df_processed[self.city_col].dropna().unique()
-        mentioned_city = None
-        
-        for city in cities_in_data:
-            if str(city).lower() in question.lower():
-                mentioned_city = city
-                break
-        
-        if mentioned_city:
-            city_assets = self.df_processed[self.df_processed[self.city_col] == mentioned_city]
-            city_count = len(city_assets)
-            city_cost = city_assets[self.cost_col].sum() if self.cost_converted else 0
-            
-            response = f"**إحصائيات {mentioned_city}:**\n\n"
-            response += f"• عدد الأصول: **{city_count}**\n"
-            response += f"• إجمالي التكلفة: **{city_cost:,.0f} ريال**\n"
-            
-            # أنواع الأصول في المدينة
-            if self.desc_col in city_assets.columns:
-                common_assets = city_assets[self.desc_col].value_counts().head(3)
-                if not common_assets.empty:
-                    response += f"\n**أكثر أنواع الأصول شيوعاً:**\n"
-                    for asset_type, count in common_assets.items():
-                        response += f"• {asset_type}: {count}\n"
-            
-            return response
+    if aggs["total_cost"] and aggs["total_nbv"] is not None:
+        depreciation = aggs["total_cost"] - aggs["total_nbv"]
+        col1, col2 = st.columns(2)
+        col1.metric("إجمالي الاستهلاك", f"{depreciation:,.0f} ريال")
+        col2.metric("معدل الاستهلاك", f"{depreciation / aggs['total_cost'] * 100:.1f}%")
+    
+    if aggs["sampled"]:
+        st.caption("التوزيعات محسوبة على عينة عشوائية من السجل لتسريع العرض.")
+    
+    if "depreciation_hist" in figures:
+        st.subheader("📉 توزيع نسب الاستهلاك (عدد الأصول)")
+        st.image(figures["depreciation_hist"], use_container_width=True)
+    if "age_profile" in figures:
+        st.subheader("⏳ أعمار الأصول بالسنوات منذ الدخول في الخدمة")
+        st.image(figures["age_profile"], use_container_width=True)
+    if "depreciation_hist" not in figures and "age_profile" not in figures:
+        st.info("لا توجد بيانات كافية (التكلفة، القيمة الدفترية، تاريخ الدخول في الخدمة) للتحليل المالي.")
+    
+    cohorts = ai_assistant.cohorts()
+    if cohorts is not None and cohorts.valid.any():
+        st.subheader("🔁 توقع الاستبدال (نهاية العمر الإنتاجي)")
+        first_year = cohorts.as_of_year
+        by_year = cohorts.by_year(first_year, first_year + 9)
+        st.bar_chart(by_year.set_axis(by_year.index.astype(str))["cost"], use_container_width=True)
+        bands = cohorts.remaining_life().rename(columns={"count": "العدد", "cost": "التكلفة"})
+        st.dataframe(bands.style.format("{:,.0f}"), use_container_width=True)
+        with st.expander("🧮 مصفوفة الأفواج (سنة الدخول في الخدمة × سنة نهاية العمر)"):
+            st.dataframe(cohorts.matrix["count"], use_container_width=True)
+
+# 🧬 كشف الأصول المكررة (مهمة خلفية مشتركة لكل مجموعة بيانات)
+def duplicates_view():
+    """البحث عن الأصول المسجلة أكثر من مرة بأرقام وسم مختلفة"""
+    st.subheader("🧬 كشف الأصول المكررة")
+    st.caption("تُقارن الأصول داخل نفس المدينة والمبنى والمجموعة المحاسبية فقط، حسب تشابه الوصف والتكلفة وتاريخ الدخول في الخدمة. "
+               "الأصول التي تشترك في الرقم التسلسلي للمصنع تُعد مكررة دائماً.")
+    
+    cols = {
+        "description": desc_col, "cost": cost_col, "service_date": service_date_col,
+        "serial": colmap.get("Serial Number"),
+        "city": city_col, "building": building_col, "group": group_col
+    }
+    name = ("duplicates",) + tuple(cols.values())
+    
+    def build():
+        with span("duplicates", rows=len(df)):
+            return find_duplicates(df, cols)
+    
+    job = dataset.job(name)
+    if job is None:
+        if not st.button("🔍 بدء فحص التكرار", type="primary", use_container_width=True):
+            return
+        job = dataset.artifact_async(name, build)
+    
+    if not job.done():
+        st.info("⏳ جاري فحص السجل في الخلفية... يمكنك متابعة استخدام المساعد.")
+        wait_for_job(job, "🔄 ستظهر النتائج تلقائياً عند انتهاء الفحص.")
+        return
+    
+    if job.exception() is not None:
+        st.error(f"❌ تعذر إكمال الفحص: {job.exception()}")
+        return
+    
+    clusters = job.result()
+    if clusters.empty:
+        st.success("✅ لم يتم العثور على أصول مكررة محتملة.")
+        return
+    
+    col1, col2 = st.columns(2)
+    col1.metric("مجموعات مكررة محتملة", f"{clusters['cluster'].nunique():,}")
+    col2.metric("أصول ضمن هذه المجموعات", f"{len(clusters):,}")
+    
+    detail = df.take(clusters["row"].to_numpy())
+    detail.insert(0, "المجموعة", clusters["cluster"].to_numpy() + 1)
+    detail.insert(1, "التشابه", (clusters["similarity"].to_numpy() * 100).round())
+    shown_cols = ["المجموعة", "التشابه"] + [c for c in (desc_col, tag_col, unique_asset_col, cost_col, service_date_col, city_col, building_col) if c in detail.columns]
+    st.dataframe(detail[shown_cols].head(1000), hide_index=True, use_container_width=True)
+    
+    if st.button("📦 تجهيز ملف المكررات (Excel)", use_container_width=True):
+        path = export(detail, "xlsx")
+        try:
+            with open(path, "rb") as f:
+                st.download_button("⬇️ تنزيل", data=f, file_name=export_filename("xlsx", "duplicates"),
+                                   mime=EXPORT_FORMATS["xlsx"][1], use_container_width=True)
+        finally:
+            os.remove(path)
+
+# 📋 مطابقة الجرد الفعلي مع السجل
+def reconciliation_view():
+    """مطابقة ملف الوسوم الممسوحة ميدانياً مع السجل: الموجود والمفقود وغير المتوقع والموقع الخاطئ"""
+    st.subheader("📋 الجرد الفعلي")
+    st.caption("ارفع ملف المسح (CSV أو Excel أو قائمة نصية بوسم في كل سطر). إذا احتوى الملف على أعمدة المبنى والدور والغرفة تُقارن المواقع (المبنى › الدور › الغرفة) ويُحسب المفقود داخل المواقع الممسوحة فقط.")
+    
+    scan_file = st.file_uploader("ملف المسح", type=["csv", "xlsx", "xls", "txt"], key="scan_file")
+    if scan_file is None:
+        return
+    
+    try:
+        scans = read_scans(scan_file.getvalue(), scan_file.name)
+    except Exception as e:
+        st.error(f"❌ تعذر قراءة ملف المسح: {e}")
+        return
+    
+    cols = {"tag": tag_col, "unique": unique_asset_col, "building": building_col, "floor": floor_col, "room": room_col}
+    with span("reconcile", rows=len(scans)):
+        result = reconcile(df, cols, scans)
+    
+    found = result["found"]
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("موجود", f"{len(found):,}")
+    col2.metric("مفقود", f"{len(result['missing']):,}")
+    col3.metric("غير متوقع", f"{len(result['unexpected']):,}")
+    col4.metric("موقع خاطئ", f"{int(found['wrong_location'].sum()):,}")
+    if len(result["duplicates"]):
+        st.warning(f"⚠️ {len(result['duplicates']):,} وسم ممسوح أكثر من مرة.")
+    
+    if not result["by_location"].empty:
+        st.markdown("#### 🏢 حسب الموقع")
+        st.dataframe(result["by_location"].rename(columns={
+            "found": "موجود", "missing": "مفقود", "wrong_location": "موقع خاطئ", "unexpected": "غير متوقع"
+        }), use_container_width=True)
+    
+    shown_cols = [c for c in (tag_col, unique_asset_col, desc_col, city_col, building_col, floor_col, room_col, cost_col) if c in df.columns]
+    with st.expander(f"❌ الأصول المفقودة ({len(result['missing']):,})"):
+        st.dataframe(df.take(result["missing"][:1000])[shown_cols], hide_index=True, use_container_width=True)
+    with st.expander(f"❓ وسوم غير موجودة في السجل ({len(result['unexpected']):,})"):
+        st.dataframe(result["unexpected"].head(1000), hide_index=True, use_container_width=True)
+    wrong = found[found["wrong_location"]]
+    with st.expander(f"📍 أصول في غير موقعها ({len(wrong):,})"):
+        detail = df.take(wrong["row"].to_numpy()[:1000])[shown_cols]
+        if "scanned_location" in wrong:
+            detail.insert(len(shown_cols), "الموقع الممسوح", wrong["scanned_location"].to_numpy()[:1000])
+        st.dataframe(detail, hide_index=True, use_container_width=True)
+    
+    if st.button("📦 تجهيز تقرير المطابقة (Excel)", use_container_width=True):
+        st.download_button("⬇️ تنزيل", data=report_xlsx(df, result, shown_cols),
+                           file_name=export_filename("xlsx", "reconciliation"),
+                           mime=EXPORT_FORMATS["xlsx"][1], use_container_width=True)
+
+# 🧾 المجموعات المحاسبية ومطابقة ميزان المراجعة
+def gl_view():
+    """التكلفة والاستهلاك المتراكم وصافي القيمة لكل مجموعة محاسبية ومطابقتها مع ميزان المراجعة"""
+    st.subheader("🧾 المجموعات المحاسبية")
+    rollups = ai_assistant.gl_rollups()
+    if not rollups:
+        st.info("لا يحتوي السجل على عمود رمز أو وصف المجموعة المحاسبية.")
+        return
+    
+    by_group = rollups["by_group"]
+    number_cols = [c for c in by_group.columns if c != "description"]
+    st.dataframe(
+        by_group.rename(columns={"description": "الوصف", **GL_MEASURE_NAMES}).style.format(
+            "{:,.0f}", subset=[GL_MEASURE_NAMES[c] for c in number_cols]
+        ),
+        use_container_width=True
+    )
+    with st.expander("📍 حسب المجموعة والمدينة"):
+        st.dataframe(rollups["by_group_city"].rename(columns=GL_MEASURE_NAMES).style.format("{:,.0f}"), use_container_width=True)
+    
+    st.markdown("#### ⚖️ مطابقة ميزان المراجعة")
+    st.caption("ارفع ميزان المراجعة (CSV أو Excel) بعمود رقم الحساب/المجموعة وأعمدة التكلفة و/أو الاستهلاك المتراكم و/أو القيمة الدفترية.")
+    tb_file = st.file_uploader("ميزان المراجعة", type=["csv", "xlsx", "xls"], key="tb_file")
+    reconciliation = None
+    if tb_file is not None:
+        try:
+            tb = read_trial_balance(tb_file.getvalue(), tb_file.name)
+        except Exception as e:
+            st.error(f"❌ تعذر قراءة ميزان المراجعة: {e}")
+            return
+        with span("gl_reconcile", rows=len(tb)):
+            reconciliation = reconcile_trial_balance(by_group, tb)
+        
+        differences = int((reconciliation["status"] != "مطابق").sum())
+        if differences:
+            st.warning(f"⚠️ {differences:,} مجموعة غير مطابقة للميزان.")
         else:
-            city_stats = self.df_processed[self.city_col].value_counts()
-            response = "**توزيع الأصول حسب المدينة:**\n\n"
-            for city, count in city_stats.head(5).items():
-                response += f"• {city}: {count} أصل\n"
-            
-            return response
+            st.success("✅ جميع المجموعات مطابقة لميزان المراجعة.")
+        
+        labels = {"description": "الوصف", "status": "الحالة"}
+        for measure, name in GL_MEASURE_NAMES.items():
+            labels.update({f"{measure}_register": f"{name} (السجل)", f"{measure}_tb": f"{name} (الميزان)",
+                           f"{measure}_diff": f"{name} (الفرق)"})
+        amounts = [labels[c] for c in reconciliation.columns if c not in ("description", "status")]
+        st.dataframe(
+            reconciliation.rename(columns=labels).style.format("{:,.2f}", subset=amounts, na_rep="—"),
+            use_container_width=True
+        )
     
-    def handle_top_questions(self, question):
-        """معالجة أسئلة الأعلى والأكبر"""
-        if not self.cost_converted:
-            return "⚠️ لا توجد بيانات مالية للتحليل."
-        
-        n = 5  # عدد النتائج الافتراضي
-        
-        if '3' in question:
-            n = 3
-        elif '10' in question:
-            n = 10
-        
-        top_assets = self.df_processed.nlargest(n, self.cost_col)
-        
-        response = f"**أغلى {n} أصول:**\n\n"
-        for i, (idx, asset) in enumerate(top_assets.iterrows(), 1):
-            desc = asset.get(self.desc_col, 'غير محدد')
-            tag = asset.get(self.tag_col, 'غير محدد')
-            cost = asset.get(self.cost_col, 0)
-            nbv = asset.get(self.nbv_col, 0)
-            
-            response += f"{i}. **{desc}**\n"
-            response += f"   - الوسم: {tag}\n"
-            response += f"   - التكلفة: {cost:,.0f} ريال\n"
-            response += f"   - القيمة الدفترية: {nbv:,.0f} ريال\n\n"
-        
-        return response
-    
-    def handle_general_questions(self, question):
-        """معالجة الأسئلة العامة"""
-        general_responses = [
-            "يمكنني مساعدتك في:\n• معرفة عدد الأصول وتكلفتها\n• البحث عن أصول محددة\n• تحليل الاستهلاك والقيمة\n• توزيع الأصول جغرافياً\n\nما الذي تريد معرفته؟",
-            "أنا مساعدك الذكي لفهم بيانات الأصول. اسألني عن:\n- الإحصائيات العامة\n- تكاليف الأصول\n- مواقع التوزيع\n- تحليل الاستهلاك",
-            "مرحباً! أنا هنا لمساعدتك في تحليل بيانات الأصول. جرب أن تسأل:\n'كم عدد الأصول؟'\n'ما إجمالي التكلفة؟'\n'أين توجد أجهزة الكمبيوتر؟'"
-        ]
-        
-        return np.random.choice(general_responses)
+    if st.button("📦 تجهيز تقرير المجموعات المحاسبية (Excel)", use_container_width=True):
+        st.download_button("⬇️ تنزيل", data=gl_report_xlsx(rollups, reconciliation),
+                           file_name=export_filename("xlsx", "gl_report"),
+                           mime=EXPORT_FORMATS["xlsx"][1], use_container_width=True)
+
+# 🗂️ لقطات السجل ومقارنة الفترات
+SNAPSHOT_SHEETS = {"summary": "الملخص", "added": "إضافات", "disposed": "استبعادات", "transferred": "تحويلات", "revalued": "إعادة تقييم"}
+
+def snapshot_view():
+    """حفظ نسخة ثابتة من السجل لكل فترة ومقارنة أي نسختين: الإضافات والاستبعادات والتحويلات وإعادة التقييم"""
+    st.subheader("🗂️ مقارنة الفترات")
+    current_cols = {"unique": unique_asset_col, "description": desc_col, "cost": cost_col, "nbv": nbv_col,
+                    "city": city_col, "building": building_col, "floor": floor_col, "room": room_col}
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        label = st.text_input("اسم الفترة:", value=datetime.now().strftime("%Y-%m"), key="snapshot_label")
+    with col2:
+        st.write("")
+        if st.button("📸 حفظ لقطة", use_container_width=True):
+            meta = snapshots.create(df, label, dataset_key, current_cols)
+            st.success(f"✅ تم حفظ لقطة {meta['label']} ({meta['rows']:,} صف)")
+    
+    saved = snapshots.list_snapshots()
+    if not saved:
+        st.info("لا توجد لقطات محفوظة بعد. احفظ لقطة للفترة الحالية ثم قارن بها السجلات اللاحقة.")
+        return
+    if unique_asset_col not in df.columns:
+        st.warning("لا يحتوي السجل على عمود رقم الأصل الفريد اللازم للمقارنة.")
+        return
+    
+    options = {"السجل الحالي": None}
+    options.update({f"{m['label']} ({m['rows']:,} صف)": m for m in reversed(saved)})
+    names = list(options)
+    col1, col2 = st.columns(2)
+    with col1:
+        old_name = st.selectbox("الفترة السابقة:", names, index=1, key="snapshot_old")
+    with col2:
+        new_name = st.selectbox("الفترة الحالية:", names, index=0, key="snapshot_new")
+    if old_name == new_name:
+        st.info("اختر فترتين مختلفتين للمقارنة.")
+        return
+    
+    def version(name):
+        meta = options[name]
+        if meta is None:
+            return df, current_cols
+        cols = meta["cols"]
+        return snapshots.load(meta["id"], columns=sorted(set(cols.values()))), cols
+    
+    (old, old_cols), (new, new_cols) = version(old_name), version(new_name)
+    if "unique" not in old_cols or "unique" not in new_cols:
+        st.warning("إحدى اللقطتين لا تحتوي على عمود رقم الأصل الفريد.")
+        return
+    result = snapshots.diff(old, new, old_cols, new_cols)
+    summary_ = result["summary"]
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("إضافات", f"{summary_['added']:,}", f"{summary_['added_cost']:,.0f} ريال")
+    col2.metric("استبعادات", f"{summary_['disposed']:,}", f"-{summary_['disposed_cost']:,.0f} ريال")
+    col3.metric("تحويلات", f"{summary_['transferred']:,}")
+    col4.metric("إعادة تقييم", f"{summary_['revalued']:,}", f"{summary_['revaluation']:,.0f} ريال")
+    st.caption(f"أصول مشتركة بين الفترتين: {summary_['matched']:,} — تغير صافي القيمة الدفترية لها: {summary_['nbv_movement']:,.0f} ريال")
+    
+    frames = snapshots.tables(old, new, result, old_cols, new_cols, shown=("description", "city", "cost"))
+    for kind in ("added", "disposed", "transferred", "revalued"):
+        frame = frames[kind]
+        with st.expander(f"{SNAPSHOT_SHEETS[kind]} ({len(frame):,})"):
+            st.dataframe(frame.head(1000), hide_index=True, use_container_width=True)
+    
+    if st.button("📦 تجهيز تقرير المقارنة (Excel)", use_container_width=True):
+        st.download_button("⬇️ تنزيل", data=snapshots.report_xlsx(summary_, frames, SNAPSHOT_SHEETS),
+                           file_name=export_filename("xlsx", "period_diff"),
+                           mime=EXPORT_FORMATS["xlsx"][1], use_container_width=True)
 
-# إنشاء المساعد الذكي
-ai_assistant = AssetAIAssistant(df)
+# 🗺️ خريطة الأصول
+MAX_MAP_CLUSTERS = 5000  # أقصى عدد من المجموعات يُرسل إلى المتصفح
+
+def map_view():
+    """عرض الأصول على الخريطة مجمّعة حسب مستوى التقريب (تُرسل ملخصات المجموعات فقط إلى المتصفح)"""
+    st.subheader("🗺️ خريطة الأصول")
+    if coord_col not in df.columns:
+        st.info("لا يحتوي السجل على عمود الإحداثيات.")
+        return
+    
+    geo = ai_assistant.geo_clusters()
+    if not len(geo):
+        st.warning("لا توجد إحداثيات صالحة في السجل.")
+        return
+    if geo.missing:
+        st.caption(f"⚠️ {geo.missing:,} أصل بدون إحداثيات صالحة لا يظهر على الخريطة.")
+    
+    zoom = st.slider("مستوى التقريب:", MIN_ZOOM, MAX_ZOOM, 5, key="map_zoom")
+    clusters = geo.clusters(zoom)
+    if len(clusters) > MAX_MAP_CLUSTERS:
+        st.caption(f"عرض أكبر {MAX_MAP_CLUSTERS:,} مجموعة من {len(clusters):,}؛ قلّل مستوى التقريب لرؤية الكل.")
+        clusters = clusters.nlargest(MAX_MAP_CLUSTERS, "count")
+    
+    # نصف قطر الدائرة بالمتر: ربع عرض الخلية مضروباً في الجذر التربيعي لحصتها من أكبر مجموعة
+    cell_meters = 40_075_000 / 2 ** (zoom + 2)
+    points = clusters[["lat", "lon"]].copy()
+    points["size"] = cell_meters / 4 * np.sqrt(clusters["count"] / clusters["count"].max()).clip(lower=0.15)
+    st.map(points, latitude="lat", longitude="lon", size="size", zoom=zoom)
+    
+    col1, col2 = st.columns(2)
+    col1.metric("الأصول على الخريطة", f"{len(geo):,}")
+    col2.metric("عدد المجموعات", f"{len(clusters):,}")
+    
+    largest = clusters.nlargest(20, "count")
+    labels = {cell: f"{lat:.4f}، {lon:.4f} ({count:,} أصل)"
+              for cell, lat, lon, count in zip(largest["cell"], largest["lat"], largest["lon"], largest["count"])}
+    cell = st.selectbox("أكبر المجموعات:", list(labels), format_func=labels.get, key="map_cluster")
+    rows = geo.rows(zoom, cell)
+    shown_cols = [c for c in (unique_asset_col, desc_col, city_col, building_col, room_col, cost_col, coord_col) if c in df.columns]
+    st.dataframe(df.take(rows[:1000])[shown_cols], hide_index=True, use_container_width=True)
+
+# 🪪 بطاقة الأصل (من مخزن الصفوف المعيّن في الذاكرة دون المرور على السجل كاملاً)
+def asset_card_view():
+    """عرض السجل الكامل لأصل واحد برقمه الفريد أو وسمه، مع تنزيله PDF"""
+    st.subheader("🪪 بطاقة أصل")
+    keys = {"unique": unique_asset_col, "tag": tag_col}
+    with st.spinner("جاري تجهيز فهرس الأصول..."):
+        row_store = dataset.artifact(("row_store",) + tuple(keys.values()), lambda: open_store(dataset.key, df, keys))
+    
+    asset_key = st.text_input("رقم الأصل الفريد أو رقم الوسم:", key="asset_card_key").strip()
+    if not asset_key:
+        return
+    row = row_store.find(asset_key)
+    if row is None:
+        st.warning(f"لا يوجد أصل بالرقم أو الوسم: {asset_key}")
+        return
+    
+    record = row_store.record(row)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("التكلفة", f"{record.get(str(cost_col)) or 0:,.0f} ريال")
+    col2.metric("صافي القيمة الدفترية", f"{record.get(str(nbv_col)) or 0:,.0f} ريال")
+    col3.metric("المدينة", str(record.get(str(city_col)) or "غير محدد"))
+    card = pd.DataFrame({"الحقل": list(record), "القيمة": ["—" if v is None else str(v) for v in record.values()]})
+    st.dataframe(card, hide_index=True, use_container_width=True)
+    
+    if st.button("📄 تجهيز بطاقة الأصل (PDF)", use_container_width=True):
+        title = f"بطاقة أصل: {record.get(str(desc_col)) or asset_key}"
+        st.download_button("⬇️ تنزيل", data=make_asset_pdf(title, [("بيانات الأصل", card)]),
+                           file_name=export_filename("pdf", "asset_card"), mime="application/pdf",
+                           use_container_width=True)
+
+# 📥 تصدير النتائج
+def export_panel():
+    """تصدير نتائج آخر سؤال أو السجل كاملاً إلى Excel أو CSV أو Parquet"""
+    st.markdown("---")
+    st.markdown("### 📥 تصدير النتائج")
+    
+    context = st.session_state.get("result_context")
+    scopes = ["السجل كاملاً"]
+    if context is not None and context.dataset_key == dataset_key:
+        scopes.insert(0, f"نتائج آخر سؤال: {context.question} ({len(context):,} صف)")
+    
+    col1, col2, col3 = st.columns([3, 2, 2])
+    with col1:
+        scope = st.selectbox("البيانات المراد تصديرها:", scopes, key="export_scope")
+    with col2:
+        fmt = st.selectbox(
+            "الصيغة:", list(EXPORT_FORMATS.keys()),
+            format_func=lambda f: EXPORT_FORMATS[f][0], key="export_format"
+        )
+    with col3:
+        cities = []
+        if city_col in df.columns:
+            cities = st.multiselect("تصفية حسب المدينة:", sorted(df[city_col].dropna().astype(str).unique()), key="export_cities")
+    
+    rows = context.rows if scope != "السجل كاملاً" else None
+    if cities:
+        city_mask = df[city_col].astype(str).isin(cities).to_numpy()
+        rows = np.flatnonzero(city_mask) if rows is None else rows[city_mask[rows]]
+    
+    if st.button("📦 تجهيز ملف التصدير", use_container_width=True):
+        with st.spinner("جاري كتابة الملف..."):
+            path = export(df, fmt, rows)
+        try:
+            with open(path, "rb") as f:
+                st.download_button(
+                    f"⬇️ تنزيل ({len(df) if rows is None else len(rows):,} صف)",
+                    data=f,
+                    file_name=export_filename(fmt),
+                    mime=EXPORT_FORMATS[fmt][1],
+                    use_container_width=True
+                )
+        finally:
+            os.remove(path)
+
+def stream_answer(container, question, chunks):
+    """عرض الرد تدريجياً داخل المحادثة أثناء تجهيزه، وإرجاع نصه كاملاً لحفظه في السجل"""
+    with container:
+        st.markdown(f'<div class="user-message"><strong>أنت:</strong> {question}</div>', unsafe_allow_html=True)
+        st.markdown("**المساعد:**")
+        return st.write_stream(chunks)
+
+def remember_session():
+    """حفظ المحادثة والسجل الحالي على القرص لاستعادتهما بعد إعادة تشغيل الخادم"""
+    save_session(st.session_state.sid, {
+        "dataset_key": dataset_key,
+        "chat_history": st.session_state.chat_history
+    })
 
 # واجهة المساعد الذكي
 def ai_chat_interface():
@@ -542,9 +746,15 @@ def ai_chat_interface():
                 'timestamp': datetime.now()
             })
             
-            # توليد الرد
-            with st.spinner("🤔 المساعد يفكر..."):
-                response = ai_assistant.generate_response(question)
+            # توليد الرد (الأسئلة اللاحقة تُنفذ على نتيجة السؤال السابق)
+            context = st.session_state.get("result_context")
+            if context is not None and context.dataset_key != dataset_key:
+                context = None
+            response = stream_answer(chat_container, question, ai_assistant.stream_response(question, context))
+            
+            rows = ai_assistant.last_result_rows
+            if rows is not None and not (context is not None and np.array_equal(rows, context.rows)):
+                st.session_state.result_context = ResultContext(dataset_key, question, rows)
             
             # إضافة رد المساعد للسجل
             st.session_state.chat_history.append({
@@ -554,8 +764,11 @@ def ai_chat_interface():
             })
             
             # إعادة تحميل الصفحة لعرض الرد الجديد
+            remember_session()
             st.rerun()
     
+    export_panel()
+    
     # خيارات إضافية
     st.markdown("---")
     col1, col2 = st.columns(2)
@@ -563,6 +776,8 @@ def ai_chat_interface():
     with col1:
         if st.button("🗑️ مسح المحادثة", use_container_width=True):
             st.session_state.chat_history = []
+            st.session_state.pop("result_context", None)
+            remember_session()
             st.rerun()
     
     with col2:
@@ -573,27 +788,59 @@ def ai_chat_interface():
                 'timestamp': datetime.now()
             })
             
-            detailed_report = ai_assistant.handle_summary_questions("تقرير مفصل")
+            detailed_report = stream_answer(chat_container, "أعطني تقرير مفصل عن جميع الأصول",
+                                            ai_assistant.handle_summary_questions("تقرير مفصل"))
             st.session_state.chat_history.append({
                 'type': 'assistant',
                 'content': detailed_report,
                 'timestamp': datetime.now()
             })
+            remember_session()
             st.rerun()
 
 # العرض حسب الوضع المختار
 if display_mode == "المساعد الذكي":
     ai_chat_interface()
 elif display_mode == "لوحة التحكم":
-    # ... (كود لوحة التحكم السابق)
-    st.info("🚀 استخدم المساعد الذكي للحصول على إجابات فورية عن بياناتك!")
+    dashboard_view()
 elif display_mode == "التحليل المالي":
-    # ... (كود التحليل المالي السابق) 
-    st.info("💬 جرب المساعد الذكي لطرح أسئلة محددة عن تحليلاتك!")
+    financial_view()
+elif display_mode == "كشف التكرار":
+    duplicates_view()
+elif display_mode == "الجرد الفعلي":
+    reconciliation_view()
+elif display_mode == "المجموعات المحاسبية":
+    gl_view()
+elif display_mode == "مقارنة الفترات":
+    snapshot_view()
+elif display_mode == "خريطة الأصول":
+    map_view()
+elif display_mode == "بطاقة أصل":
+    asset_card_view()
 else:
     ai_chat_interface()
     st.markdown("---")
-    # ... (إضافة باقي الوظائف)
+    dashboard_view()
+    st.markdown("---")
+    financial_view()
+
+# 💾 حفظ السجل وما بُني عليه من فهارس على القرص في الخلفية
+save_dataset_async(dataset)
+
+# ⏱️ لوحة مراقبة الأداء
+with st.sidebar:
+    st.markdown("---")
+    with st.expander("⏱️ لوحة الأداء (للمشرف)"):
+        stage_stats = summary()
+        if stage_stats:
+            st.caption("زمن كل مرحلة بالملّي ثانية (آخر 500 قياس لكل مرحلة ونوع سؤال)")
+            st.dataframe(pd.DataFrame(stage_stats), hide_index=True, use_container_width=True)
+        else:
+            st.caption("لا توجد قياسات بعد.")
+        st.caption("مجموعات البيانات المشتركة في الذاكرة")
+        st.dataframe(pd.DataFrame(store_stats()), hide_index=True, use_container_width=True)
+        if st.button("💾 تصدير المقاييس (OpenMetrics)", use_container_width=True):
+            st.success(f"تم حفظ المقاييس في: {export_openmetrics()}")
 
 # تذييل الصفحة
 st.markdown("---")
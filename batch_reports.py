@@ -0,0 +1,153 @@
+"""Generate asset-register reports without the browser (for cron or scheduled jobs).
+
+    python batch_reports.py registers/*.xlsx --template summary --question "كم عدد الأصول في الرياض؟" \
+        --formats md,xlsx,pdf --out reports/
+
+Each register goes through the same pipeline as the app (load_data, prepare_dataframe,
+saved mapping profile or guess_columns) and the same AssetAIAssistant; registers are
+processed in parallel, one worker process each.
+"""
+import argparse
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+# question lists run by --template
+REPORT_TEMPLATES = {
+    "summary": ["ملخص", "كم عدد الأصول؟", "ما إجمالي تكلفة الأصول؟", "كم عدد الأصول حسب المدينة", "أغلى الأصول"],
+    "financial": ["ما إجمالي تكلفة الأصول؟", "تحليل الاستهلاك", "التكلفة وصافي القيمة حسب المدينة",
+                  f"القيمة الدفترية المتوقعة بنهاية {datetime.now().year}", "ميزانية الاستبدال خلال 5 سنوات"],
+    "gl": ["ملخص المجموعات المحاسبية"],
+}
+# how each template question should be answered (see _intent): a handler's question type,
+# or "by_<dimension>" for a grouped query
+TEMPLATE_INTENTS = {
+    "ملخص": "summary",
+    "كم عدد الأصول؟": "count",
+    "ما إجمالي تكلفة الأصول؟": "cost",
+    "كم عدد الأصول حسب المدينة": "by_city",
+    "أغلى الأصول": "top",
+    "تحليل الاستهلاك": "depreciation",
+    "التكلفة وصافي القيمة حسب المدينة": "by_city",
+    f"القيمة الدفترية المتوقعة بنهاية {datetime.now().year}": "projection",
+    "ميزانية الاستبدال خلال 5 سنوات": "replacement",
+    "ملخص المجموعات المحاسبية": "gl",
+}
+FORMATS = ("md", "xlsx", "pdf")
+MAX_SHEET_ROWS = 100_000
+
+
+def _questions(args):
+    questions = []
+    for name in args.template or []:
+        questions += REPORT_TEMPLATES[name]
+    if args.questions_file:
+        with open(args.questions_file, encoding="utf-8") as f:
+            questions += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    questions += args.question or []
+    return questions or REPORT_TEMPLATES["summary"]
+
+
+def _markdown(name, answers):
+    lines = [f"# تقرير سجل الأصول: {name}", "", f"_{datetime.now():%Y-%m-%d %H:%M}_", ""]
+    for question, answer, _ in answers:
+        lines += [f"## {question}", "", str(answer), ""]
+    return "\n".join(lines)
+
+
+def _write_xlsx(path, df, answers):
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        pd.DataFrame([(q, a) for q, a, _ in answers], columns=["السؤال", "الإجابة"]).to_excel(
+            writer, sheet_name="الإجابات", index=False)
+        for i, (question, _, rows) in enumerate(answers, 1):
+            if rows is not None and len(rows):
+                df.take(rows[:MAX_SHEET_ROWS]).to_excel(writer, sheet_name=f"نتيجة {i}", index=False)
+
+
+def _intent(assistant, question):
+    """How the assistant will answer `question`: its question type, or "by_<dimension>" / "query" when planned."""
+    question_type, plan = assistant.route(question)
+    if plan is None:
+        return question_type
+    return f"by_{plan.group_by}" if plan.group_by else "query"
+
+
+def run_report(path, questions, out_dir, formats):
+    """Answer `questions` on one register and write its reports. Returns the written paths."""
+    from utils_assistant import AssetAIAssistant
+    from utils_ingest import ingest
+    from utils_pdf import make_asset_pdf
+    from utils_profiles import resolve_columns
+
+    with open(path, "rb") as f:
+        df = ingest(f.read())
+    colmap, _ = resolve_columns(df.columns)
+    assistant = AssetAIAssistant(df, colmap=colmap)
+    answers = []
+    for question in questions:
+        expected = TEMPLATE_INTENTS.get(question)
+        if expected is not None:
+            intent = _intent(assistant, question)
+            if intent != expected:  # e.g. a register without the column the template groups by
+                print(f"{path}: \"{question}\" answered as {intent}, expected {expected}", file=sys.stderr)
+        answer = assistant.generate_response(question)
+        answers.append((question, answer, assistant.last_result_rows))
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    stem = os.path.join(out_dir, f"{name}_{datetime.now():%Y%m%d}")
+    written = []
+    if "md" in formats:
+        with open(f"{stem}.md", "w", encoding="utf-8") as f:
+            f.write(_markdown(name, answers))
+        written.append(f"{stem}.md")
+    if "xlsx" in formats:
+        _write_xlsx(f"{stem}.xlsx", assistant.df_processed, answers)
+        written.append(f"{stem}.xlsx")
+    if "pdf" in formats:
+        with open(f"{stem}.pdf", "wb") as f:
+            f.write(make_asset_pdf(f"تقرير سجل الأصول: {name}", [(q, a) for q, a, _ in answers]))
+        written.append(f"{stem}.pdf")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch asset-register reports (Markdown, Excel, PDF).")
+    parser.add_argument("registers", nargs="+", help="register files or glob patterns (.xlsx)")
+    parser.add_argument("-q", "--question", action="append", help="a question to answer (repeatable)")
+    parser.add_argument("--questions-file", help="text file with one question per line")
+    parser.add_argument("-t", "--template", action="append", choices=sorted(REPORT_TEMPLATES),
+                        help="predefined question list (repeatable; default: summary)")
+    parser.add_argument("-o", "--out", default="reports", help="output directory (default: reports)")
+    parser.add_argument("-f", "--formats", default=",".join(FORMATS), help="comma-separated: md,xlsx,pdf")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="parallel registers")
+    args = parser.parse_args(argv)
+
+    formats = {f.strip() for f in args.formats.split(",") if f.strip()}
+    unknown = formats - set(FORMATS)
+    if unknown:
+        parser.error(f"unknown format(s): {', '.join(sorted(unknown))}")
+    paths = sorted({p for pattern in args.registers for p in (glob.glob(pattern) or [pattern])})
+    questions = _questions(args)
+    os.makedirs(args.out, exist_ok=True)
+
+    failed = 0
+    workers = max(1, min(args.workers, len(paths)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_report, path, questions, args.out, formats): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                for written in future.result():
+                    print(f"{path}: {written}")
+            except Exception as e:
+                failed += 1
+                print(f"{path}: FAILED: {e}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""Offline load test: many simulated users against one process, as in a Streamlit server.
+
+    python loadtest.py registers/reg.xlsx --sessions 20 --questions 30
+    python loadtest.py --synthetic 50000 --distinct 4 --sessions 40 --ui 2
+
+Every session uploads a register (through utils_ingest and the shared dataset store,
+so identical files are ingested once), builds its AssetAIAssistant and asks a weighted
+mix of questions with follow-ups. --ui adds sessions that drive app.py through
+Streamlit's AppTest, restored from a saved session since AppTest cannot upload files.
+Reports throughput, latency percentiles per phase and question type, and memory per
+session. Uses a temporary cache directory unless --cache-dir is given.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# (weight, question); {city}, {building} and {year} are filled from the register
+QUESTION_MIX = [
+    (20, "كم عدد الأصول؟"),
+    (15, "ما إجمالي تكلفة الأصول؟"),
+    (10, "ملخص"),
+    (10, "كم عدد الأصول في {city} وتكلفتها حسب المبنى؟"),
+    (8, "أين توجد أجهزة الكمبيوتر؟"),
+    (8, "ابحث عن كرسي"),
+    (8, "أعلى الأصول قيمة"),
+    (6, "تحليل الاستهلاك"),
+    (5, "ملخص المجموعات المحاسبية"),
+    (5, "أصول مشابهة لـ حاسب آلي"),
+    (5, "القيمة الدفترية المتوقعة بنهاية {year}"),
+    (5, "الأصول في {city} المبنى {building}"),
+    (4, "ميزانية الاستبدال خلال 5 سنوات حسب المجموعة"),
+]
+FOLLOW_UPS = ["وكم تكلفتها؟", "وما قيمتها الدفترية؟", "وكم عددها حسب المدينة؟"]
+FOLLOW_UP_RATE = 0.25
+CITIES = ["الرياض", "جدة", "مكة", "الدمام", "المدينة"]
+DESCRIPTIONS = ["كرسي مكتبي", "مكتب خشبي", "حاسب آلي محمول", "طابعة ليزر", "مكيف سبليت", "شاشة عرض", "خزانة ملفات"]
+
+
+class Recorder:
+    """Thread-safe latency samples per (phase, label)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, phase, label, seconds):
+        with self._lock:
+            self.samples[(phase, label)].append(seconds)
+
+    def error(self, phase, exc):
+        with self._lock:
+            self.errors[f"{phase}: {type(exc).__name__}: {exc}"] += 1
+
+    def timed(self, phase, label, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.add(phase, label, time.perf_counter() - start)
+        return result
+
+    def table(self) -> pd.DataFrame:
+        rows = []
+        for (phase, label), seconds in sorted(self.samples.items()):
+            ms = np.array(seconds) * 1000
+            rows.append({"phase": phase, "label": label, "count": len(ms),
+                         "p50_ms": np.quantile(ms, 0.5), "p90_ms": np.quantile(ms, 0.9),
+                         "p99_ms": np.quantile(ms, 0.99), "max_ms": ms.max()})
+        return pd.DataFrame(rows)
+
+
+class MemorySampler(threading.Thread):
+    """Peak resident set size while the test runs."""
+
+    def __init__(self, interval=0.1):
+        super().__init__(daemon=True)
+        from utils_metrics import rss_bytes
+
+        self._rss = rss_bytes
+        self.interval = interval
+        self.baseline = self.peak = rss_bytes() or 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, self._rss() or 0)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, self._rss() or 0)
+
+
+def synthetic_register(rows, seed=0) -> bytes:
+    """An Excel register in the app's layout (title row, header on the second row)."""
+    rng = np.random.default_rng(seed)
+    cost = np.round(rng.lognormal(9, 1.2, rows), 2)
+    accumulated = np.round(cost * rng.uniform(0, 0.95, rows), 2)
+    df = pd.DataFrame({
+        "Unique Asset Number in the entity": [f"UA{seed:02d}{i:08d}" for i in range(rows)],
+        "Asset Description": rng.choice(DESCRIPTIONS, rows),
+        "Tag number": [f"T{seed:02d}{i:08d}" for i in range(rows)],
+        "Date Placed in Service": pd.Timestamp("2012-01-01") + pd.to_timedelta(rng.integers(0, 4500, rows), "D"),
+        "Cost": cost,
+        "Accumulated Depreciation": accumulated,
+        "Residual Value": np.round(cost * 0.05, 2),
+        "Net Book Value": cost - accumulated,
+        "Useful Life": rng.choice([3, 5, 10, 20], rows),
+        "City": rng.choice(CITIES, rows),
+        "Geographical Coordinates": [f"{a:.5f}، {b:.5f}" for a, b in zip(rng.uniform(17, 31, rows), rng.uniform(37, 54, rows))],
+        "Building Number": rng.integers(1, 20, rows),
+        "Floors Number": rng.integers(0, 6, rows),
+        "Room/office Number": rng.integers(100, 160, rows),
+        "GL account": rng.choice([1101, 1102, 1201, 1301], rows),
+        "accounting group": rng.choice(["أثاث", "أجهزة", "مباني", "سيارات"], rows),
+    })
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
+        pd.DataFrame([["سجل الأصول"]]).to_excel(writer, index=False, header=False)
+        df.to_excel(writer, index=False, startrow=1)
+    return buf.getvalue()
+
+
+def question_mix(df, colmap, rng):
+    """A question generator for one session, filled with values from the register."""
+    from utils_assistant import asset_columns
+
+    cols = asset_columns(colmap)
+    cities = df[cols["city_col"]].dropna().astype(str).unique().tolist() if cols["city_col"] in df else []
+    buildings = df[cols["building_col"]].dropna().astype(str).unique().tolist() if cols["building_col"] in df else []
+    weights = [w for w, _ in QUESTION_MIX]
+    templates = [q for _, q in QUESTION_MIX]
+
+    def next_question():
+        template = rng.choices(templates, weights)[0]
+        return template.format(city=rng.choice(cities or CITIES), building=rng.choice(buildings or ["1"]),
+                               year=time.localtime().tm_year + rng.randint(0, 3))
+    return next_question
+
+
+def run_session(index, data, args, recorder):
+    """One simulated browser session on the data and assistant layer."""
+    from utils_assistant import AssetAIAssistant
+    from utils_ingest import submit
+    from utils_profiles import resolve_columns
+    from utils_query import ResultContext
+    from utils_store import acquire
+
+    rng = random.Random(args.seed + index)
+    time.sleep(rng.uniform(0, args.ramp))
+    key, future = recorder.timed("upload", "submit", submit, data)
+    dataset = recorder.timed("upload", "ingest_wait", future.result)
+    lease = acquire(dataset)
+    try:
+        colmap, _ = resolve_columns(dataset.df.columns)
+        assistant = recorder.timed("session", "assistant_init", AssetAIAssistant, dataset.df, dataset, colmap)
+        next_question = question_mix(dataset.df, colmap, rng)
+        context = None
+        for _ in range(args.questions):
+            question = rng.choice(FOLLOW_UPS) if context is not None and rng.random() < FOLLOW_UP_RATE else next_question()
+            label = "follow_up" if question in FOLLOW_UPS else assistant.analyze_question(question)
+            try:
+                recorder.timed("question", label, assistant.generate_response, question, context)
+            except Exception as e:
+                recorder.error(f"question {label}", e)
+                continue
+            rows = assistant.last_result_rows
+            if rows is not None and len(rows):
+                context = ResultContext(key, question, rows)
+            if args.think:
+                time.sleep(rng.expovariate(1 / args.think))
+    finally:
+        lease.release()
+    return args.questions
+
+
+def run_ui_session(index, data, args, recorder):
+    """One session through app.py with Streamlit's AppTest, restored from a saved session."""
+    from streamlit.testing.v1 import AppTest
+
+    from utils_ingest import submit
+    from utils_persist import save_async, save_session
+
+    rng = random.Random(args.seed + 10_000 + index)
+    _, future = submit(data)
+    dataset = future.result()
+    saving = save_async(dataset)
+    if saving is not None:
+        saving.result()
+    sid = uuid.uuid4().hex
+    save_session(sid, {"dataset_key": dataset.key, "chat_history": []})
+
+    at = AppTest.from_file(APP, default_timeout=args.ui_timeout)
+    at.query_params["sid"] = sid
+    start = time.perf_counter()
+    at.run()
+    while at.info and "استعادة" in at.info[0].value and time.perf_counter() - start < args.ui_timeout:
+        time.sleep(0.2)
+        at.run()
+    recorder.add("ui", "first_render", time.perf_counter() - start)
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    from utils_profiles import resolve_columns
+    next_question = question_mix(dataset.df, resolve_columns(dataset.df.columns)[0], rng)
+    for _ in range(args.questions):
+        at.text_input(key="question_input").input(next_question())
+        send = next(b for b in at.button if b.label == "إرسال السؤال")
+        recorder.timed("ui", "question", send.click().run)
+        if at.exception:
+            recorder.error("ui question", RuntimeError(at.exception[0].message))
+    return args.questions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test of the asset assistant.")
+    parser.add_argument("registers", nargs="*", help="register files (.xlsx); default: a synthetic register")
+    parser.add_argument("--synthetic", type=int, default=20_000, help="rows of the synthetic register")
+    parser.add_argument("--distinct", type=int, default=1, help="distinct synthetic registers (different uploads)")
+    parser.add_argument("-n", "--sessions", type=int, default=10, help="concurrent simulated sessions")
+    parser.add_argument("-q", "--questions", type=int, default=20, help="questions per session")
+    parser.add_argument("--think", type=float, default=0.0, help="mean think time between questions (s)")
+    parser.add_argument("--ramp", type=float, default=1.0, help="session start-up spread (s)")
+    parser.add_argument("--ui", type=int, default=0, help="extra sessions driven through app.py with AppTest")
+    parser.add_argument("--ui-timeout", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache-dir", help="dataset cache directory (default: a temporary one)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    # before the utils modules read it at import time
+    os.environ["ASSET_CACHE_DIR"] = args.cache_dir or tempfile.mkdtemp(prefix="asset-loadtest-")
+    os.environ.setdefault("ASSET_PRELOAD", "0")
+
+    if args.registers:
+        blobs = []
+        for path in args.registers:
+            with open(path, "rb") as f:
+                blobs.append(f.read())
+    else:
+        print(f"building {args.distinct} synthetic register(s) of {args.synthetic:,} rows...", file=sys.stderr)
+        blobs = [synthetic_register(args.synthetic, seed) for seed in range(args.distinct)]
+
+    recorder = Recorder()
+    memory = MemorySampler()
+    memory.start()
+    jobs = [(run_session, i) for i in range(args.sessions)] + [(run_ui_session, i) for i in range(args.ui)]
+    questions = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="session") as pool:
+        futures = [pool.submit(fn, i, blobs[i % len(blobs)], args, recorder) for fn, i in jobs]
+        for future in as_completed(futures):
+            try:
+                questions += future.result()
+            except Exception as e:
+                recorder.error("session", e)
+    elapsed = time.perf_counter() - start
+    memory.stop()
+
+    sessions = len(jobs)
+    table = recorder.table()
+    result = {
+        "sessions": sessions, "ui_sessions": args.ui, "registers": len(blobs), "questions": questions,
+        "seconds": elapsed, "questions_per_second": questions / elapsed if elapsed else None,
+        "rss_baseline_mb": memory.baseline / 2**20, "rss_peak_mb": memory.peak / 2**20,
+        "rss_per_session_mb": (memory.peak - memory.baseline) / 2**20 / max(sessions, 1),
+        "latency": table.to_dict("records"), "errors": dict(recorder.errors),
+    }
+
+    print(f"{sessions} sessions ({args.ui} via AppTest) on {len(blobs)} register(s): "
+          f"{questions:,} questions in {elapsed:.1f} s = {result['questions_per_second']:.1f} questions/s")
+    with pd.option_context("display.width", 200, "display.float_format", "{:,.1f}".format):
+        print(table.to_string(index=False))
+    print(f"memory: baseline {result['rss_baseline_mb']:,.0f} MB, peak {result['rss_peak_mb']:,.0f} MB, "
+          f"{result['rss_per_session_mb']:,.1f} MB per session")
+    for message, count in recorder.errors.items():
+        print(f"ERROR x{count}: {message}", file=sys.stderr)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=1, default=float)
+    return 1 if recorder.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("polars")
+
+import utils_backend  # noqa: E402
+from utils_backend import PandasBackend, PolarsBackend  # noqa: E402
+
+PANDAS = PandasBackend()
+POLARS = PolarsBackend()
+
+
+def frame():
+    return pd.DataFrame({
+        "text": pd.Series(["1", " 2.5 ", "abc", None, "", "-3", "1e3", "  "], dtype="string"),
+        "mixed": pd.Series([1, "2", "x", None, 4.5, " 6 ", np.nan, "7.25"], dtype=object),
+        "number": [1.0, 2.0, np.nan, 4.0, 5.5, -1.0, 0.0, 3.0],
+        "integer": [1, 2, 3, 4, 5, 6, 7, 8],
+    })
+
+
+def test_polars_is_opt_in(monkeypatch):
+    monkeypatch.delenv("ASSET_BACKEND", raising=False)
+    assert importlib.reload(utils_backend).backend.name == "pandas"
+    monkeypatch.setenv("ASSET_BACKEND", "polars")
+    assert importlib.reload(utils_backend).backend.name == "polars"
+    monkeypatch.delenv("ASSET_BACKEND")
+    importlib.reload(utils_backend)
+
+
+@pytest.mark.parametrize("column", ["text", "mixed", "number", "integer"])
+def test_to_numeric_matches_pandas(column):
+    df = frame()
+    expected = PANDAS.to_numeric(df, [column])[column]
+    result = POLARS.to_numeric(df, [column])[column]
+    np.testing.assert_array_equal(result.to_numpy(dtype="float64", na_value=np.nan),
+                                  expected.to_numpy(dtype="float64", na_value=np.nan))
+    assert result.index.equals(df.index)
+
+
+def test_to_numeric_skips_missing_columns():
+    df = frame()
+    assert POLARS.to_numeric(df, ["absent"]) == PANDAS.to_numeric(df, ["absent"]) == {}
+
+
+def test_group_sums_matches_pandas():
+    rng = np.random.default_rng(0)
+    labels = rng.choice(np.array(["الرياض", "جدة", "Dammam", None], dtype=object), size=500)
+    values = {"cost": rng.normal(1000, 300, 500), "nbv": rng.normal(500, 100, 500)}
+    values["cost"][::7] = np.nan
+
+    expected = PANDAS.group_sums(labels, values)
+    result = POLARS.group_sums(labels, values)
+
+    assert list(result.index) == list(expected.index)
+    assert list(result.columns) == list(expected.columns)
+    np.testing.assert_array_equal(result["count"].to_numpy(), expected["count"].to_numpy())
+    for name in values:
+        np.testing.assert_allclose(result[name].to_numpy(), expected[name].to_numpy(), rtol=1e-12)
+
+
+def test_group_sums_all_missing_labels():
+    labels = [None, None]
+    values = {"cost": np.array([1.0, 2.0])}
+    assert POLARS.group_sums(labels, values).empty
+    assert PANDAS.group_sums(labels, values).empty
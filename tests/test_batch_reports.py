@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_reports import REPORT_TEMPLATES, TEMPLATE_INTENTS, _intent
+from utils_assistant import AssetAIAssistant
+from utils_prepare import guess_columns
+
+
+@pytest.fixture(scope="module")
+def assistant():
+    n = 60
+    rng = np.random.default_rng(0)
+    cost = rng.uniform(1_000, 50_000, n).round(2)
+    df = pd.DataFrame({
+        "رقم الأصل الفريد": [f"A{i:04d}" for i in range(n)],
+        "وصف الأصل": rng.choice(["كرسي", "مكتب", "حاسب آلي"], n),
+        "Tag number": [f"T{i:04d}" for i in range(n)],
+        "تاريخ الدخول في الخدمة": pd.date_range("2015-01-01", periods=n, freq="45D"),
+        "التكلفة": cost,
+        "القيمة الدفترية": (cost * rng.uniform(0.1, 0.9, n)).round(2),
+        "العمر الإنتاجي": rng.choice([5, 10, 20], n),
+        "المدينة": rng.choice(["الرياض", "جدة", "الدمام"], n),
+        "رقم المبنى": rng.integers(1, 4, n),
+        "رمز المجموعة المحاسبية": rng.choice([1201, 1202], n),
+        "وصف المجموعة المحاسبية": rng.choice(["مباني", "أثاث"], n),
+    })
+    return AssetAIAssistant(df, colmap=guess_columns(df.columns))
+
+
+def test_every_template_question_has_an_intent():
+    questions = {q for template in REPORT_TEMPLATES.values() for q in template}
+    assert questions <= set(TEMPLATE_INTENTS)
+
+
+@pytest.mark.parametrize("question", sorted(TEMPLATE_INTENTS))
+def test_template_question_intent(assistant, question):
+    assert _intent(assistant, question) == TEMPLATE_INTENTS[question]
+
+
+def test_city_distribution_is_grouped(assistant):
+    answer = assistant.generate_response("كم عدد الأصول حسب المدينة")
+    assert all(city in answer for city in ("الرياض", "جدة", "الدمام"))
@@ -0,0 +1,40 @@
+import pandas as pd
+
+from utils_dedup import find_duplicates
+
+COLS = {"description": "الوصف", "cost": "التكلفة", "service_date": "التاريخ", "serial": "الرقم التسلسلي",
+        "city": "المدينة"}
+
+
+def register(**overrides):
+    df = pd.DataFrame({
+        "الوصف": ["حاسب محمول Dell Latitude", "حاسب محمول Dell Latitude", "طابعة ليزر HP"],
+        "التكلفة": [4500.0, 4500.0, 1200.0],
+        "التاريخ": pd.to_datetime(["2021-03-01", "2021-03-03", "2019-01-01"]),
+        "Tag number": ["T1", "T2", "T3"],
+        "الرقم التسلسلي": [None, None, None],
+        "المدينة": ["الرياض"] * 3,
+    })
+    return df.assign(**overrides)
+
+
+def clusters(df):
+    out = find_duplicates(df, COLS)
+    return sorted(sorted(rows) for rows in out.groupby("cluster")["row"].apply(list))
+
+
+def test_same_asset_under_two_tags_is_found():
+    assert clusters(register()) == [[0, 1]]
+
+
+def test_missing_cost_never_matches():
+    assert clusters(register(**{"التكلفة": [4500.0, None, 1200.0]})) == []
+
+
+def test_shared_serial_links_rows():
+    df = register(**{"الرقم التسلسلي": ["SN-9", None, " sn-9"], "المدينة": ["الرياض", "الرياض", "جدة"]})
+    assert clusters(df) == [[0, 1, 2]]
+
+
+def test_different_serials_do_not_prevent_a_match():
+    assert clusters(register(**{"الرقم التسلسلي": ["A1", "B2", None]})) == [[0, 1]]
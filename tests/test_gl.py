@@ -0,0 +1,39 @@
+import pandas as pd
+
+from utils_gl import read_trial_balance, reconcile_trial_balance
+
+TRIAL_BALANCE = (
+    "رقم الحساب,التكلفة,الاستهلاك المتراكم\n"
+    "1201,0.1,1\n"
+    "1201,0.2,1\n"
+    "1202,100.01,5\n"
+    "9999,1,\n"
+)
+
+
+def by_group():
+    return pd.DataFrame({"description": ["مباني", "أثاث", "سيارات"], "cost": [0.3, 100.0, 7.0],
+                         "accumulated": [2.0, 5.0, 0.0]},
+                        index=pd.Index(["1201", "1202", "1300"], name="group"))
+
+
+def test_trial_balance_lines_sum_exactly():
+    tb = read_trial_balance(TRIAL_BALANCE.encode("utf-8"), "tb.csv")
+    assert tb.loc["1201", "cost"] == 0.3  # not 0.30000000000000004
+    assert tb.loc["9999", "accumulated"] == 0.0
+
+
+def test_reconcile_flags_any_difference():
+    tb = read_trial_balance(TRIAL_BALANCE.encode("utf-8"), "tb.csv")
+    out = reconcile_trial_balance(by_group(), tb)
+    assert out.loc["1201", "status"] == "مطابق"
+    assert out.loc["1202", "status"] == "فرق"
+    assert out.loc["1202", "cost_diff"] == -0.01
+    assert out.loc["1300", "status"] == "غير موجود في الميزان"
+    assert out.loc["9999", "status"] == "غير موجود في السجل"
+
+
+def test_reconcile_against_empty_trial_balance():
+    tb = read_trial_balance(TRIAL_BALANCE.encode("utf-8"), "tb.csv").iloc[:0]
+    out = reconcile_trial_balance(by_group(), tb)
+    assert (out["status"] == "غير موجود في الميزان").all()
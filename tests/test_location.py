@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+from utils_location import LocationTree
+
+COLS = {"city": "المدينة", "building": "المبنى", "floor": "الدور", "room": "الغرفة"}
+
+
+@pytest.fixture(scope="module")
+def tree():
+    df = pd.DataFrame({"المدينة": ["الرياض", "جدة"], "المبنى": [12, 3], "الدور": [2, 1], "الغرفة": ["B-12", "101"]})
+    return LocationTree(df, COLS)
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("الأصول في الرياض المبنى 3", {"city": "الرياض", "building": "3"}),
+    ("الدور ٢ من مبنى رقم 12", {"building": "12", "floor": "2"}),
+    ("المكتب B-12", {"room": "b-12"}),
+    ("الغرفة3", {"room": "3"}),
+])
+def test_numbered_levels(tree, question, expected):
+    assert tree.parse_filters(question) == expected
+
+
+@pytest.mark.parametrize("question", ["أين يوجد مكتب خشبي؟", "أين يوجد كرسي مكتبي", "الدورة التدريبية 5",
+                                      "الأصول حسب المبنى"])
+def test_words_are_not_location_labels(tree, question):
+    assert tree.parse_filters(question) == {}
@@ -0,0 +1,47 @@
+import time
+
+import pytest
+
+import utils_metrics
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    utils_metrics.reset()
+    yield
+    utils_metrics.reset()
+
+
+def seconds(stage, label=""):
+    return [s[0] for s in utils_metrics._samples[(stage, label)]]
+
+
+def slow_chunks(n, delay):
+    for i in range(n):
+        time.sleep(delay)
+        yield i
+
+
+def test_timed_excludes_the_consumer():
+    for _ in utils_metrics.timed(slow_chunks(3, 0.01), "handler", label="count", rows=5):
+        time.sleep(0.05)
+    (elapsed,) = seconds("handler", "count")
+    assert 0.03 <= elapsed < 0.1
+    assert utils_metrics.summary()[0]["rows"] == 5
+
+
+def test_timed_records_when_the_consumer_stops_early():
+    chunks = utils_metrics.timed(slow_chunks(3, 0), "handler")
+    next(chunks)
+    chunks.close()
+    assert len(seconds("handler")) == 1
+
+
+def test_timed_records_and_reraises_errors():
+    def failing():
+        yield 1
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        list(utils_metrics.timed(failing(), "handler"))
+    assert len(seconds("handler")) == 1
@@ -0,0 +1,112 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils_prepare import (
+    COMMON_HEADERS, guess_columns, normalize_colname, normalize_colnames, parse_coordinates,
+    parse_coordinates_series, prepare_dataframe,
+)
+
+ARABIC_DIGITS = str.maketrans("0123456789", "٠١٢٣٤٥٦٧٨٩")
+
+
+def scalar_frame(values):
+    """The reference: parse_coordinates one value at a time, None as NaN."""
+    pairs = [parse_coordinates(v) for v in values]
+    return (np.array([np.nan if a is None else a for a, _ in pairs], dtype="float64"),
+            np.array([np.nan if b is None else b for _, b in pairs], dtype="float64"))
+
+
+def reference_guess_columns(columns):
+    """guess_columns as it was before the batched rewrite."""
+    colmap = {}
+    for key, variants in COMMON_HEADERS.items():
+        chosen = None
+        for v in variants:
+            for c in columns:
+                if normalize_colname(c) == normalize_colname(v):
+                    chosen = c
+                    break
+            if chosen:
+                break
+        if not chosen:
+            for v in variants:
+                for c in columns:
+                    if normalize_colname(v) in normalize_colname(c):
+                        chosen = c
+                        break
+                if chosen:
+                    break
+        colmap[key] = chosen if chosen in columns else None
+    return colmap
+
+
+def test_normalize_colname():
+    assert normalize_colname("  رقم  الأصل\tالفريد \n") == "رقم الأصل الفريد"
+    assert normalize_colname(2024) == "2024"
+    assert normalize_colname("Cost") == "Cost"
+
+
+def test_normalize_colnames_matches_normalize_colname():
+    columns = [" Cost ", "وصف\u00a0 الأصل", 12, "a\t\tb", ""]
+    assert normalize_colnames(columns) == [normalize_colname(c) for c in columns]
+
+
+def test_prepare_dataframe_drops_blank_columns_and_normalizes_headers():
+    df = pd.DataFrame([[1, 2, 3, 4]], columns=["  التكلفة ", "Unnamed: 1", " ", "وصف   الأصل"])
+    out = prepare_dataframe(df)
+    assert list(out.columns) == ["التكلفة", "وصف الأصل"]
+    assert out.iloc[0].tolist() == [1, 4]
+    out.iloc[0, 0] = 99
+    assert df.iloc[0, 0] == 1  # a copy, not a view
+
+
+def test_guess_columns_examples():
+    columns = ["رقم الأصل الفريد", "وصف  الأصل", "التكلفة الأصلية", "Tag number", "المدينة"]
+    colmap = guess_columns(columns)
+    assert colmap == reference_guess_columns(columns)
+    assert colmap["Description"] == "وصف  الأصل"
+    assert colmap["Cost"] == "التكلفة الأصلية"
+    assert colmap["City"] == "المدينة"
+    assert colmap["Coordinates"] is None
+    assert guess_columns(columns, ["City", "Cost"]) == {"City": "المدينة", "Cost": "التكلفة الأصلية"}
+
+
+def test_parse_coordinates_series_edge_cases():
+    values = pd.Series(["24.7,46.6", "46.6,24.7", "95,10", "10,190", "90.5,10", "-90,180", "10,-180.01", "٢٤٫٧,٤٦", "٢٤,٤٦", None, np.nan,
+                        "inf,1", "nan,5", "", "1,2,3"], index=range(10, 25))
+    out = parse_coordinates_series(values)
+    assert out.index.equals(values.index)
+    lat, lon = scalar_frame(values)
+    np.testing.assert_array_equal(out["lat"].to_numpy(), lat)
+    np.testing.assert_array_equal(out["lon"].to_numpy(), lon)
+    assert out.loc[10].tolist() == [24.7, 46.6]
+    assert out.loc[12].isna().all() and out.loc[13].isna().all()  # out of range
+    assert out.loc[14].isna().all() and out.loc[16].isna().all()
+    assert out.loc[15].tolist() == [-90.0, 180.0]
+    assert out.loc[18].tolist() == [24.0, 46.0]
+
+
+def test_parse_coordinates_series_100k_rows():
+    rng = np.random.default_rng(0)
+    n = 100_000
+    values = pd.Series([f"{a:.6f},{b:.6f}" for a, b in zip(rng.uniform(16, 32, n), rng.uniform(34, 56, n))])
+    values[::50] = "غير محدد"
+    values[1::97] = "٢٤,٤٦"
+
+    def best_of(fn, repeat=3):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            times.append(time.perf_counter() - start)
+        return min(times), result
+
+    batched, out = best_of(lambda: parse_coordinates_series(values))
+    scalar, (lat, lon) = best_of(lambda: scalar_frame(values), repeat=1)
+
+    np.testing.assert_array_equal(out["lat"].to_numpy(), lat)
+    np.testing.assert_array_equal(out["lon"].to_numpy(), lon)
+    assert batched < 2.0
+    assert batched < scalar
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("hypothesis")
+from hypothesis import given, settings, strategies as st  # noqa: E402
+
+from test_prepare import ARABIC_DIGITS, reference_guess_columns, scalar_frame  # noqa: E402
+from utils_prepare import COMMON_HEADERS, guess_columns, parse_coordinates_series  # noqa: E402
+
+
+odd_numbers = st.one_of(
+    st.floats(allow_nan=True, allow_infinity=True),
+    st.integers(min_value=-1000, max_value=1000),
+)
+# mostly ASCII blanks, so most pairs take the bulk path
+blanks = st.sampled_from(["", "", " ", "  ", "\t", "\xa0", "\n"])
+
+
+@st.composite
+def number_text(draw, limit):
+    # values around and just past the limit, or anything at all
+    edges = [sign * (limit + d) for sign in (1, -1) for d in (0, 1e-9, 0.5, 1)]
+    x = draw(st.one_of(st.sampled_from(edges), st.floats(min_value=-limit - 5, max_value=limit + 5),
+                       st.integers(-limit - 5, limit + 5), odd_numbers))
+    text = draw(st.sampled_from([repr, str, lambda v: f"{v:.6f}" if isinstance(v, float) else str(v)]))(x)
+    if draw(st.integers(0, 3)) == 0:
+        text = text.translate(ARABIC_DIGITS)
+    return text
+
+
+@st.composite
+def coordinate_text(draw):
+    lat, lon = draw(number_text(90)), draw(number_text(180))
+    if draw(st.integers(0, 3)) == 0:  # swapped lat/lon
+        lat, lon = lon, lat
+    sep = draw(st.sampled_from([",", ",", "،", ", ", " ، ", ";"]))
+    return draw(blanks) + lat + draw(blanks) + sep + draw(blanks) + lon + draw(blanks)
+
+
+coordinate_values = st.one_of(
+    coordinate_text(),
+    st.text(alphabet=st.sampled_from(list("0123456789٠١٢٣.,،-+eE abcغير محدد")), max_size=20),
+    st.text(max_size=15),
+    st.just(None),
+    st.just(np.nan),
+    st.floats(),
+)
+
+
+@settings(max_examples=300, deadline=None)
+@given(st.lists(coordinate_values, max_size=30))
+def test_parse_coordinates_series_matches_scalar(values):
+    out = parse_coordinates_series(values)
+    lat, lon = scalar_frame(values)
+    np.testing.assert_array_equal(out["lat"].to_numpy(), lat)
+    np.testing.assert_array_equal(out["lon"].to_numpy(), lon)
+
+
+known_headers = [v for variants in COMMON_HEADERS.values() for v in variants]
+
+
+@st.composite
+def header(draw):
+    kind = draw(st.integers(0, 3))
+    if kind == 0:
+        name = draw(st.sampled_from(known_headers))
+    elif kind == 1:  # a known header inside a longer one
+        name = draw(st.text(max_size=5)) + draw(st.sampled_from(known_headers)) + draw(st.text(max_size=5))
+    elif kind == 2:
+        name = draw(st.text(alphabet=st.sampled_from(list("الأصلرقمتكفةوصcostNameDatRgio /")), max_size=25))
+    else:
+        name = draw(st.text(max_size=20))
+    # stray whitespace the normalisation has to absorb
+    return draw(blanks) + name.replace(" ", draw(st.sampled_from([" ", "  ", "\t"]))) + draw(blanks)
+
+
+@settings(max_examples=300, deadline=None)
+@given(st.lists(header(), max_size=25))
+def test_guess_columns_matches_reference(columns):
+    assert guess_columns(columns) == reference_guess_columns(columns)
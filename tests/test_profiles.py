@@ -0,0 +1,76 @@
+import json
+import os
+
+import pytest
+
+import utils_persist
+import utils_profiles
+from utils_prepare import guess_columns
+
+
+@pytest.fixture(autouse=True)
+def profiles_path(tmp_path, monkeypatch):
+    path = tmp_path / "profiles.json"
+    monkeypatch.setattr(utils_profiles, "PROFILES_PATH", str(path))
+    return path
+
+
+COLUMNS = ["رقم الأصل الفريد", "وصف الأصل", "Book Cost", "City", "Serial No"]
+
+
+def test_without_profile_guesses():
+    assert utils_profiles.resolve_columns(COLUMNS) == (guess_columns(COLUMNS), None)
+
+
+def test_saved_names_match_regardless_of_case_and_whitespace():
+    utils_profiles.save(COLUMNS, {"Cost": "Book Cost", "Description": "وصف الأصل"}, "register")
+    renamed = ["رقم الأصل الفريد", " وصف  الأصل", "BOOK\tCOST", "City", "Serial No"]
+    colmap, profile = utils_profiles.resolve_columns(renamed)
+    assert profile["name"] == "register"
+    assert colmap["Cost"] == "BOOK\tCOST"
+    assert colmap["Description"] == " وصف  الأصل"
+
+
+def test_unsaved_keys_fall_back_to_the_guesser(profiles_path):
+    utils_profiles.save(COLUMNS, {"Cost": "Book Cost"}, "register")
+    profiles = json.loads(profiles_path.read_text(encoding="utf-8"))
+    for profile in profiles.values():
+        del profile["colmap"]["Serial Number"]  # as if saved before the key existed
+    profiles_path.write_text(json.dumps(profiles), encoding="utf-8")
+
+    colmap, _ = utils_profiles.resolve_columns(COLUMNS)
+    assert colmap["Serial Number"] == "Serial No"
+    assert colmap["City"] is None  # saved as unmapped
+
+
+def test_complete_profile_skips_the_guesser(monkeypatch):
+    utils_profiles.save(COLUMNS, {"Cost": "Book Cost"}, "register")
+    calls = []
+    monkeypatch.setattr(utils_profiles, "guess_columns", lambda *args: calls.append(args))
+    colmap, _ = utils_profiles.resolve_columns(COLUMNS)
+    assert colmap["Cost"] == "Book Cost"
+    assert calls == []
+
+
+def test_only_missing_keys_are_guessed(profiles_path, monkeypatch):
+    utils_profiles.save(COLUMNS, {"Cost": "Book Cost"}, "register")
+    profiles = json.loads(profiles_path.read_text(encoding="utf-8"))
+    for profile in profiles.values():
+        del profile["colmap"]["Serial Number"]
+    profiles_path.write_text(json.dumps(profiles), encoding="utf-8")
+
+    calls = []
+
+    def guess(columns, keys=None):
+        calls.append(keys)
+        return guess_columns(columns, keys)
+
+    monkeypatch.setattr(utils_profiles, "guess_columns", guess)
+    utils_profiles.resolve_columns(COLUMNS)
+    assert calls == [["Serial Number"]]
+
+
+@pytest.mark.skipif("ASSET_CACHE_DIR" in os.environ, reason="cache directory set explicitly")
+def test_default_location_does_not_depend_on_the_working_directory():
+    package = os.path.dirname(os.path.abspath(utils_persist.__file__))
+    assert utils_persist.CACHE_DIR == os.path.join(package, ".asset_cache")
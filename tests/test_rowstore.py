@@ -0,0 +1,61 @@
+import datetime as dt
+import os
+import time
+
+import pandas as pd
+import pytest
+
+import utils_rowstore
+
+
+@pytest.fixture(autouse=True)
+def rowstore_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils_rowstore, "ROWSTORE_DIR", str(tmp_path / "rowstore"))
+    return tmp_path / "rowstore"
+
+
+def register():
+    return pd.DataFrame({
+        "رقم الأصل": ["A-1", "a1 ", "B2", None],
+        "التكلفة": [10.5, None, 3.0, 7.0],
+        "تاريخ الشراء": pd.Series([dt.datetime(2020, 5, 1, 13, 30), None, dt.datetime(3000, 1, 1),
+                                   dt.datetime(1700, 6, 30)]),
+    })
+
+
+def test_record_and_find():
+    store = utils_rowstore.open_store("k", register(), {"unique": "رقم الأصل"})
+    assert store.find("B2") == 2
+    assert store.find("zz") is None
+    assert store.record(0) == {"رقم الأصل": "A-1", "التكلفة": 10.5,
+                               "تاريخ الشراء": pd.Timestamp("2020-05-01 13:30")}
+    assert store.record(1)["التكلفة"] is None and store.record(1)["تاريخ الشراء"] is None
+
+
+def test_dates_outside_the_nanosecond_range():
+    store = utils_rowstore.open_store("k", register(), {})
+    assert store.record(2)["تاريخ الشراء"] == pd.Timestamp(dt.datetime(3000, 1, 1))
+    assert store.record(3)["تاريخ الشراء"] == pd.Timestamp(dt.datetime(1700, 6, 30))
+
+
+def test_prune_keeps_the_most_recently_opened(rowstore_dir, monkeypatch):
+    monkeypatch.setattr(utils_rowstore, "MAX_STORES", 2)
+    df = register()
+    first = utils_rowstore.open_store("first", df, {})
+    past = time.time() - 100
+    os.utime(first.directory, (past, past))
+    second = utils_rowstore.open_store("second", df, {})
+    os.utime(second.directory, (past - 10, past - 10))
+    utils_rowstore.open_store("first", df, {})  # reopening marks it as used
+    utils_rowstore.open_store("third", df, {})
+    assert os.path.isdir(first.directory)
+    assert not os.path.isdir(second.directory)
+    assert len(os.listdir(rowstore_dir)) == 2
+
+
+def test_prune_drops_stores_unused_for_the_ttl(rowstore_dir):
+    old = utils_rowstore.open_store("old", register(), {})
+    stale = time.time() - utils_rowstore.SESSION_TTL - 1
+    os.utime(old.directory, (stale, stale))
+    new = utils_rowstore.open_store("new", register(), {})
+    assert os.listdir(rowstore_dir) == [os.path.basename(new.directory)]
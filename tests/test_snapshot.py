@@ -0,0 +1,42 @@
+import io
+from decimal import Decimal
+
+import pandas as pd
+
+import utils_snapshot
+
+COLS = {"unique": "رقم الأصل", "cost": "التكلفة", "nbv": "القيمة الدفترية", "city": "المدينة"}
+
+
+def registers():
+    old = pd.DataFrame({"رقم الأصل": ["A1", "A2", "A3", "A4"], "التكلفة": [0.1, 100.0, 50.0, 7.0],
+                        "القيمة الدفترية": [0.1, 80.0, 0.2, 1.0], "المدينة": ["الرياض", "جدة", "جدة", "الرياض"]})
+    new = pd.DataFrame({"رقم الأصل": ["a1", "A2", "A3", "A5"], "التكلفة": [0.1, 100.01, 50.0, 0.2],
+                        "القيمة الدفترية": [0.1, 70.0, 0.1, 0.2], "المدينة": ["الرياض", "جدة", "الدمام", "جدة"]})
+    return old, new
+
+
+def test_one_halala_is_a_revaluation():
+    old, new = registers()
+    result = utils_snapshot.diff(old, new, COLS, COLS)
+    assert result["revalued"]["old"].tolist() == [1]
+    assert result["revalued"]["delta"].tolist() == [0.01]
+    assert result["transferred"]["old"].tolist() == [2]
+
+
+def test_summary_totals_are_exact():
+    old, new = registers()
+    summary = utils_snapshot.diff(old, new, COLS, COLS)["summary"]
+    assert summary["revaluation"] == Decimal("0.01")
+    assert summary["added_cost"] == Decimal("0.20")
+    assert summary["disposed_cost"] == Decimal("7.00")
+    assert summary["nbv_movement"] == Decimal("70.20") - Decimal("80.30")
+
+
+def test_report_xlsx_writes_decimal_totals():
+    old, new = registers()
+    result = utils_snapshot.diff(old, new, COLS, COLS)
+    frames = utils_snapshot.tables(old, new, result, COLS, COLS)
+    summary = pd.read_excel(io.BytesIO(utils_snapshot.report_xlsx(result["summary"], frames, {})),
+                            sheet_name="summary", index_col=0)["value"]
+    assert summary["revaluation"] == 0.01
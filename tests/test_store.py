@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils_store import freeze
+
+
+def register():
+    df = pd.DataFrame({"التكلفة": [10.5, 20.0, 30.0], "العدد": [1, 2, 3], "الوصف": ["كرسي", "مكتب", "حاسب"],
+                       "التاريخ": pd.to_datetime(["2020-01-01", "2021-01-01", "2022-01-01"])},
+                      index=[10, 11, 12])
+    df.attrs["source"] = "test"
+    return df
+
+
+def test_freeze_keeps_the_frame():
+    df = register()
+    frozen = freeze(df)
+    pd.testing.assert_frame_equal(frozen, df)
+    assert frozen.attrs == {"source": "test"}
+    assert np.shares_memory(frozen["التكلفة"].to_numpy(), df["التكلفة"].to_numpy())
+
+
+@pytest.mark.parametrize("column", ["التكلفة", "العدد"])
+def test_numeric_columns_are_read_only(column):
+    frozen = freeze(register())
+    with pytest.raises(ValueError):
+        frozen.loc[10, column] = 0
+    with pytest.raises(ValueError):
+        frozen[column].to_numpy()[0] = 0
+
+
+def test_duplicate_column_names_survive():
+    df = pd.DataFrame([[1.0, 2.0]], columns=["a", "a"])
+    assert list(freeze(df).columns) == ["a", "a"]
@@ -0,0 +1,776 @@
+import re
+from datetime import datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from utils_backend import backend
+from utils_cohort import Cohorts
+from utils_depreciation import DepreciationSchedule, DECLINING_BALANCE, STRAIGHT_LINE, year_end
+from utils_geo import GeoClusters
+from utils_gl import compute_rollups, MEASURE_NAMES as GL_MEASURE_NAMES
+from utils_location import LocationTree, LEVEL_NAMES
+from utils_metrics import span, timed
+from utils_money import to_minor, total
+from utils_profiles import resolve_columns
+from utils_query import QueryEngine, is_follow_up, MEASURE_NAMES, DIMENSION_NAMES
+from utils_semantic import SemanticIndex
+
+# The question-answering assistant, independent of Streamlit so the app and
+# the batch command line (batch_reports.py) answer questions the same way.
+
+# assistant attribute -> (mapping keys tried in order, header used when none is mapped)
+COLUMN_FIELDS = {
+    "unique_asset_col": (("Asset Unique No",), "Unique Asset Number in the entity"),
+    "tag_col": (("Tag Number",), "Tag number"),
+    "desc_col": (("Description",), "Asset Description"),
+    "cost_col": (("Cost",), "Cost"),
+    "nbv_col": (("Net Book Value",), "Net Book Value"),
+    "city_col": (("City",), "City"),
+    "building_col": (("Building",), "Building Numbe"),
+    "floor_col": (("Floor",), "Floor"),
+    "room_col": (("Room/Office",), "Room/Office"),
+    "service_date_col": (("Date Placed in Service",), "Date Placed in Service"),
+    "useful_life_col": (("Useful Life",), "Useful Life"),
+    "remaining_life_col": (("Remaining Life",), "Remaining useful life"),
+    "residual_col": (("Residual Value",), "Residual Value"),
+    "group_col": (("Accounting Group Desc", "Accounting Group Code"), "Accounting Group Desc"),
+    "group_code_col": (("Accounting Group Code",), "Accounting Group Code"),
+    "group_desc_col": (("Accounting Group Desc",), "Accounting Group Desc"),
+    "accumulated_col": (("Accumulated Depreciation",), "Accumulated Depreciation"),
+    "coord_col": (("Coordinates",), "Geographical Coordinates"),
+}
+
+
+def asset_columns(colmap: dict) -> dict:
+    """{attribute: column} for a guess_columns/profile mapping, with the standard headers as defaults."""
+    return {attr: next((colmap[k] for k in keys if colmap.get(k)), default)
+            for attr, (keys, default) in COLUMN_FIELDS.items()}
+
+
+# 🔧 دالة لتحويل الأعمدة إلى رقمية
+def convert_to_numeric(df, column_name):
+    """تحويل عمود إلى قيم رقمية مع معالجة الأخطاء"""
+    if column_name not in df.columns:
+        return df, False
+    
+    original_dtype = df[column_name].dtype
+    if np.issubdtype(original_dtype, np.number):
+        return df, True
+    
+    df[column_name] = backend.to_numeric(df, [column_name])[column_name]
+    successful_conversion = df[column_name].notna().any()
+    
+    return df, successful_conversion
+
+# أنواع الأسئلة التي تُجرب عليها خطة الاستعلام المركب قبل المعالج المخصص
+PLANNED_INTENTS = ('drilldown', 'count', 'cost', 'depreciation', 'city', 'summary', 'general')
+
+# 🤖 نظام الذكاء الاصطناعي للمساعد
+class AssetAIAssistant:
+    def __init__(self, df, dataset=None, colmap=None):
+        with span("assistant_init", rows=len(df)):
+            self.df = df
+            self.dataset = dataset
+            self.colmap = colmap if colmap is not None else resolve_columns(df.columns)[0]
+            self._artifacts = {}
+            self.setup_columns()
+            self.prepare_data()
+        
+    def setup_columns(self):
+        """إعداد الأعمدة المستخدمة في التحليل"""
+        for attr, column in asset_columns(self.colmap).items():
+            setattr(self, attr, column)
+        
+    def artifact(self, name, builder):
+        """فهرس أو تجميعة مبنية على البيانات؛ تُبنى مرة واحدة وتُشارك بين الجلسات عبر مخزن البيانات"""
+        if self.dataset is not None:
+            return self.dataset.artifact(name, builder)
+        if name not in self._artifacts:
+            self._artifacts[name] = builder()
+        return self._artifacts[name]
+    
+    def convert_financials(self):
+        """نسخة سطحية من البيانات مع تحويل الأعمدة المالية فقط (دون نسخ باقي الأعمدة)"""
+        df_processed = self.df.copy(deep=False)
+        cost_converted = nbv_converted = False
+        
+        if self.cost_col in df_processed.columns:
+            df_processed, cost_converted = convert_to_numeric(df_processed, self.cost_col)
+        if self.nbv_col in df_processed.columns:
+            df_processed, nbv_converted = convert_to_numeric(df_processed, self.nbv_col)
+        
+        return df_processed, cost_converted, nbv_converted
+    
+    def prepare_data(self):
+        """تحضير البيانات للتحليل"""
+        # تحويل الأعمدة المالية (مشترك بين جميع الجلسات التي رفعت نفس الملف)
+        self.df_processed, self.cost_converted, self.nbv_converted = self.artifact(
+            ("df_processed", self.cost_col, self.nbv_col), self.convert_financials
+        )
+        
+        # المبالغ بالهللات (أعداد صحيحة) ليطابق المجموع دفتر الأستاذ حتى آخر هللة
+        self.amounts = self.artifact(("amounts", self.cost_col, self.nbv_col), self.minor_amounts)
+        
+        # حساب الإحصائيات الأساسية
+        self.total_assets = len(self.df_processed)
+        self.total_cost = total(self.amounts["cost"]) if self.cost_converted else Decimal(0)
+        self.total_nbv = total(self.amounts["nbv"]) if self.nbv_converted else Decimal(0)
+    
+    def minor_amounts(self):
+        """التكلفة وصافي القيمة الدفترية بالهللات (int64) لكل أصل"""
+        return {name: to_minor(self.df_processed[col]) for name, col, converted in
+                (("cost", self.cost_col, self.cost_converted), ("nbv", self.nbv_col, self.nbv_converted))
+                if converted}
+        
+    def analyze_question(self, question):
+        """تحليل السؤال وتحديد نوعه"""
+        question = question.lower().strip()
+        
+        # أنماط الأسئلة
+        patterns = {
+            'replacement': r'(استبدال|إحلال|نهاية العمر|انتهاء العمر|ينتهي عمرها|تنتهي أعمارها|العمر المتبقي|العمر الإنتاجي المتبقي)',
+            'projection': r'(نهاية \d{4}|بنهاية|بحلول|متوقع|توقع|إسقاط|عام \d{4}|سنة \d{4})',
+            'gl': r'(المجموعات المحاسبية|المجموعة المحاسبية|مجموعة محاسبية|الأستاذ العام|ميزان المراجعة|حسابات الأصول)',
+            'drilldown': r'(المبنى|مبنى|الدور|الطابق|الغرفة|غرفة|المكتب)\s*(رقم\s*)?[\d٠-٩]',
+            'similar': r'(مشابه|يشبه|تشبه|مماثل|شبيه)',
+            'count': r'(كم|عدد|كم عدد|ما عدد|كم يوجد|كم لدينا)',
+            'cost': r'(تكلفة|سعر|قيمة|ثمن|مبلغ|التكلفة|القيمة)',
+            'location': r'(أين|مكان|موقع|في أي|مكان وجود|أين يوجد)',
+            'search': r'(ابحث|عرض|أرني|اظهر|جد|ابحث عن|عرض لي)',
+            'summary': r'(ملخص|إحصائيات|نظرة|عرض عام|معلومات عامة)',
+            'depreciation': r'(استهلاك|إهلاك|مستهلَك|قيمة متبقية|صافي قيمة)',
+            'city': r'(مدينة|منطقة|موقع جغرافي|في الرياض|في جدة)',
+            'top': r'(أعلى|أكبر|أغلى|أعلى قيمة|أكبر تكلفة)'
+        }
+        
+        question_type = 'general'
+        with span("intent") as s:
+            for q_type, pattern in patterns.items():
+                if re.search(pattern, question):
+                    question_type = q_type
+                    break
+            s.label = question_type
+                
+        return question_type
+    
+    def generate_response(self, question, context=None):
+        """توليد رد بناءً على نوع السؤال؛ context: مواقع صفوف نتيجة السؤال السابق للأسئلة اللاحقة"""
+        return "".join(self.stream_response(question, context))
+    
+    def stream_response(self, question, context=None):
+        """الرد على شكل أجزاء متتالية (الرقم الرئيسي أولاً ثم التفاصيل) للعرض التدريجي بـ st.write_stream"""
+        question_type, plan = self.route(question)
+        self.last_result_rows = None  # مواقع صفوف نتيجة السؤال (للتصدير وللأسئلة اللاحقة)
+        
+        # سؤال لاحق ("وكم تكلفتها؟"): يُنفذ على صفوف النتيجة السابقة فقط
+        if context is not None and is_follow_up(question):
+            engine = self.query_engine()
+            follow_up = engine.parse(question)
+            if not follow_up.is_empty:
+                yield from timed(self.handle_planned_query(engine, follow_up, context),
+                                 "planner", label="follow_up", rows=len(context))
+                return
+        
+        if plan is not None:
+            yield from timed(self.handle_planned_query(self.query_engine(), plan),
+                             "planner", label=question_type, rows=self.total_assets)
+            return
+        
+        yield from timed(self.dispatch(question_type, question), "handler", label=question_type, rows=self.total_assets)
+    
+    def route(self, question):
+        """(نوع السؤال، الخطة): الخطة للأسئلة المركبة (عدة مقاييس أو تصفية أو تجميع) التي تُنفذ كاستعلام واحد، وإلا None"""
+        question_type = self.analyze_question(question)
+        if question_type in PLANNED_INTENTS:
+            plan = self.query_engine().parse(question)
+            if plan.is_compound:
+                return question_type, plan
+        return question_type, None
+    
+    def query_engine(self):
+        """محرك الاستعلامات المركبة (رموز المدن والمباني والمجموعات والقيم المالية مجهزة مسبقاً)"""
+        cols = {"city": self.city_col, "building": self.building_col, "floor": self.floor_col,
+                "room": self.room_col, "group": self.group_col}
+        if self.cost_converted:
+            cols["cost"] = self.cost_col
+        if self.nbv_converted:
+            cols["nbv"] = self.nbv_col
+        
+        def build():
+            with span("query_engine", rows=self.total_assets):
+                return QueryEngine(self.df_processed, cols)
+        
+        return self.artifact(("query_engine",) + tuple(cols.items()), build)
+    
+    def handle_planned_query(self, engine, plan, context=None):
+        """عرض نتيجة استعلام مركب في رد واحد (على السجل كاملاً أو على نتيجة سؤال سابق)"""
+        result, rows = engine.execute(plan, None if context is None else context.rows)
+        self.last_result_rows = rows
+        
+        conditions = [] if context is None else [f"ضمن نتائج \"{context.question}\" ({len(context):,} أصل)"]
+        conditions += [f"{DIMENSION_NAMES[dim]} {value}" for dim, value in plan.filters.items()]
+        low, high = plan.cost_range
+        if low is not None:
+            conditions.append(f"تكلفة أكثر من {low:,.0f} ريال")
+        if high is not None:
+            conditions.append(f"تكلفة أقل من {high:,.0f} ريال")
+        scope = "، ".join(conditions) if conditions else "جميع الأصول"
+        
+        if not len(rows):
+            yield f"❌ لا توجد أصول تطابق: {scope}"
+            return
+        
+        def fmt(measure, value):
+            return f"{int(value):,} أصل" if measure == "count" else f"{value:,.0f} ريال"
+        
+        if plan.group_by is None:
+            yield f"**النتيجة ({scope}):**\n\n"
+            for measure in result.columns:
+                yield f"• {MEASURE_NAMES[measure]}: **{fmt(measure, result[measure].iloc[0])}**\n"
+            return
+        
+        yield f"**{' و'.join(MEASURE_NAMES[m] for m in result.columns)} حسب {DIMENSION_NAMES[plan.group_by]} ({scope}):**\n\n"
+        for label, row in result.head(15).iterrows():
+            yield f"• {label}: " + " - ".join(fmt(m, row[m]) for m in result.columns) + "\n"
+        if len(result) > 15:
+            yield f"... و{len(result) - 15} أخرى\n"
+    
+    def dispatch(self, question_type, question):
+        """استدعاء المعالج المناسب لنوع السؤال"""
+        if question_type == 'replacement':
+            yield from self.handle_replacement_questions(question)
+        elif question_type == 'projection':
+            yield from self.handle_projection_questions(question)
+        elif question_type == 'gl':
+            yield from self.handle_gl_questions(question)
+        elif question_type == 'drilldown':
+            yield from self.handle_location_questions(question)
+        elif question_type == 'similar':
+            yield from self.handle_similar_questions(question)
+        elif question_type == 'count':
+            yield from self.handle_count_questions(question)
+        elif question_type == 'cost':
+            yield from self.handle_cost_questions(question)
+        elif question_type == 'location':
+            yield from self.handle_location_questions(question)
+        elif question_type == 'search':
+            yield from self.handle_search_questions(question)
+        elif question_type == 'summary':
+            yield from self.handle_summary_questions(question)
+        elif question_type == 'depreciation':
+            yield from self.handle_depreciation_questions(question)
+        elif question_type == 'city':
+            yield from self.handle_city_questions(question)
+        elif question_type == 'top':
+            yield from self.handle_top_questions(question)
+        else:
+            yield from self.handle_general_questions(question)
+    
+    def handle_count_questions(self, question):
+        """معالجة أسئلة العد والإحصاء"""
+        if 'أصل' in question or 'أصول' in question:
+            yield f"إجمالي عدد الأصول في النظام: **{self.total_assets:,}** أصل"
+            
+            if self.city_col in self.df_processed.columns:
+                city_counts = self.df_processed[self.city_col].value_counts().head(5)
+                if not city_counts.empty:
+                    yield "\n\n**التوزيع حسب المدن:**"
+                    for city, count in city_counts.items():
+                        yield f"\n• {city}: {count:,} أصل"
+            
+            return
+        
+        yield "يمكنني مساعدتك في معرفة عدد الأصول. هل تقصد عدد الأصول الكلي؟"
+    
+    def handle_cost_questions(self, question):
+        """معالجة الأسئلة المتعلقة بالتكلفة والقيمة"""
+        if not self.cost_converted:
+            yield "⚠️ عذراً، لا توجد بيانات مالية متاحة للتحليل."
+            return
+        
+        if 'إجمالي' in question or 'كلي' in question or 'مجموع' in question:
+            yield f"**إجمالي قيمة الأصول:** {self.total_cost:,.0f} ريال\n\n**صافي القيمة الدفترية:** {self.total_nbv:,.0f} ريال"
+            return
+        
+        elif 'متوسط' in question or 'معدل' in question:
+            avg_cost = self.total_cost / self.total_assets if self.total_assets > 0 else 0
+            yield f"**متوسط تكلفة الأصل الواحد:** {avg_cost:,.0f} ريال"
+            return
+        
+        elif 'أعلى' in question or 'أغلى' in question:
+            top_assets = self.df_processed.nlargest(5, self.cost_col)
+            self.last_result_rows = self.row_positions(top_assets)
+            yield "**أغلى 5 أصول:**\n"
+            for idx, asset in top_assets.iterrows():
+                asset_name = asset.get(self.desc_col, 'غير محدد')
+                cost = asset.get(self.cost_col, 0)
+                yield f"\n• {asset_name}: {cost:,.0f} ريال"
+            return
+        
+        yield f"إجمالي تكلفة جميع الأصول: **{self.total_cost:,.0f} ريال**"
+    
+    def location_tree(self):
+        """شجرة المواقع (مدينة ← مبنى ← دور ← غرفة) مع عدد الأصول وتكلفتها لكل عقدة"""
+        cols = {"city": self.city_col, "building": self.building_col, "floor": self.floor_col, "room": self.room_col}
+        
+        def build():
+            with span("location_tree", rows=self.total_assets):
+                values = {}
+                if self.cost_converted:
+                    values["cost"] = self.df_processed[self.cost_col].to_numpy()
+                if self.nbv_converted:
+                    values["nbv"] = self.df_processed[self.nbv_col].to_numpy()
+                return LocationTree(self.df_processed, cols, values)
+        
+        return self.artifact(("location_tree",) + tuple(cols.values()) + (self.cost_col, self.nbv_col), build)
+    
+    def handle_location_questions(self, question):
+        """معالجة الأسئلة المتعلقة بالمواقع"""
+        if self.city_col not in self.df_processed.columns:
+            yield "⚠️ لا توجد بيانات عن مواقع الأصول."
+            return
+        
+        tree = self.location_tree()
+        filters = tree.parse_filters(question)
+        is_where = 'أين' in question or 'مكان' in question
+        
+        if any(level != 'city' for level in filters) or (filters and not is_where):
+            yield from self.handle_location_drilldown(tree, filters)
+            return
+        
+        if is_where:
+            # البحث عن الأصل المحدد في السؤال بتمريرة واحدة على الوصف والوسم
+            stop_words = {'أين', 'يوجد', 'توجد', 'مكان', 'وجود', 'موقع'}
+            words = [w.strip('؟?.,،') for w in question.split()]
+            words = [re.escape(w) for w in words if len(w) > 2 and w not in stop_words]
+            if words:
+                pattern = '|'.join(words)
+                mask = (
+                    self.df_processed[self.desc_col].astype(str).str.contains(pattern, na=False, regex=True) |
+                    self.df_processed[self.tag_col].astype(str).str.contains(pattern, na=False, regex=True)
+                )
+                rows = np.flatnonzero(mask.to_numpy())
+                if rows.size:
+                    self.last_result_rows = rows
+                    level_cols = [c for c in (self.city_col, self.building_col, self.floor_col, self.room_col)
+                                  if c in self.df_processed.columns]
+                    locations = self.df_processed.iloc[rows][level_cols].astype(str).value_counts().head(5)
+                    yield f"**تم العثور على {len(rows):,} أصل في المواقع التالية:**\n"
+                    for location, count in locations.items():
+                        location = location if isinstance(location, tuple) else (location,)
+                        yield f"\n• {' - '.join(location)}: {count:,} أصل"
+                    return
+            
+            yield "يرجى تحديد الأصل الذي تبحث عنه (رقم الوسم أو الوصف)"
+            return
+        
+        cities = self.df_processed[self.city_col].dropna().unique()
+        yield f"**المدن المتاحة:** {', '.join([str(c) for c in cities])}"
+    
+    def handle_location_drilldown(self, tree, filters):
+        """إحصائيات موقع محدد وتوزيعه على المستوى التالي (مثال: غرف الدور 3 في المبنى 12)"""
+        path = " › ".join(f"{LEVEL_NAMES[level]} {filters[level]}" for level in tree.levels if level in filters)
+        totals = tree.rollup(**filters)
+        if totals["count"] == 0:
+            yield f"❌ لا توجد أصول مسجلة في: {path}"
+            return
+        
+        self.last_result_rows = tree.rows(**filters)
+        
+        yield f"**الأصول في: {path}**\n\n"
+        yield f"• عدد الأصول: **{totals['count']:,}**\n"
+        if "cost" in totals:
+            yield f"• إجمالي التكلفة: **{totals['cost']:,.0f} ريال**\n"
+        if "nbv" in totals:
+            yield f"• صافي القيمة الدفترية: **{totals['nbv']:,.0f} ريال**\n"
+        
+        children = tree.children(**filters)
+        if not children.empty:
+            level = children.index.name
+            yield f"\n**التوزيع حسب {LEVEL_NAMES[level]}:**\n"
+            for label, row in children.head(15).iterrows():
+                cost = f" - {row['cost']:,.0f} ريال" if "cost" in row else ""
+                yield f"• {label}: {int(row['count']):,} أصل{cost}\n"
+            if len(children) > 15:
+                yield f"... و{len(children) - 15} أخرى\n"
+    
+    def handle_search_questions(self, question):
+        """معالجة أسئلة البحث"""
+        # استخراج كلمات البحث من السؤال
+        search_terms = []
+        for word in question.split():
+            if len(word) > 2 and word not in ['ابحث', 'عن', 'عرض', 'أرني', 'اظهر']:
+                search_terms.append(word)
+        
+        if not search_terms:
+            yield "يرجى تحديد ما تريد البحث عنه (مثال: ابحث عن أجهزة كمبيوتر)"
+            return
+        
+        # البحث في البيانات
+        results = []
+        result_rows = []
+        for term in search_terms:
+            mask = (
+                self.df_processed[self.desc_col].astype(str).str.contains(term, na=False, case=False) |
+                self.df_processed[self.tag_col].astype(str).str.contains(term, na=False, case=False) |
+                self.df_processed[self.unique_asset_col].astype(str).str.contains(term, na=False, case=False)
+            )
+            results.extend(self.df_processed[mask].to_dict('records'))
+            result_rows.append(np.flatnonzero(mask.to_numpy()))
+        
+        self.last_result_rows = np.unique(np.concatenate(result_rows))
+        
+        if results:
+            yield f"**تم العثور على {len(results)} نتيجة:**\n"
+            for i, asset in enumerate(results[:5], 1):  # عرض أول 5 نتائج فقط
+                desc = asset.get(self.desc_col, 'غير محدد')
+                tag = asset.get(self.tag_col, 'غير محدد')
+                cost = asset.get(self.cost_col, 0)
+                yield f"\n{i}. {desc} (الوسم: {tag}) - {cost:,.0f} ريال"
+            
+            if len(results) > 5:
+                yield f"\n\n... وعرض {len(results) - 5} نتيجة إضافية"
+            
+            return
+        elif self.desc_col in self.df_processed.columns:
+            # لا تطابق حرفي: الرجوع إلى البحث الدلالي في الأوصاف
+            similar = "".join(self.handle_similar_questions(' '.join(search_terms)))
+            if self.last_result_rows is not None and len(self.last_result_rows):
+                yield "لم يتم العثور على تطابق حرفي، وهذه أقرب الأصول:\n\n" + similar
+                return
+        
+        yield "❌ لم يتم العثور على نتائج تطابق بحثك."
+    
+    def semantic_index(self):
+        """فهرس التشابه الدلالي لأوصاف الأصول (يعمل محلياً دون اتصال)"""
+        def build():
+            with span("semantic_index", rows=self.total_assets):
+                return SemanticIndex(self.df_processed[self.desc_col])
+        
+        return self.artifact(("semantic_index", self.desc_col), build)
+    
+    def geo_clusters(self):
+        """تجميع الأصول في خلايا شبكية لكل مستوى تقريب على الخريطة (يُحسب مرة واحدة لكل سجل)"""
+        def build():
+            with span("geo_clusters", rows=self.total_assets):
+                values = {"cost": self.df_processed[self.cost_col].to_numpy()} if self.cost_converted else {}
+                return GeoClusters(self.df_processed[self.coord_col], values)
+        
+        return self.artifact(("geo_clusters", self.coord_col, self.cost_col), build)
+    
+    def handle_similar_questions(self, question):
+        """البحث عن الأصول ذات الأوصاف المشابهة (مثال: حاسب آلي ← كمبيوتر، laptop)"""
+        if self.desc_col not in self.df_processed.columns:
+            yield "⚠️ لا توجد أوصاف للأصول للبحث فيها."
+            return
+        
+        trigger_words = {'ابحث', 'عن', 'أصول', 'الأصول', 'مشابه', 'مشابهة', 'يشبه', 'تشبه',
+                         'مماثل', 'مماثلة', 'شبيه', 'ل', 'لـ'}
+        query = ' '.join(w for w in question.split() if w.strip('؟?') not in trigger_words).strip('؟? ')
+        if not query:
+            yield "يرجى كتابة وصف الأصل (مثال: أصول مشابهة لـ حاسب آلي)"
+            return
+        
+        index = self.semantic_index()
+        with span("semantic_search", rows=len(index)):
+            ids, scores = index.search(query, k=10)
+        
+        if not len(ids):
+            yield "❌ لم يتم العثور على أصول مشابهة."
+            return
+        
+        self.last_result_rows = index.rows(ids)
+        yield f"**أقرب الأوصاف إلى \"{query}\"** ({len(self.last_result_rows):,} أصل):\n"
+        for desc, score, count in zip(index.descriptions[ids], scores, index.counts[ids]):
+            yield f"\n• {desc} — تطابق {score * 100:.0f}% ({count:,} أصل)"
+    
+    def handle_summary_questions(self, question):
+        """معالجة أسئلة الملخص والإحصائيات"""
+        yield f"**ملخص شامل للأصول:**\n\n"
+        yield f"• إجمالي عدد الأصول: **{self.total_assets:,}**\n"
+        yield f"• إجمالي التكلفة: **{self.total_cost:,.0f} ريال**\n"
+        yield f"• صافي القيمة الدفترية: **{self.total_nbv:,.0f} ريال**\n"
+        
+        if self.cost_converted and self.nbv_converted:
+            depreciation = self.total_cost - self.total_nbv
+            dep_rate = (depreciation / self.total_cost * 100) if self.total_cost > 0 else 0
+            yield f"• إجمالي الاستهلاك: **{depreciation:,.0f} ريال**\n"
+            yield f"• معدل الاستهلاك: **{dep_rate:.1f}%**\n"
+        
+        if self.city_col in self.df_processed.columns:
+            city_stats = self.df_processed[self.city_col].value_counts().head(3)
+            yield f"\n**أهم المدن:**\n"
+            for city, count in city_stats.items():
+                yield f"• {city}: {count} أصل\n"
+    
+    def handle_depreciation_questions(self, question):
+        """معالجة أسئلة الاستهلاك والقيمة المتبقية"""
+        if not self.cost_converted or not self.nbv_converted:
+            yield "⚠️ لا توجد بيانات مالية كافية لتحليل الاستهلاك."
+            return
+        
+        df_analysis = self.df_processed.dropna(subset=[self.cost_col, self.nbv_col])
+        df_analysis = df_analysis[df_analysis[self.cost_col] > 0]
+        
+        if df_analysis.empty:
+            yield "❌ لا توجد بيانات صالحة لتحليل الاستهلاك."
+            return
+        
+        df_analysis['Depreciation Rate'] = (
+            (df_analysis[self.cost_col] - df_analysis[self.nbv_col]) / df_analysis[self.cost_col] * 100
+        ).round(1)
+        
+        high_dep = len(df_analysis[df_analysis['Depreciation Rate'] > 50])
+        avg_dep = df_analysis['Depreciation Rate'].mean()
+        
+        yield f"**تحليل الاستهلاك:**\n\n"
+        yield f"• متوسط معدل الاستهلاك: **{avg_dep:.1f}%**\n"
+        yield f"• عدد الأصول عالية الاستهلاك (أكثر من 50%): **{high_dep}**\n"
+        
+        # الأصول الأكثر استهلاكاً
+        high_dep_assets = df_analysis.nlargest(3, 'Depreciation Rate')
+        if not high_dep_assets.empty:
+            yield f"\n**أكثر الأصول استهلاكاً:**\n"
+            for idx, asset in high_dep_assets.iterrows():
+                desc = asset.get(self.desc_col, 'غير محدد')
+                dep_rate = asset['Depreciation Rate']
+                yield f"• {desc}: {dep_rate}%\n"
+    
+    def handle_city_questions(self, question):
+        """معالجة الأسئلة المتعلقة بالمدن"""
+        if self.city_col not in self.df_processed.columns:
+            yield "⚠️ لا توجد بيانات عن المدن."
+            return
+        
+        # استخراج اسم المدينة من السؤال
+        cities_in_data = self.df_processed[self.city_col].dropna().unique()
+        mentioned_city = None
+        
+        for city in cities_in_data:
+            if str(city).lower() in question.lower():
+                mentioned_city = city
+                break
+        
+        if mentioned_city:
+            city_mask = self.df_processed[self.city_col] == mentioned_city
+            city_assets = self.df_processed[city_mask]
+            self.last_result_rows = np.flatnonzero(city_mask.to_numpy())
+            city_count = len(city_assets)
+            city_cost = total(self.amounts["cost"][city_mask.to_numpy()]) if self.cost_converted else 0
+            
+            yield f"**إحصائيات {mentioned_city}:**\n\n"
+            yield f"• عدد الأصول: **{city_count}**\n"
+            yield f"• إجمالي التكلفة: **{city_cost:,.0f} ريال**\n"
+            
+            # أنواع الأصول في المدينة
+            if self.desc_col in city_assets.columns:
+                common_assets = city_assets[self.desc_col].value_counts().head(3)
+                if not common_assets.empty:
+                    yield f"\n**أكثر أنواع الأصول شيوعاً:**\n"
+                    for asset_type, count in common_assets.items():
+                        yield f"• {asset_type}: {count}\n"
+            
+            return
+        else:
+            city_stats = self.df_processed[self.city_col].value_counts()
+            yield "**توزيع الأصول حسب المدينة:**\n\n"
+            for city, count in city_stats.head(5).items():
+                yield f"• {city}: {count} أصل\n"
+    
+    def handle_top_questions(self, question):
+        """معالجة أسئلة الأعلى والأكبر"""
+        if not self.cost_converted:
+            yield "⚠️ لا توجد بيانات مالية للتحليل."
+            return
+        
+        n = 5  # عدد النتائج الافتراضي
+        
+        if '3' in question:
+            n = 3
+        elif '10' in question:
+            n = 10
+        
+        top_assets = self.df_processed.nlargest(n, self.cost_col)
+        self.last_result_rows = self.row_positions(top_assets)
+        
+        yield f"**أغلى {n} أصول:**\n\n"
+        for i, (idx, asset) in enumerate(top_assets.iterrows(), 1):
+            desc = asset.get(self.desc_col, 'غير محدد')
+            tag = asset.get(self.tag_col, 'غير محدد')
+            cost = asset.get(self.cost_col, 0)
+            nbv = asset.get(self.nbv_col, 0)
+            
+            yield (f"{i}. **{desc}**\n"
+                   f"   - الوسم: {tag}\n"
+                   f"   - التكلفة: {cost:,.0f} ريال\n"
+                   f"   - القيمة الدفترية: {nbv:,.0f} ريال\n\n")
+    
+    def gl_rollups(self):
+        """تجميعات المجموعات المحاسبية (التكلفة والاستهلاك المتراكم وصافي القيمة) لكل مجموعة ولكل مجموعة ومدينة"""
+        cols = {
+            "group_code": self.group_code_col, "group_desc": self.group_desc_col, "city": self.city_col,
+            "cost": self.cost_col, "nbv": self.nbv_col, "accumulated": self.accumulated_col
+        }
+        
+        def build():
+            with span("gl_rollups", rows=self.total_assets):
+                return compute_rollups(self.df_processed, cols)
+        
+        return self.artifact(("gl_rollups",) + tuple(cols.values()), build)
+    
+    def handle_gl_questions(self, question):
+        """ملخص الأصول حسب المجموعة المحاسبية، أو توزيع مجموعة محددة على المدن"""
+        rollups = self.gl_rollups()
+        if not rollups:
+            yield "⚠️ لا توجد بيانات عن المجموعات المحاسبية في السجل."
+            return
+        by_group = rollups["by_group"]
+        measures = [m for m in ("cost", "accumulated", "nbv") if m in by_group]
+        
+        def describe(group, row):
+            name = f"{group} - {row['description']}" if "description" in row and pd.notna(row["description"]) else str(group)
+            return f"**{name}**: {int(row['count']):,} أصل" + "".join(
+                f" | {GL_MEASURE_NAMES[m]}: {row[m]:,.0f}" for m in measures
+            )
+        
+        text = question.casefold()
+        mentioned = [g for g in by_group.index if g != "غير محدد" and str(g).casefold() in text]
+        if not mentioned and "description" in by_group:
+            mentioned = [g for g, d in by_group["description"].items() if pd.notna(d) and str(d).casefold() in text]
+        
+        if mentioned:
+            group = mentioned[0]
+            yield describe(group, by_group.loc[group]) + "\n\n**التوزيع حسب المدينة:**\n"
+            for city, row in rollups["by_group_city"].loc[group].iterrows():
+                yield f"• {city}: {int(row['count']):,} أصل" + "".join(
+                    f" | {GL_MEASURE_NAMES[m]}: {row[m]:,.0f}" for m in measures
+                ) + "\n"
+            return
+        
+        yield f"**الأصول حسب المجموعة المحاسبية** ({len(by_group):,} مجموعة):\n\n"
+        for group, row in by_group.head(15).iterrows():
+            yield f"• {describe(group, row)}\n"
+        if len(by_group) > 15:
+            yield f"... و{len(by_group) - 15} مجموعة أخرى\n"
+    
+    def row_positions(self, frame):
+        """مواقع صفوف جزء من البيانات داخل الجدول الكامل"""
+        return self.df_processed.index.get_indexer(frame.index)
+    
+    def depreciation_schedule(self):
+        """جدول الاستهلاك المتجه (يُبنى مرة واحدة لكل مجموعة بيانات عند أول سؤال)"""
+        def build():
+            with span("depreciation_schedule", rows=self.total_assets):
+                return DepreciationSchedule.from_frame(
+                    self.df_processed, self.cost_col, self.service_date_col,
+                    self.useful_life_col, self.residual_col
+                )
+        
+        return self.artifact(
+            ("depreciation_schedule", self.cost_col, self.service_date_col, self.useful_life_col, self.residual_col),
+            build
+        )
+    
+    def handle_projection_questions(self, question):
+        """إسقاط صافي القيمة الدفترية في نهاية سنة محددة"""
+        schedule = self.depreciation_schedule()
+        if schedule is None or not schedule.valid.any():
+            yield "⚠️ لا توجد بيانات كافية (تاريخ الدخول في الخدمة والعمر الإنتاجي) لإسقاط الاستهلاك."
+            return
+        
+        year_match = re.search(r'(19|20)\d{2}', question)
+        year = int(year_match.group()) if year_match else datetime.now().year
+        
+        if 'متناقص' in question or 'declining' in question:
+            method, method_name = DECLINING_BALANCE, "القسط المتناقص"
+        else:
+            method, method_name = STRAIGHT_LINE, "القسط الثابت"
+        
+        month = year_end(year)
+        nbv = schedule.nbv_at(month, method)
+        projected_total = np.nansum(nbv)
+        
+        yield f"**صافي القيمة الدفترية المتوقع في نهاية {year}** ({method_name}):\n\n"
+        yield f"• الإجمالي: **{projected_total:,.0f} ريال**\n"
+        yield f"• عدد الأصول المشمولة: **{int(schedule.valid.sum()):,}** من {self.total_assets:,}\n"
+        
+        if self.city_col in self.df_processed.columns:
+            city_nbv = schedule.group_nbv_at(month, self.df_processed[self.city_col], method)
+            yield f"\n**حسب المدينة:**\n"
+            for city, value in city_nbv.head(10).items():
+                yield f"• {city}: {value:,.0f} ريال\n"
+    
+    def cohorts(self):
+        """مصفوفة الأفواج (سنة الدخول في الخدمة × سنة نهاية العمر) لتوقع الاستبدال"""
+        cols = {"service_date": self.service_date_col, "useful_life": self.useful_life_col,
+                "remaining_life": self.remaining_life_col, "cost": self.cost_col,
+                "city": self.city_col, "group": self.group_col}
+        
+        def build():
+            with span("cohorts", rows=self.total_assets):
+                return Cohorts.from_frame(self.df_processed, cols)
+        
+        return self.artifact(("cohorts",) + tuple(cols.values()), build)
+    
+    def handle_replacement_questions(self, question):
+        """عدد الأصول التي تنتهي أعمارها الإنتاجية وتكلفة استبدالها لكل سنة (وحسب المدينة أو المجموعة)"""
+        cohorts = self.cohorts()
+        if cohorts is None or not cohorts.valid.any():
+            yield "⚠️ لا توجد بيانات كافية (تاريخ الدخول في الخدمة والعمر الإنتاجي أو العمر المتبقي) لتوقع الاستبدال."
+            return
+        
+        # الفترة: "بين 2026 و2030" أو "في 2027" أو "خلال 3 سنوات" (الافتراضي: السنوات الخمس القادمة)
+        years = [int(y) for y in re.findall(r'(?:19|20)\d{2}', question)]
+        span_match = re.search(r'(\d+)\s*(?:سنوات|سنة|أعوام|عام)', question)
+        if years:
+            first_year, last_year = min(years), max(years)
+        else:
+            first_year = cohorts.as_of_year
+            last_year = first_year + (int(span_match.group(1)) if span_match else 5) - 1
+        
+        inflation_match = re.search(r'(\d+(?:\.\d+)?)\s*[%٪]', question)
+        inflation = float(inflation_match.group(1)) / 100 if inflation_match else 0.0
+        
+        by_year = cohorts.by_year(first_year, last_year, inflation=inflation)
+        self.last_result_rows = cohorts.due(first_year, last_year)
+        period = str(first_year) if first_year == last_year else f"{first_year}-{last_year}"
+        yield f"**الأصول التي تنتهي أعمارها الإنتاجية ({period}):**\n\n"
+        yield f"• العدد: **{int(by_year['count'].sum()):,}** أصل\n"
+        basis = f"بتضخم {inflation:.1%} سنوياً" if inflation else "بالتكلفة التاريخية"
+        yield f"• تكلفة الاستبدال: **{by_year['cost'].sum():,.0f} ريال** ({basis})\n"
+        
+        if first_year != last_year:
+            yield "\n**حسب السنة:**\n"
+            for year, row in by_year.iterrows():
+                yield f"• {year}: {int(row['count']):,} أصل - {row['cost']:,.0f} ريال\n"
+        
+        by = 'group' if 'مجموع' in question and 'group' in cohorts.dims else 'city' if 'city' in cohorts.dims else None
+        if by is not None:
+            totals = cohorts.by_year(first_year, last_year, by=by, inflation=inflation).groupby(level=0).sum()
+            totals = totals.sort_values("cost", ascending=False)
+            yield f"\n**حسب {'المجموعة المحاسبية' if by == 'group' else 'المدينة'}:**\n"
+            for label, row in totals.head(10).iterrows():
+                yield f"• {label}: {int(row['count']):,} أصل - {row['cost']:,.0f} ريال\n"
+        
+        if 'المتبقي' in question:
+            yield "\n**العمر المتبقي:**\n"
+            for band, row in cohorts.remaining_life().iterrows():
+                yield f"• {band}: {int(row['count']):,} أصل - {row['cost']:,.0f} ريال\n"
+        
+        overdue = cohorts.overdue()
+        if len(overdue):
+            yield (f"\n⚠️ {len(overdue):,} أصل تجاوز عمره الإنتاجي قبل {cohorts.as_of_year} "
+                   f"وما زال في السجل (تكلفته {cohorts.cost[overdue].sum():,.0f} ريال).")
+    
+    def handle_general_questions(self, question):
+        """معالجة الأسئلة العامة"""
+        general_responses = [
+            "يمكنني مساعدتك في:\n• معرفة عدد الأصول وتكلفتها\n• البحث عن أصول محددة\n• تحليل الاستهلاك والقيمة\n• توزيع الأصول جغرافياً\n\nما الذي تريد معرفته؟",
+            "أنا مساعدك الذكي لفهم بيانات الأصول. اسألني عن:\n- الإحصائيات العامة\n- تكاليف الأصول\n- مواقع التوزيع\n- تحليل الاستهلاك",
+            "مرحباً! أنا هنا لمساعدتك في تحليل بيانات الأصول. جرب أن تسأل:\n'كم عدد الأصول؟'\n'ما إجمالي التكلفة؟'\n'أين توجد أجهزة الكمبيوتر؟'"
+        ]
+        
+        yield np.random.choice(general_responses)
+
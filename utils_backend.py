@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype, is_string_dtype
+
+try:  # optional: multi-threaded execution of the heavy column operations
+    import polars as pl
+except ImportError:
+    pl = None
+
+# Execution backend for the column-wise preparation and aggregation steps.
+# Callers always pass and receive pandas objects, so the UI and the assistant
+# do not change. pandas is the default; Polars is opt-in through
+# ASSET_BACKEND=polars (or "auto" to use it whenever it is installed).
+BACKEND = os.environ.get("ASSET_BACKEND", "pandas")
+
+
+class PandasBackend:
+    name = "pandas"
+
+    def to_numeric(self, df: pd.DataFrame, columns) -> dict:
+        """{column: float Series} for the given columns, unparsable values as NaN."""
+        return {c: pd.to_numeric(df[c], errors="coerce") for c in columns if c in df.columns}
+
+    def group_sums(self, labels, values: dict) -> pd.DataFrame:
+        """Count and sum of each value array per label (first-seen order, missing labels dropped)."""
+        codes, uniques = pd.factorize(pd.Series(labels).astype("string"), sort=False)
+        keep = codes >= 0
+        size = len(uniques)
+        out = pd.DataFrame({"count": np.bincount(codes[keep], minlength=size)},
+                           index=pd.Index(uniques, name="label"))
+        for name, arr in values.items():
+            out[name] = np.bincount(codes[keep], weights=np.nan_to_num(np.asarray(arr, dtype="float64")[keep]),
+                                    minlength=size)
+        return out
+
+
+class PolarsBackend(PandasBackend):
+    """Runs text-to-number parsing and grouped sums on Polars.
+
+    Columns Polars cannot take without a Python-level conversion (mixed
+    object columns of numbers and text) fall back to the pandas path.
+    """
+    name = "polars"
+
+    def to_numeric(self, df, columns):
+        out = {}
+        for c in columns:
+            if c not in df.columns:
+                continue
+            s = df[c]
+            if is_string_dtype(s.dtype) and s.dtype != object:
+                parsed = pl.from_pandas(s).str.strip_chars().cast(pl.Float64, strict=False)
+                out[c] = pd.Series(parsed.to_numpy(), index=s.index, name=c)
+            elif is_numeric_dtype(s.dtype):
+                out[c] = s
+            else:
+                out[c] = pd.to_numeric(s, errors="coerce")
+        return out
+
+    def group_sums(self, labels, values):
+        labels = pd.Series(labels).astype("string")
+        frame = pl.DataFrame({"label": pl.from_pandas(labels)}).with_columns(
+            [pl.Series(name, np.nan_to_num(np.asarray(arr, dtype="float64"))) for name, arr in values.items()]
+        )
+        grouped = (
+            frame.lazy()
+            .drop_nulls("label")
+            .group_by("label", maintain_order=True)
+            .agg([pl.len().alias("count")] + [pl.col(name).sum() for name in values])
+            .collect()
+        )
+        out = pd.DataFrame({name: grouped[name].to_numpy() for name in ["count", *values]},
+                           index=pd.Index(grouped["label"].to_list(), name="label", dtype="string"))
+        out["count"] = out["count"].astype(np.int64)
+        return out
+
+
+def select(name=BACKEND):
+    if name == "polars" or (name == "auto" and pl is not None):
+        if pl is None:
+            raise ImportError("ASSET_BACKEND=polars requires the polars package")
+        return PolarsBackend()
+    return PandasBackend()
+
+
+backend = select()
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from utils_depreciation import life_in_months, month_index, service_start_months
+from utils_location import factorize_labels
+
+REMAINING_BINS = [-np.inf, 0, 1, 2, 3, 5, 10, np.inf]
+REMAINING_NAMES = ["منتهي العمر", "خلال سنة", "1-2 سنة", "2-3 سنوات", "3-5 سنوات", "5-10 سنوات", "أكثر من 10 سنوات"]
+
+
+class Cohorts:
+    """Assets binned by service year and end-of-life year, for replacement forecasts.
+
+    An asset reaches end of life in the month its useful life runs out
+    (service month + life - 1, as in DepreciationSchedule); without a service
+    date or useful life the "Remaining Life" column (years from `as_of`) is used.
+    Everything is held as flat arrays: per-year and per-dimension totals are
+    single bincounts over integer codes.
+    """
+
+    def __init__(self, start_month, life_months, remaining_years, cost, as_of_month, dims=None):
+        start_month = np.asarray(start_month, dtype="float64")
+        end_month = start_month + np.asarray(life_months, dtype="float64") - 1
+        remaining = np.asarray(remaining_years, dtype="float64")
+        fallback = np.isnan(end_month) & (remaining >= 0)
+        end_month[fallback] = as_of_month + np.ceil(remaining[fallback] * 12) - 1
+
+        self.as_of_year = int(as_of_month // 12)
+        self.valid = ~np.isnan(end_month)
+        self.end_year = np.where(self.valid, np.floor(np.nan_to_num(end_month) / 12), 0).astype(np.int64)
+        known_start = ~np.isnan(start_month)
+        self.service_year = np.where(known_start, np.floor(np.nan_to_num(start_month) / 12), 0).astype(np.int64)
+        self.known_start = known_start
+        self.cost = np.nan_to_num(np.asarray(cost, dtype="float64"))
+        self.dims = {}
+        for name, labels in (dims or {}).items():
+            self.dims[name] = factorize_labels(labels)
+        self.matrix = self._matrix()
+
+    @classmethod
+    def from_frame(cls, df, cols: dict, as_of=None):
+        """Build from register columns; `cols` maps service_date, useful_life, remaining_life, cost and
+        dimension names ("city", "group") to columns. Returns None without any life information."""
+        n = len(df)
+        nan = np.full(n, np.nan)
+        has = {k: cols.get(k) in df.columns for k in ("service_date", "useful_life", "remaining_life", "cost")}
+        if not (has["service_date"] and has["useful_life"]) and not has["remaining_life"]:
+            return None
+        start = service_start_months(df[cols["service_date"]]) if has["service_date"] else nan
+        life = life_in_months(df[cols["useful_life"]]) if has["useful_life"] else nan
+        remaining = (pd.to_numeric(df[cols["remaining_life"]], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+                     if has["remaining_life"] else nan)
+        cost = (pd.to_numeric(df[cols["cost"]], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+                if has["cost"] else np.zeros(n))
+        dims = {name: df[cols[name]] for name in ("city", "group") if cols.get(name) in df.columns}
+        return cls(start, life, remaining, cost, month_index(as_of or pd.Timestamp.now()), dims)
+
+    def __len__(self):
+        return len(self.cost)
+
+    def _matrix(self) -> dict:
+        """Count and cost per (service year, end-of-life year), as two frames."""
+        rows = self.valid & self.known_start
+        if not rows.any():
+            return {"count": pd.DataFrame(), "cost": pd.DataFrame()}
+        first_service, first_end = self.service_year[rows].min(), self.end_year[rows].min()
+        n_end = self.end_year[rows].max() - first_end + 1
+        n_service = self.service_year[rows].max() - first_service + 1
+        cell = (self.service_year[rows] - first_service) * n_end + (self.end_year[rows] - first_end)
+        index = pd.RangeIndex(first_service, first_service + n_service, name="service_year")
+        columns = pd.RangeIndex(first_end, first_end + n_end, name="end_of_life_year")
+        out = {}
+        for name, weights in (("count", None), ("cost", self.cost[rows])):
+            totals = np.bincount(cell, weights=weights, minlength=n_service * n_end).reshape(n_service, n_end)
+            out[name] = pd.DataFrame(totals, index=index, columns=columns)
+        return out
+
+    def due(self, first_year, last_year) -> np.ndarray:
+        """Row positions of assets reaching end of life in [first_year, last_year]."""
+        return np.flatnonzero(self.valid & (self.end_year >= first_year) & (self.end_year <= last_year))
+
+    def overdue(self) -> np.ndarray:
+        """Row positions of assets whose life ended before the current year and are still in the register."""
+        return np.flatnonzero(self.valid & (self.end_year < self.as_of_year))
+
+    def by_year(self, first_year, last_year, by=None, inflation=0.0) -> pd.DataFrame:
+        """Count and replacement cost per end-of-life year (and per `by` dimension).
+
+        Replacement cost is the historical cost, compounded by `inflation` per
+        year from the service year when one is given.
+        """
+        rows = self.due(first_year, last_year)
+        years = last_year - first_year + 1
+        cost = self.cost[rows]
+        if inflation:
+            age = np.where(self.known_start[rows], self.end_year[rows] - self.service_year[rows], 0)
+            cost = cost * (1 + inflation) ** np.maximum(age, 0)
+        year_codes = self.end_year[rows] - first_year
+        if by is None:
+            index = pd.RangeIndex(first_year, last_year + 1, name="year")
+            return pd.DataFrame({"count": np.bincount(year_codes, minlength=years),
+                                 "cost": np.bincount(year_codes, weights=cost, minlength=years)}, index=index)
+        codes, labels = self.dims[by]
+        cell = codes[rows].astype(np.int64) * years + year_codes
+        size = len(labels) * years
+        index = pd.MultiIndex.from_product([np.asarray(labels, dtype=object), range(first_year, last_year + 1)],
+                                           names=[by, "year"])
+        out = pd.DataFrame({"count": np.bincount(cell, minlength=size),
+                            "cost": np.bincount(cell, weights=cost, minlength=size)}, index=index)
+        return out[out["count"] > 0]
+
+    def remaining_life(self) -> pd.DataFrame:
+        """Count and cost per remaining-life band at the current year."""
+        remaining = (self.end_year[self.valid] - self.as_of_year + 1).astype("float64")
+        bands = pd.cut(remaining, REMAINING_BINS, labels=REMAINING_NAMES)
+        frame = pd.DataFrame({"band": bands, "cost": self.cost[self.valid]})
+        return frame.groupby("band", observed=False)["cost"].agg(["size", "sum"]).rename(
+            columns={"size": "count", "sum": "cost"})
@@ -0,0 +1,134 @@
+import io
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from utils_backend import backend
+from utils_money import to_minor, total
+
+TOP_N = 12
+SAMPLE_ROWS = 100_000  # distributions on larger registers are drawn from a fixed random sample
+OTHER_LABEL = "أخرى"
+
+try:  # optional: correct shaping of Arabic labels inside matplotlib images
+    import arabic_reshaper
+    from bidi.algorithm import get_display
+
+    def _label(text):
+        return get_display(arabic_reshaper.reshape(str(text)))
+except ImportError:
+    def _label(text):
+        return str(text)
+
+
+def _numeric(df, col):
+    if col not in df.columns:
+        return None
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _sample(n, limit=SAMPLE_ROWS):
+    if n <= limit:
+        return slice(None)
+    return np.sort(np.random.default_rng(0).choice(n, limit, replace=False))
+
+
+def group_totals(labels, cost, nbv, top_n=TOP_N) -> pd.DataFrame:
+    """Count, cost and NBV per label in one pass; labels beyond the top N by cost fold into 'أخرى'."""
+    table = backend.group_sums(labels, {name: arr for name, arr in (("cost", cost), ("nbv", nbv)) if arr is not None})
+    for name in ("cost", "nbv"):
+        if name not in table:
+            table[name] = 0.0
+    table = table.sort_values("cost" if cost is not None else "count", ascending=False)
+    if len(table) > top_n:
+        rest = table.iloc[top_n:].sum()
+        table = pd.concat([table.iloc[:top_n], rest.to_frame(OTHER_LABEL).T])
+    return table
+
+
+def compute_aggregates(df: pd.DataFrame, cols: dict, today=None) -> dict:
+    """Small aggregates backing the dashboards.
+
+    `cols` maps "cost", "nbv", "city", "building", "group" and "service_date" to
+    column names (missing columns are skipped).
+    """
+    today = pd.Timestamp(today or pd.Timestamp.now().normalize())
+    cost = _numeric(df, cols.get("cost"))
+    nbv = _numeric(df, cols.get("nbv"))
+    aggs = {
+        "rows": len(df),
+        "total_cost": float(total(to_minor(cost))) if cost is not None else None,
+        "total_nbv": float(total(to_minor(nbv))) if nbv is not None else None,
+        "sampled": len(df) > SAMPLE_ROWS,
+    }
+
+    for key in ("city", "building", "group"):
+        col = cols.get(key)
+        if col in df.columns:
+            aggs[f"by_{key}"] = group_totals(df[col], cost, nbv)
+
+    sample = _sample(len(df))
+    if cost is not None and nbv is not None:
+        c, v = cost[sample], nbv[sample]
+        valid = (c > 0) & ~np.isnan(v)
+        rate = np.clip((c[valid] - v[valid]) / c[valid] * 100, 0, 100)
+        counts, edges = np.histogram(rate, bins=10, range=(0, 100))
+        aggs["depreciation_hist"] = pd.Series(counts, index=[f"{int(a)}-{int(b)}%" for a, b in zip(edges[:-1], edges[1:])])
+
+    date_col = cols.get("service_date")
+    if date_col in df.columns:
+        dates = pd.to_datetime(df[date_col].iloc[sample] if isinstance(sample, np.ndarray) else df[date_col], errors="coerce")
+        age = ((today - dates).dt.days / 365.25).dropna()
+        age = age[age >= 0].astype(int).clip(upper=30)
+        aggs["age_profile"] = age.value_counts().sort_index().rename(lambda a: "30+" if a == 30 else str(a))
+
+    return aggs
+
+
+def _bar_png(labels, series, title_x, horizontal=True):
+    fig = Figure(figsize=(7, max(2.5, 0.35 * len(labels) + 1)) if horizontal else (7, 3.5), dpi=100)
+    ax = fig.subplots()
+    positions = np.arange(len(labels))
+    width = 0.8 / len(series)
+    for i, (name, values) in enumerate(series):
+        offset = positions + (i - (len(series) - 1) / 2) * width
+        if horizontal:
+            ax.barh(offset, values, height=width, label=name)
+        else:
+            ax.bar(offset, values, width=width, label=name)
+    shaped = [_label(l) for l in labels]
+    if horizontal:
+        ax.set_yticks(positions, shaped)
+        ax.invert_yaxis()
+        ax.set_xlabel(title_x)
+    else:
+        ax.set_xticks(positions, shaped, rotation=45 if len(labels) > 12 else 0)
+        ax.set_ylabel(title_x)
+    if len(series) > 1:
+        ax.legend()
+    ax.grid(axis="x" if horizontal else "y", alpha=0.3)
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+def render_figures(aggs: dict) -> dict:
+    """Render the dashboard charts once to PNG bytes (Figure API, no pyplot global state)."""
+    figures = {}
+    for key in ("by_city", "by_building", "by_group"):
+        table = aggs.get(key)
+        if table is not None and not table.empty:
+            figures[key] = _bar_png(
+                list(table.index),
+                [("Cost", table["cost"].to_numpy() / 1e6), ("NBV", table["nbv"].to_numpy() / 1e6)],
+                "SAR (millions)",
+            )
+    if "depreciation_hist" in aggs:
+        hist = aggs["depreciation_hist"]
+        figures["depreciation_hist"] = _bar_png(list(hist.index), [("Assets", hist.to_numpy())], "Assets", horizontal=False)
+    if "age_profile" in aggs and not aggs["age_profile"].empty:
+        ages = aggs["age_profile"]
+        figures["age_profile"] = _bar_png(list(ages.index), [("Assets", ages.to_numpy())], "Assets", horizontal=False)
+    return figures
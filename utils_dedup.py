@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from utils_semantic import normalize_text
+
+NUM_HASHES = 16
+WINDOW = 6              # sorted-neighbourhood window (each row is compared with the next WINDOW - 1)
+MIN_DESC_SIMILARITY = 0.8
+COST_TOLERANCE = 0.005  # relative
+DATE_TOLERANCE_DAYS = 7
+_PRIME = (1 << 61) - 1
+
+
+def minhash_signatures(texts, num_hashes=NUM_HASHES, seed=0) -> np.ndarray:
+    """(len(texts), num_hashes) MinHash signatures over character 3-gram shingles."""
+    shingles = HashingVectorizer(
+        analyzer="char_wb", ngram_range=(3, 3), n_features=2**22,
+        binary=True, norm=None, alternate_sign=False, preprocessor=normalize_text,
+    ).transform(texts).tocsr()
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _PRIME, num_hashes, dtype=np.uint64)
+    b = rng.integers(0, _PRIME, num_hashes, dtype=np.uint64)
+    ids = shingles.indices.astype(np.uint64)
+    sig = np.full((shingles.shape[0], num_hashes), np.iinfo(np.uint64).max, dtype=np.uint64)
+    nonempty = np.flatnonzero(np.diff(shingles.indptr))
+    if len(nonempty):
+        for h in range(num_hashes):
+            hashed = (a[h] * ids + b[h]) % np.uint64(_PRIME)
+            sig[nonempty, h] = np.minimum.reduceat(hashed, shingles.indptr[nonempty])
+    return sig
+
+
+def _codes(values):
+    codes, _ = pd.factorize(pd.Series(values).astype("string").str.strip().str.casefold(), use_na_sentinel=False)
+    return codes
+
+
+def _identifier_codes(values):
+    """Codes of normalized identifiers, -1 for blanks."""
+    s = pd.Series(values).astype("string").str.strip().str.casefold()
+    codes, _ = pd.factorize(s.mask(s == ""))
+    return codes
+
+
+def find_duplicates(df: pd.DataFrame, cols: dict, window=WINDOW) -> pd.DataFrame:
+    """Candidate duplicate clusters as a frame of (cluster, row, similarity) sorted by cluster.
+
+    `cols` maps "description", "cost", "service_date", "serial" and the
+    blocking keys "city", "building", "group" to column names; missing
+    columns are skipped.
+    Rows are only compared within a block, inside a sliding window over two
+    sort orders (description, then cost/date), so the work is O(n * window).
+    A pair matches when its description MinHash similarity, cost and service
+    date are all within tolerance; a missing cost or date never matches.
+    Rows sharing a non-blank manufacturer serial number always match: the same
+    asset entered twice (e.g. under two tags) keeps its serial.
+    """
+    n = len(df)
+    empty = pd.DataFrame({"cluster": pd.Series(dtype=np.int64), "row": pd.Series(dtype=np.int64),
+                          "similarity": pd.Series(dtype=float)})
+    desc_col = cols.get("description")
+    if n < 2 or desc_col not in df.columns:
+        return empty
+
+    block = np.zeros(n, dtype=np.int64)
+    for key in ("city", "building", "group"):
+        col = cols.get(key)
+        if col in df.columns:
+            codes = _codes(df[col])
+            block = block * (codes.max() + 1) + codes
+
+    # normalize the distinct raw descriptions only, then merge those that normalize alike
+    raw_codes, raw_uniques = pd.factorize(pd.Series(df[desc_col]).astype("string").fillna(""))
+    normalized = pd.Series(raw_uniques, dtype=object).map(normalize_text).str.replace(r"[^\w\s]", "", regex=True)
+    remap, desc_uniques = pd.factorize(normalized, sort=True)
+    desc_codes = remap[raw_codes]
+    signatures = minhash_signatures(list(desc_uniques))
+
+    cost_col = cols.get("cost")
+    has_cost = cost_col in df.columns
+    cost = (pd.to_numeric(df[cost_col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            if has_cost else np.full(n, np.nan))
+    date_col = cols.get("service_date")
+    has_date = date_col in df.columns
+    if has_date:
+        dates = pd.to_datetime(df[date_col], errors="coerce")
+        days = (dates - pd.Timestamp("1970-01-01")).dt.days.to_numpy(dtype="float64", na_value=np.nan)
+    else:
+        days = np.full(n, np.nan)
+
+    serial_col = cols.get("serial")
+    serials = _identifier_codes(df[serial_col]) if serial_col in df.columns else None
+
+    sort_cost = np.nan_to_num(cost, nan=-1.0)
+    sort_days = np.nan_to_num(days, nan=-1.0)
+    passes = [
+        np.lexsort((sort_cost, desc_codes, block)),      # similar descriptions next to each other
+        np.lexsort((desc_codes, sort_days, sort_cost, block)),  # same cost/date, differently worded
+    ]
+
+    left, right, sims = [], [], []
+    for order in passes:
+        for k in range(1, window):
+            i, j = order[:-k], order[k:]
+            same_block = block[i] == block[j]
+            i, j = i[same_block], j[same_block]
+            di, dj = desc_codes[i], desc_codes[j]
+            sim = np.where(di == dj, 1.0, (signatures[di] == signatures[dj]).mean(axis=1))
+            # NaN compares False, so a missing cost or date is never a match
+            match = sim >= MIN_DESC_SIMILARITY
+            if has_cost:
+                match &= np.abs(cost[i] - cost[j]) <= COST_TOLERANCE * np.fmax(np.abs(cost[i]), np.abs(cost[j]))
+            if has_date:
+                match &= np.abs(days[i] - days[j]) <= DATE_TOLERANCE_DAYS
+            left.append(i[match])
+            right.append(j[match])
+            sims.append(sim[match])
+
+    if serials is not None:
+        # link each row to the next one with the same serial number
+        order = np.flatnonzero(serials >= 0)
+        order = order[np.argsort(serials[order], kind="stable")]
+        same = serials[order[:-1]] == serials[order[1:]]
+        i, j = order[:-1][same], order[1:][same]
+        di, dj = desc_codes[i], desc_codes[j]
+        left.append(i)
+        right.append(j)
+        sims.append(np.where(di == dj, 1.0, (signatures[di] == signatures[dj]).mean(axis=1)))
+
+    left, right, sims = np.concatenate(left), np.concatenate(right), np.concatenate(sims)
+    if not len(left):
+        return empty
+
+    graph = coo_matrix((np.ones(len(left), dtype=np.int8), (left, right)), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    members = np.unique(np.concatenate([left, right]))
+
+    # best pair similarity per row, as a confidence hint
+    best = np.zeros(n)
+    np.maximum.at(best, left, sims)
+    np.maximum.at(best, right, sims)
+
+    out = pd.DataFrame({"cluster": labels[members], "row": members, "similarity": best[members]})
+    out["cluster"] = pd.factorize(out["cluster"])[0]
+    return out.sort_values(["cluster", "row"], ignore_index=True)
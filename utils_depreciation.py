@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+STRAIGHT_LINE = "straight_line"
+DECLINING_BALANCE = "declining_balance"
+
+
+def month_index(date) -> int:
+    """Months since year 0 for a date-like value: year * 12 + (month - 1)."""
+    ts = pd.Timestamp(date)
+    return ts.year * 12 + ts.month - 1
+
+
+def year_end(year: int) -> int:
+    return year * 12 + 11
+
+
+def service_start_months(values) -> np.ndarray:
+    """Month index of the service dates as float (NaN where the date is missing or invalid)."""
+    dates = pd.to_datetime(pd.Series(values), errors="coerce")
+    months = (dates.dt.year * 12 + dates.dt.month - 1).to_numpy(dtype="float64", na_value=np.nan)
+    return months
+
+
+def life_in_months(values, unit="years") -> np.ndarray:
+    """Useful life as float months (NaN where missing or not positive)."""
+    life = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    if unit == "years":
+        life = life * 12
+    life[~(life > 0)] = np.nan
+    return life
+
+
+class DepreciationSchedule:
+    """Per-asset depreciation inputs held as flat arrays, projecting NBV at any month-end.
+
+    Assets depreciate from the month they are placed in service. Straight-line
+    spreads (cost - residual) evenly over the useful life; declining-balance
+    applies `factor / life` per month and stops at the residual value. Assets
+    without a valid service date or useful life project to NaN.
+    """
+
+    def __init__(self, cost, residual, start_month, life_months, factor=2.0):
+        self.cost = np.asarray(cost, dtype="float64")
+        residual = np.nan_to_num(np.asarray(residual, dtype="float64"), nan=0.0)
+        self.residual = np.minimum(np.maximum(residual, 0.0), self.cost)
+        self.start_month = np.asarray(start_month, dtype="float64")
+        self.life_months = np.asarray(life_months, dtype="float64")
+        self.factor = factor
+        self.valid = ~(np.isnan(self.cost) | np.isnan(self.start_month) | np.isnan(self.life_months))
+
+    @classmethod
+    def from_frame(cls, df, cost_col, service_date_col, life_col, residual_col=None, life_unit="years", factor=2.0):
+        """Build a schedule from register columns, or return None if a required column is missing."""
+        if any(c not in df.columns for c in (cost_col, service_date_col, life_col)):
+            return None
+        cost = pd.to_numeric(df[cost_col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        if residual_col in df.columns:
+            residual = pd.to_numeric(df[residual_col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        else:
+            residual = np.zeros(len(df))
+        return cls(cost, residual, service_start_months(df[service_date_col]),
+                   life_in_months(df[life_col], life_unit), factor=factor)
+
+    def __len__(self):
+        return len(self.cost)
+
+    def _nbv(self, months, rows=slice(None), method=STRAIGHT_LINE):
+        # months: 1-D array of month indexes -> (rows, len(months)) NBV at each month-end
+        months = np.asarray(months, dtype="float64")[None, :]
+        cost = self.cost[rows, None]
+        residual = self.residual[rows, None]
+        life = self.life_months[rows, None]
+        elapsed = np.clip(months - self.start_month[rows, None] + 1, 0, life)
+        if method == STRAIGHT_LINE:
+            nbv = cost - (cost - residual) * (elapsed / life)
+        elif method == DECLINING_BALANCE:
+            rate = np.minimum(self.factor / life, 1.0)
+            nbv = np.maximum(cost * (1.0 - rate) ** elapsed, residual)
+            nbv = np.where(elapsed >= life, residual, nbv)
+        else:
+            raise ValueError(f"Unknown depreciation method: {method}")
+        return nbv
+
+    def nbv_at(self, month, method=STRAIGHT_LINE) -> np.ndarray:
+        """NBV of every asset at the end of month index `month`."""
+        return self._nbv([month], method=method)[:, 0]
+
+    def iter_projection(self, start_month, periods, method=STRAIGHT_LINE, chunk_rows=100_000):
+        """Yield (row_slice, float32 array of shape (rows, periods)) for consecutive row chunks."""
+        months = np.arange(start_month, start_month + periods)
+        for begin in range(0, len(self), chunk_rows):
+            rows = slice(begin, min(begin + chunk_rows, len(self)))
+            yield rows, self._nbv(months, rows, method).astype("float32")
+
+    def projection(self, start_month, periods, method=STRAIGHT_LINE) -> np.ndarray:
+        """Full (assets x months) float32 NBV matrix. Prefer iter_projection for large horizons."""
+        out = np.empty((len(self), periods), dtype="float32")
+        for rows, block in self.iter_projection(start_month, periods, method):
+            out[rows] = block
+        return out
+
+    def group_nbv_at(self, month, labels, method=STRAIGHT_LINE) -> pd.Series:
+        """Total projected NBV per label at the end of `month`, largest first."""
+        nbv = self.nbv_at(month, method)
+        codes, uniques = pd.factorize(pd.Series(labels), sort=False)
+        keep = (codes >= 0) & self.valid
+        totals = np.bincount(codes[keep], weights=nbv[keep], minlength=len(uniques))
+        return pd.Series(totals, index=uniques).sort_values(ascending=False)
@@ -0,0 +1,108 @@
+import csv
+import os
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils_metrics import span
+
+CHUNK_ROWS = 50_000
+
+EXPORT_FORMATS = {
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("CSV", "text/csv"),
+    "parquet": ("Parquet", "application/octet-stream"),
+}
+
+
+def iter_chunks(df: pd.DataFrame, rows=None, chunk_rows=CHUNK_ROWS):
+    """Yield consecutive slices of `df` (optionally restricted to positional `rows`)."""
+    if rows is None:
+        for begin in range(0, len(df), chunk_rows):
+            yield df.iloc[begin:begin + chunk_rows]
+    else:
+        rows = np.asarray(rows)
+        for begin in range(0, len(rows), chunk_rows):
+            yield df.take(rows[begin:begin + chunk_rows])
+
+
+def _cell(value):
+    # openpyxl cannot store NaN/NaT or numpy scalars
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def write_xlsx(df, path, rows=None):
+    """Stream rows into an openpyxl write-only workbook (rows are flushed to disk as they go)."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Assets")
+    ws.append([str(c) for c in df.columns])
+    for chunk in iter_chunks(df, rows):
+        for record in chunk.itertuples(index=False, name=None):
+            ws.append([_cell(v) for v in record])
+    wb.save(path)
+
+
+def write_csv(df, path, rows=None):
+    # utf-8-sig so Excel opens Arabic text correctly
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(df.columns)
+        for chunk in iter_chunks(df, rows):
+            chunk.to_csv(f, header=False, index=False)
+
+
+def write_parquet(df, path, rows=None):
+    """Write one row group per chunk. Mixed-type object columns are stored as strings."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    object_cols = [c for c in df.columns if df[c].dtype == object]
+    writer = None
+    try:
+        for chunk in iter_chunks(df, rows):
+            chunk = chunk.copy(deep=False)
+            for col in object_cols:
+                chunk[col] = chunk[col].astype("string")
+            chunk.columns = [str(c) for c in chunk.columns]
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+        if writer is None:
+            pq.write_table(pa.Table.from_pandas(df.iloc[:0], preserve_index=False), path)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+WRITERS = {"xlsx": write_xlsx, "csv": write_csv, "parquet": write_parquet}
+
+
+def export(df: pd.DataFrame, fmt: str, rows=None, directory=None) -> str:
+    """Write `df` (or the positional `rows` of it) to a temporary file and return its path."""
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}", prefix="assets_", dir=directory)
+    os.close(fd)
+    n_rows = len(df) if rows is None else len(rows)
+    try:
+        with span("export", label=fmt, rows=n_rows):
+            WRITERS[fmt](df, path, rows)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+def export_filename(fmt: str, prefix="assets") -> str:
+    return f"{prefix}_{datetime.now():%Y%m%d_%H%M}.{fmt}"
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+from utils_prepare import parse_coordinates_series
+
+MIN_ZOOM = 2
+MAX_ZOOM = 16
+GRID_BITS = MAX_ZOOM + 2  # 4 x 4 cells per map tile at every zoom (~150 m at MAX_ZOOM)
+
+
+def _spread_bits(v):
+    """Insert a zero bit between the bits of each value (for Morton/Z-order codes)."""
+    v = v.astype(np.uint64)
+    for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+                        (2, 0x3333333333333333), (1, 0x5555555555555555)):
+        v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+    return v
+
+
+def morton_codes(lat, lon, bits=GRID_BITS) -> np.ndarray:
+    """Z-order code of the grid cell (2**bits per 360 degrees) of each point.
+
+    Dropping the last 2*k bits gives the enclosing cell k zoom levels up, so
+    the cells of every zoom level are contiguous runs of the sorted codes.
+    """
+    scale = 2 ** bits
+    y = np.clip(np.floor((np.asarray(lat) + 90.0) / 360.0 * scale), 0, scale - 1)
+    x = np.clip(np.floor((np.asarray(lon) + 180.0) / 360.0 * scale), 0, scale - 1)
+    return (_spread_bits(y) << np.uint64(1)) | _spread_bits(x)
+
+
+class GeoClusters:
+    """Assets grouped into map grid cells at every zoom level.
+
+    Points are sorted once by Morton code; a cluster at any zoom is then a
+    contiguous range [start, end) of `order`, and its count, centroid and
+    cost are differences of prefix sums. Cluster tables are built on first
+    use of a zoom level and kept, so the browser only ever receives one row
+    per cluster.
+    """
+
+    def __init__(self, coordinates, values=None):
+        coords = parse_coordinates_series(coordinates)
+        lat, lon = coords["lat"].to_numpy(), coords["lon"].to_numpy()
+        valid = np.flatnonzero(~np.isnan(lat) & ~np.isnan(lon))
+        codes = morton_codes(lat[valid], lon[valid])
+        sort = np.argsort(codes, kind="stable")
+        self.order = valid[sort]
+        self.codes = codes[sort]
+        self.missing = len(lat) - len(valid)
+
+        self.prefix = {}
+        for name, arr in {"lat": lat, "lon": lon, **(values or {})}.items():
+            arr = np.nan_to_num(np.asarray(arr, dtype="float64"))[self.order]
+            self.prefix[name] = np.concatenate([[0.0], np.cumsum(arr)])
+        self._levels = {}
+
+    def __len__(self):
+        return len(self.order)
+
+    def clusters(self, zoom, bounds=None) -> pd.DataFrame:
+        """One row per non-empty cell at `zoom`: centroid lat/lon, count, summed values, start/end.
+
+        `bounds` = (south, west, north, east) keeps only clusters whose centroid is inside.
+        """
+        zoom = int(min(max(zoom, MIN_ZOOM), MAX_ZOOM))
+        if zoom not in self._levels:
+            cells = self.codes >> np.uint64(2 * (MAX_ZOOM - zoom))
+            change = np.ones(len(cells), dtype=bool)
+            change[1:] = cells[1:] != cells[:-1]
+            starts = np.flatnonzero(change)
+            ends = np.append(starts[1:], len(cells))
+            count = ends - starts
+            table = pd.DataFrame({"cell": cells[starts], "count": count, "start": starts, "end": ends})
+            for name, prefix in self.prefix.items():
+                total = prefix[ends] - prefix[starts]
+                table[name] = total / count if name in ("lat", "lon") else total
+            self._levels[zoom] = table
+        table = self._levels[zoom]
+        if bounds is not None:
+            south, west, north, east = bounds
+            table = table[table["lat"].between(south, north) & table["lon"].between(west, east)]
+        return table
+
+    def rows(self, zoom, cell) -> np.ndarray:
+        """Row positions of the assets in cluster `cell` at `zoom`."""
+        table = self.clusters(zoom)
+        match = table.index[table["cell"].to_numpy() == np.uint64(cell)]
+        if not len(match):
+            return np.empty(0, dtype=self.order.dtype)
+        start, end = table.loc[match[0], ["start", "end"]]
+        return self.order[int(start):int(end)]
@@ -0,0 +1,166 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from utils_location import UNKNOWN, normalize_label
+from utils_money import group_total, to_minor, to_riyals
+from utils_prepare import COMMON_HEADERS, normalize_colname
+
+MEASURES = ("cost", "accumulated", "nbv")
+MEASURE_NAMES = {"count": "العدد", "cost": "التكلفة", "accumulated": "الاستهلاك المتراكم", "nbv": "صافي القيمة الدفترية"}
+
+TB_HEADERS = {
+    "group": COMMON_HEADERS["Accounting Group Code"] + COMMON_HEADERS["Accounting Group Desc"]
+    + ["رقم الحساب", "الحساب", "اسم الحساب", "account", "account code", "gl", "group"],
+    "cost": COMMON_HEADERS["Cost"] + ["الرصيد المدين", "debit"],
+    "accumulated": COMMON_HEADERS["Accumulated Depreciation"] + ["مجمع الاستهلاك", "مجمع الإهلاك"],
+    "nbv": COMMON_HEADERS["Net Book Value"] + ["الرصيد", "balance"],
+}
+
+
+def _numeric(df, col):
+    if col not in df.columns:
+        return None
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _key(values) -> pd.Series:
+    """Group keys for matching between the register and a trial balance."""
+    return normalize_label(values).str.casefold()
+
+
+def compute_rollups(df: pd.DataFrame, cols: dict) -> dict:
+    """Count, cost, accumulated depreciation and NBV per GL group and per group x city.
+
+    `cols` maps "group_code", "group_desc", "city", "cost", "nbv" and
+    "accumulated" to column names. Groups are keyed by code when present
+    (with the first description seen for it), otherwise by description.
+    Accumulated depreciation falls back to cost - NBV when not in the register.
+    Both tables come from a single bincount over the combined group/city codes,
+    summed exactly in halalas so they reconcile with the trial balance.
+    """
+    key_col = cols.get("group_code") if cols.get("group_code") in df.columns else cols.get("group_desc")
+    if key_col not in df.columns:
+        return {}
+    group_codes, groups = pd.factorize(normalize_label(df[key_col]), sort=True)
+    city_col = cols.get("city")
+    if city_col in df.columns:
+        city_codes, cities = pd.factorize(normalize_label(df[city_col]), sort=True)
+    else:
+        city_codes, cities = np.zeros(len(df), dtype=np.int64), np.array([UNKNOWN], dtype=object)
+
+    values = {name: to_minor(_numeric(df, cols.get(name))) for name in ("cost", "nbv", "accumulated")
+              if cols.get(name) in df.columns}
+    if "accumulated" not in values and "cost" in values and "nbv" in values:
+        values["accumulated"] = values["cost"] - values["nbv"]
+
+    n_cities = len(cities)
+    combined = group_codes.astype(np.int64) * n_cities + city_codes
+    size = len(groups) * n_cities
+    cells = {"count": np.bincount(combined, minlength=size)}
+    for name in MEASURES:
+        if name in values:
+            cells[name] = group_total(combined, values[name], size)
+
+    def frame(arrays, index):
+        return pd.DataFrame({name: arr if name == "count" else to_riyals(arr) for name, arr in arrays.items()},
+                            index=index)
+
+    index = pd.MultiIndex.from_product([np.asarray(groups, dtype=object), np.asarray(cities, dtype=object)],
+                                       names=["group", "city"])
+    by_group_city = frame(cells, index)
+    by_group_city = by_group_city[by_group_city["count"] > 0]
+    by_group = frame({name: arr.reshape(len(groups), n_cities).sum(axis=1) for name, arr in cells.items()},
+                     pd.Index(np.asarray(groups, dtype=object), name="group"))
+
+    desc_col = cols.get("group_desc")
+    if desc_col in df.columns and desc_col != key_col:
+        first = pd.Series(group_codes).drop_duplicates()
+        desc = pd.Series(df[desc_col].to_numpy()[first.index.to_numpy()], index=groups[first.to_numpy()])
+        by_group.insert(0, "description", desc.reindex(by_group.index).astype(object).to_numpy())
+
+    return {"by_group": by_group.sort_values("cost" if "cost" in by_group else "count", ascending=False),
+            "by_group_city": by_group_city}
+
+
+def _group_sums(tb: pd.DataFrame) -> pd.DataFrame:
+    """Amount columns summed per group (index), exactly: added up in halalas."""
+    minor = pd.DataFrame({name: to_minor(tb[name]) for name in tb.columns}, index=tb.index)
+    summed = minor.groupby(level=0, sort=False).sum()
+    return pd.DataFrame({name: to_riyals(summed[name]) for name in summed.columns}, index=summed.index)
+
+
+def read_trial_balance(data: bytes, filename: str) -> pd.DataFrame:
+    """Trial balance (CSV or Excel) as a frame indexed by group with cost/accumulated/nbv columns."""
+    if filename.lower().endswith(".csv"):
+        raw = pd.read_csv(io.BytesIO(data), encoding="utf-8-sig")
+    else:
+        raw = pd.read_excel(io.BytesIO(data))
+    found = {}
+    for name, variants in TB_HEADERS.items():
+        wanted = [normalize_colname(v).casefold() for v in variants]
+        normalized = {c: normalize_colname(c).casefold() for c in raw.columns}
+        found[name] = next((c for w in wanted for c, n in normalized.items() if n == w), None)
+    if found["group"] is None:
+        raise ValueError("لم يتم العثور على عمود المجموعة المحاسبية/رقم الحساب في ميزان المراجعة.")
+    amounts = [name for name in MEASURES if found[name] is not None]
+    if not amounts:
+        raise ValueError("لم يتم العثور على أعمدة المبالغ (التكلفة، الاستهلاك المتراكم، القيمة الدفترية).")
+    tb = pd.DataFrame({name: pd.to_numeric(raw[found[name]], errors="coerce") for name in amounts})
+    tb.index = normalize_label(raw[found["group"]]).rename("group")
+    tb = tb[tb.index != UNKNOWN]
+    return _group_sums(tb)
+
+
+def reconcile_trial_balance(by_group: pd.DataFrame, tb: pd.DataFrame) -> pd.DataFrame:
+    """Register totals vs trial balance per group, with differences and a status column.
+
+    Trial-balance groups are matched to register groups by code, or by
+    description when the register has one (case-insensitive, '12.0' == '12').
+    Amounts are compared exactly in halalas: any difference is a "فرق".
+    """
+    register_keys = pd.Series(_key(pd.Series(by_group.index)).to_numpy(), index=by_group.index)
+    lookup = dict(zip(register_keys, by_group.index))
+    if "description" in by_group:
+        desc_keys = _key(by_group["description"])
+        for key, group in zip(desc_keys, by_group.index):
+            lookup.setdefault(key, group)
+    matched = [lookup.get(k) for k in _key(pd.Series(tb.index))]
+    tb = tb.set_axis(pd.Index([m if m is not None else g for m, g in zip(matched, tb.index)], name="group"))
+    tb = _group_sums(tb)
+
+    measures = [name for name in MEASURES if name in tb.columns and name in by_group.columns]
+    index = by_group.index.union(tb.index, sort=False)
+    out = pd.DataFrame(index=index)
+    if "description" in by_group:
+        out["description"] = by_group["description"].reindex(index)
+    differs = np.zeros(len(index), dtype=bool)
+    for name in measures:
+        register = by_group[name].reindex(index)
+        ledger = tb[name].reindex(index)
+        diff = to_minor(register) - to_minor(ledger)  # missing amounts count as 0
+        out[f"{name}_register"] = register
+        out[f"{name}_tb"] = ledger
+        out[f"{name}_diff"] = to_riyals(diff)
+        differs |= diff != 0
+
+    in_register = index.isin(by_group.index)
+    in_tb = index.isin(tb.index)
+    out["status"] = np.select(
+        [~in_tb, ~in_register, ~differs],
+        ["غير موجود في الميزان", "غير موجود في السجل", "مطابق"],
+        "فرق",
+    )
+    return out.sort_values("status", key=lambda s: s.eq("مطابق"))
+
+
+def report_xlsx(rollups: dict, reconciliation=None) -> bytes:
+    """GL report workbook: rollup per group, per group x city, and the trial-balance reconciliation."""
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
+        rollups["by_group"].rename(columns=MEASURE_NAMES).to_excel(writer, sheet_name="حسب المجموعة")
+        rollups["by_group_city"].rename(columns=MEASURE_NAMES).to_excel(writer, sheet_name="المجموعة والمدينة")
+        if reconciliation is not None:
+            reconciliation.to_excel(writer, sheet_name="مطابقة الميزان")
+    return buf.getvalue()
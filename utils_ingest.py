@@ -0,0 +1,106 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+import utils_store as store
+from utils_backend import backend
+from utils_metrics import span
+from utils_prepare import prepare_dataframe
+
+PREVIEW_ROWS = 300
+MAX_JOBS = 4
+FINANCIAL_COLUMNS = ['Cost', 'Net Book Value', 'Accumulated Depreciation', 'Residual Value']
+
+# Ingestion runs on a small process-wide pool so the Streamlit script thread can
+# render a preview immediately. Jobs are keyed by the content hash of the upload,
+# which also lets a second session uploading the same file reuse the running job;
+# finished registers are handed to the shared dataset store.
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ingest")
+_jobs = OrderedDict()  # pending and failed jobs only
+_lock = threading.RLock()
+
+
+def fingerprint(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+def load_data(data: bytes, nrows=None) -> pd.DataFrame:
+    """Read the register sheet (header on the second row). Raises ValueError if empty."""
+    with span("excel_parse", label="preview" if nrows else "") as s:
+        df_raw = pd.read_excel(io.BytesIO(data), header=1, nrows=nrows)
+        s.rows = len(df_raw)
+    if df_raw.empty:
+        raise ValueError("الملف المرفوع فارغ أو لا يحتوي على بيانات.")
+    return df_raw
+
+
+def process_data(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """Clean column names and convert the financial columns to numbers."""
+    with span("process_data", rows=len(df_raw)):
+        df_processed = prepare_dataframe(df_raw)
+        for col, values in backend.to_numeric(df_processed, FINANCIAL_COLUMNS).items():
+            df_processed[col] = values
+    return df_processed
+
+
+def ingest(data: bytes) -> pd.DataFrame:
+    return process_data(load_data(data))
+
+
+def load_preview(data: bytes, nrows=PREVIEW_ROWS) -> pd.DataFrame:
+    """First `nrows` rows, prepared the same way as the full register."""
+    return prepare_dataframe(load_data(data, nrows=nrows))
+
+
+def _ingest(key, data):
+    return store.put(key, ingest(data))
+
+
+def _finished(key, future):
+    # successful jobs live on in the dataset store; failures stay so the error can be shown
+    if future.exception() is None:
+        with _lock:
+            if _jobs.get(key) is future:
+                del _jobs[key]
+
+
+def _completed(dataset):
+    future = Future()
+    future.set_result(dataset)
+    return future
+
+
+def submit(data: bytes):
+    """Start (or join) background ingestion of `data`. Returns (key, Future of store.Dataset)."""
+    key = fingerprint(data)
+    with _lock:
+        dataset = store.get(key)
+        if dataset is not None:
+            return key, _completed(dataset)
+        future = _jobs.get(key)
+        if future is None or future.done():
+            future = _executor.submit(_ingest, key, data)
+            _jobs[key] = future
+            future.add_done_callback(lambda f, key=key: _finished(key, f))
+        _jobs.move_to_end(key)
+        # bound the number of failed jobs remembered
+        while len(_jobs) > MAX_JOBS:
+            oldest = next(iter(_jobs))
+            if not _jobs[oldest].done():
+                break
+            del _jobs[oldest]
+    return key, future
+
+
+def job(key):
+    """The ingestion Future for `key` (pending, failed or already stored), or None if unknown."""
+    with _lock:
+        future = _jobs.get(key)
+    if future is not None:
+        return future
+    dataset = store.get(key)
+    return _completed(dataset) if dataset is not None else None
@@ -0,0 +1,192 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from utils_money import group_riyals, to_minor, to_riyals
+
+LEVELS = ("city", "building", "floor", "room")
+LEVEL_NAMES = {"city": "المدينة", "building": "المبنى", "floor": "الدور", "room": "الغرفة/المكتب"}
+UNKNOWN = "غير محدد"
+ARABIC_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
+
+# "المبنى 12", "مبنى رقم 12", "الدور 3", "الطابق 3", "غرفة 105", "building 12" ...
+# the keyword must be a whole word ("مكتب" but not "مكتبي") and the label must
+# contain a digit, so "مكتب خشبي" names furniture, not a room
+LEVEL_PATTERNS = {
+    level: rf'(?<!\w)(?:{keywords})(?![^\W\d])\s*(?:رقم\s*)?([\w\-/]*\d[\w\-/]*)'
+    for level, keywords in (
+        ("building", "المبنى|مبنى|building"),
+        ("floor", "الدور|دور|الطابق|طابق|floor"),
+        ("room", "الغرفة|غرفة|المكتب|مكتب|room|office"),
+    )
+}
+
+
+def normalize_label(values) -> pd.Series:
+    """Location labels as clean strings: '12.0' -> '12', blanks -> UNKNOWN."""
+    s = pd.Series(values).astype("string").str.strip()
+    s = s.str.replace(r"^(-?\d+)\.0+$", r"\1", regex=True)
+    return s.mask(s.isna() | (s == ""), UNKNOWN)
+
+
+def factorize_labels(values):
+    """(codes, sorted labels) of normalized location labels; normalizes the uniques only."""
+    raw_codes, raw_uniques = pd.factorize(pd.Series(values), use_na_sentinel=False)
+    labels = normalize_label(pd.Series(raw_uniques, dtype=object))
+    remap, uniques = pd.factorize(labels, sort=True)
+    return remap[raw_codes], np.asarray(uniques, dtype=object)
+
+
+def location_keys(frame: pd.DataFrame, columns) -> pd.Series:
+    """Composite location key per row ('12 › 3 › 105') over the given level columns, top level first.
+
+    Labels are normalized as in the tree (Latin digits, case-folded); rows with
+    no known level are NaN.
+    """
+    labels = [normalize_label(frame[c].astype("string").str.translate(ARABIC_DIGITS)).str.casefold().to_numpy()
+              for c in columns]
+    if not labels:
+        return pd.Series(pd.NA, index=frame.index, dtype="string")
+    keys = pd.Series(labels[0], index=frame.index, dtype="string")
+    unknown = keys == UNKNOWN.casefold()
+    for values in labels[1:]:
+        keys = keys + " › " + values
+        unknown &= values == UNKNOWN.casefold()
+    return keys.mask(unknown)
+
+
+class LocationTree:
+    """City -> Building -> Floor -> Room hierarchy over row positions.
+
+    Rows are sorted once by their level codes, so every node is a contiguous
+    range [start, end) of `order`: a node's asset ids are a slice of one array
+    and its rollups are differences of prefix sums, with no scan of the frame.
+    Prefix sums are kept in int64 halalas, so rollups are exact at any depth.
+    Node tables are sorted the same way, so the children of a node are found
+    by binary search on their start offsets.
+    """
+
+    def __init__(self, df: pd.DataFrame, cols: dict, values=None):
+        self.levels = [lvl for lvl in LEVELS if cols.get(lvl) in df.columns]
+        n = len(df)
+        codes, self.labels, self._lookup = [], {}, {}
+        for level in self.levels:
+            c, uniques = factorize_labels(df[cols[level]])
+            codes.append(c)
+            self.labels[level] = uniques
+            lookup = {}
+            for code, label in enumerate(uniques):
+                lookup.setdefault(str(label).casefold(), []).append(code)
+            self._lookup[level] = lookup
+
+        self.order = np.lexsort(codes[::-1]) if codes else np.arange(n)
+        sorted_codes = [c[self.order] for c in codes]
+
+        # prefix sums of rollup measures (halalas) in tree order
+        self.prefix = {}
+        for name, arr in (values or {}).items():
+            self.prefix[name] = np.concatenate([[0], np.cumsum(to_minor(arr)[self.order])])
+
+        # per level: node codes for every ancestor level plus [start, end)
+        self.nodes = {}
+        change = np.zeros(n, dtype=bool)
+        if n:
+            change[0] = True
+        for depth, level in enumerate(self.levels):
+            change[1:] |= sorted_codes[depth][1:] != sorted_codes[depth][:-1]
+            starts = np.flatnonzero(change)
+            table = {lvl: sorted_codes[d][starts] for d, lvl in enumerate(self.levels[:depth + 1])}
+            table["start"] = starts
+            table["end"] = np.append(starts[1:], n)
+            self.nodes[level] = table
+
+    def _codes(self, level, value):
+        return self._lookup[level].get(str(value).casefold(), [])
+
+    def _matching_nodes(self, filters):
+        """(starts, ends) of the deepest-level nodes matching `filters`, or None if unfiltered."""
+        filters = {k: v for k, v in filters.items() if v is not None and k in self.levels}
+        if not filters:
+            return None
+        codes = {level: self._codes(level, value) for level, value in filters.items()}
+        if any(not c for c in codes.values()):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        deepest = max(self.levels.index(k) for k in filters)
+        if any(level not in filters for level in self.levels[:deepest]):
+            # a level was skipped (e.g. floor without building): mask the deepest node table
+            table = self.nodes[self.levels[deepest]]
+            mask = np.ones(len(table["start"]), dtype=bool)
+            for level, wanted in codes.items():
+                mask &= np.isin(table[level], wanted)
+            return table["start"][mask], table["end"][mask]
+
+        # full path from the top: narrow down by binary search on node start offsets
+        starts, ends = np.array([0]), np.array([len(self.order)])
+        for depth in range(deepest + 1):
+            table = self.nodes[self.levels[depth]]
+            bounds = np.searchsorted(table["start"], np.concatenate([starts, ends])).reshape(2, -1)
+            idx = np.concatenate([np.arange(i0, i1) for i0, i1 in bounds.T])
+            idx = idx[np.isin(table[self.levels[depth]][idx], codes[self.levels[depth]])]
+            starts, ends = table["start"][idx], table["end"][idx]
+        return starts, ends
+
+    def rows(self, **filters) -> np.ndarray:
+        """Row positions of the assets under every node matching `filters` (e.g. city=, floor=)."""
+        matched = self._matching_nodes(filters)
+        if matched is None:
+            return self.order
+        starts, ends = matched
+        if not len(starts):
+            return np.empty(0, dtype=self.order.dtype)
+        return np.concatenate([self.order[s:e] for s, e in zip(starts, ends)])
+
+    def rollup(self, **filters) -> dict:
+        """Count and summed measures under the nodes matching `filters`."""
+        matched = self._matching_nodes(filters)
+        starts, ends = (np.array([0]), np.array([len(self.order)])) if matched is None else matched
+        result = {"count": int((ends - starts).sum())}
+        for name, prefix in self.prefix.items():
+            result[name] = float(to_riyals((prefix[ends] - prefix[starts]).sum()))
+        return result
+
+    def children(self, **filters) -> pd.DataFrame:
+        """Rollups of the next level below the deepest filter (the top level if no filters)."""
+        filters = {k: v for k, v in filters.items() if v is not None and k in self.levels}
+        depth = max((self.levels.index(k) for k in filters), default=-1) + 1
+        if depth >= len(self.levels):
+            return pd.DataFrame()
+        level = self.levels[depth]
+        table = self.nodes[level]
+        matched = self._matching_nodes(filters)
+        if matched is None:
+            idx = np.arange(len(table["start"]))
+        else:
+            bounds = np.searchsorted(table["start"], np.concatenate(matched)).reshape(2, -1)
+            idx = np.concatenate([np.arange(i0, i1) for i0, i1 in bounds.T] or [np.empty(0, dtype=np.int64)])
+        starts, ends = table["start"][idx], table["end"][idx]
+        # the same label can appear under several parents when a level was skipped
+        child_codes = table[level][idx]
+        size = len(self.labels[level])
+        out = pd.DataFrame({"count": np.bincount(child_codes, weights=ends - starts, minlength=size).astype(np.int64)})
+        for name, prefix in self.prefix.items():
+            out[name] = group_riyals(child_codes, prefix[ends] - prefix[starts], size)
+        out.index = pd.Index(self.labels[level], name=level)
+        return out[out["count"] > 0].sort_values("count", ascending=False)
+
+    def parse_filters(self, question: str) -> dict:
+        """Extract level filters from a question, e.g. 'الدور 3 من المبنى 12 في الرياض'."""
+        filters = {}
+        text = question.translate(ARABIC_DIGITS).casefold()
+        if "city" in self.levels:
+            for city in sorted(self.labels["city"], key=lambda c: -len(str(c))):
+                if city != UNKNOWN and str(city).casefold() in text:
+                    filters["city"] = city
+                    break
+        for level, pattern in LEVEL_PATTERNS.items():
+            if level in self.levels:
+                match = re.search(pattern, text)
+                if match:
+                    filters[level] = match.group(1)
+        return filters
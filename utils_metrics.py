@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# Process-wide registry of stage timings. Streamlit re-executes app.py on every
+# rerun but imported modules persist, so samples accumulate across reruns and
+# sessions of the same server process.
+WINDOW = 500
+QUANTILES = (0.5, 0.9, 0.99)
+METRICS_FILE = os.environ.get("ASSET_METRICS_FILE", "metrics.prom")
+
+_lock = threading.Lock()
+_samples = defaultdict(lambda: deque(maxlen=WINDOW))  # (stage, label) -> recent samples
+_totals = defaultdict(lambda: [0, 0.0])               # (stage, label) -> [count, seconds]
+
+
+def rss_bytes():
+    """Resident set size of the current process in bytes, or None if unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class Span:
+    """Mutable handle yielded by span() so the caller can attach a row count or relabel."""
+
+    def __init__(self, stage, label="", rows=None):
+        self.stage = stage
+        self.label = label
+        self.rows = rows
+
+
+def record(stage, seconds, label="", rows=None, mem_delta=None):
+    key = (stage, str(label))
+    with _lock:
+        _samples[key].append((seconds, rows, mem_delta, time.time()))
+        total = _totals[key]
+        total[0] += 1
+        total[1] += seconds
+
+
+@contextmanager
+def span(stage, label="", rows=None):
+    """Time a block and record it under (stage, label), with row count and RSS delta."""
+    s = Span(stage, label, rows)
+    mem_before = rss_bytes()
+    start = time.perf_counter()
+    try:
+        yield s
+    finally:
+        elapsed = time.perf_counter() - start
+        mem_after = rss_bytes()
+        mem_delta = mem_after - mem_before if mem_before is not None and mem_after is not None else None
+        record(s.stage, elapsed, label=s.label, rows=s.rows, mem_delta=mem_delta)
+
+
+def timed(chunks, stage, label="", rows=None):
+    """Re-yield a generator, recording under (stage, label) only the time spent producing its chunks.
+
+    Unlike wrapping `yield from` in span(), the time the consumer holds each
+    chunk (e.g. while Streamlit renders it) is not counted.
+    """
+    elapsed, mem_delta = 0.0, 0
+    chunks = iter(chunks)
+    try:
+        while True:
+            mem_before = rss_bytes()
+            start = time.perf_counter()
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - start
+                mem_after = rss_bytes()
+                if mem_delta is not None and mem_before is not None and mem_after is not None:
+                    mem_delta += mem_after - mem_before
+                else:
+                    mem_delta = None
+            yield chunk
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+        record(stage, elapsed, label=label, rows=rows, mem_delta=mem_delta)
+
+
+def summary():
+    """Latency percentiles (ms), last row count and mean memory delta per (stage, label)."""
+    with _lock:
+        snapshot = {key: list(samples) for key, samples in _samples.items()}
+        totals = {key: tuple(total) for key, total in _totals.items()}
+
+    rows = []
+    for (stage, label), samples in sorted(snapshot.items()):
+        seconds = np.array([s[0] for s in samples])
+        mem = [s[2] for s in samples if s[2] is not None]
+        last_rows = next((s[1] for s in reversed(samples) if s[1] is not None), None)
+        row = {"stage": stage, "label": label, "count": totals[(stage, label)][0]}
+        for q in QUANTILES:
+            row[f"p{int(q * 100)}_ms"] = float(np.quantile(seconds, q)) * 1000
+        row["rows"] = last_rows
+        row["mem_delta_mb"] = float(np.mean(mem)) / 2**20 if mem else None
+        rows.append(row)
+    return rows
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+        _totals.clear()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(stage, label, **extra):
+    pairs = [("stage", stage), ("label", label)] + list(extra.items())
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def to_openmetrics():
+    """Render the registry in the OpenMetrics text exposition format."""
+    with _lock:
+        snapshot = {key: list(samples) for key, samples in _samples.items()}
+        totals = {key: tuple(total) for key, total in _totals.items()}
+
+    lines = [
+        "# TYPE asset_stage_seconds summary",
+        "# UNIT asset_stage_seconds seconds",
+        "# HELP asset_stage_seconds Duration of instrumented stages (quantiles over the recent window).",
+    ]
+    for (stage, label), samples in sorted(snapshot.items()):
+        seconds = np.array([s[0] for s in samples])
+        for q in QUANTILES:
+            lines.append(f"asset_stage_seconds{_labels(stage, label, quantile=q)} {np.quantile(seconds, q):.9g}")
+        count, total = totals[(stage, label)]
+        lines.append(f"asset_stage_seconds_count{_labels(stage, label)} {count}")
+        lines.append(f"asset_stage_seconds_sum{_labels(stage, label)} {total:.9g}")
+
+    lines += [
+        "# TYPE asset_stage_rows gauge",
+        "# HELP asset_stage_rows Rows handled by the most recent run of a stage.",
+    ]
+    for (stage, label), samples in sorted(snapshot.items()):
+        last_rows = next((s[1] for s in reversed(samples) if s[1] is not None), None)
+        if last_rows is not None:
+            lines.append(f"asset_stage_rows{_labels(stage, label)} {last_rows}")
+
+    lines += [
+        "# TYPE asset_stage_memory_delta_bytes gauge",
+        "# HELP asset_stage_memory_delta_bytes Resident memory change over the most recent run of a stage.",
+    ]
+    for (stage, label), samples in sorted(snapshot.items()):
+        last_mem = next((s[2] for s in reversed(samples) if s[2] is not None), None)
+        if last_mem is not None:
+            lines.append(f"asset_stage_memory_delta_bytes{_labels(stage, label)} {last_mem}")
+
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def export_openmetrics(path=None):
+    """Write the registry to `path` atomically and return the path written."""
+    path = path or METRICS_FILE
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(to_openmetrics())
+    os.replace(tmp, path)
+    return path
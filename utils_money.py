@@ -0,0 +1,49 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+# Amounts are held as int64 halalas (1/100 SAR), so totals are exact integer sums
+# that match the ledger to the last halala instead of accumulating float64 error.
+SCALE = 100
+DIGITS = 2
+# group sums split each amount into high and low parts below 2**LOW_BITS: both
+# parts sum exactly in float64 bincounts for up to 2**(53 - LOW_BITS) rows per group
+LOW_BITS = 26
+
+
+def to_minor(values) -> np.ndarray:
+    """Amounts (numbers, numeric strings or NaN) as int64 halalas; missing and unparsable as 0.
+
+    Register amounts have at most two decimals, so rounding value * 100 to the
+    nearest integer recovers the exact ledger amount from its float64 value.
+    """
+    if isinstance(values, pd.Series):
+        values = pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    values = np.asarray(values, dtype="float64")
+    minor = np.rint(values * SCALE)
+    minor[~np.isfinite(minor)] = 0
+    return minor.astype(np.int64)
+
+
+def to_riyals(minor):
+    """Halalas as float64 riyals (the nearest float to each exact amount)."""
+    return np.asarray(minor, dtype=np.int64) / SCALE
+
+
+def total(minor) -> Decimal:
+    """Exact sum of halala amounts, in riyals."""
+    return Decimal(int(np.sum(minor, dtype=np.int64))).scaleb(-DIGITS)
+
+
+def group_total(codes, minor, size) -> np.ndarray:
+    """Exact int64 sum of halala amounts per integer code (0 <= code < size)."""
+    minor = np.asarray(minor, dtype=np.int64)
+    low = np.bincount(codes, weights=minor & ((1 << LOW_BITS) - 1), minlength=size)
+    high = np.bincount(codes, weights=minor >> LOW_BITS, minlength=size)
+    return (high.astype(np.int64) << LOW_BITS) + low.astype(np.int64)
+
+
+def group_riyals(codes, minor, size) -> np.ndarray:
+    """group_total in float64 riyals, for frames and charts."""
+    return to_riyals(group_total(codes, minor, size))
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import pickle
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import utils_store as store
+from utils_metrics import span
+
+# On-disk copy of the dataset store so a server restart is warm:
+#   catalog.json                      key -> rows, columns, created, last_used
+#   datasets/<key>/data.pkl           the prepared frame
+#   datasets/<key>/artifact-<h>.pkl   (FORMAT_VERSION, name, value) of each picklable artefact
+#   sessions/<sid>.json               dataset key and chat transcript per browser session
+# Every file is written to a temporary name and renamed, so a crash never leaves
+# a half-written entry behind.
+# Bump FORMAT_VERSION whenever a pickled artefact changes shape (new attributes,
+# different units): artefacts written under another version are discarded on
+# load and rebuilt on demand.
+FORMAT_VERSION = 3
+# next to the code rather than the working directory, so batch_reports.py run from
+# cron finds the same saved column profiles and datasets as the app
+CACHE_DIR = os.environ.get("ASSET_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".asset_cache"))
+PRELOAD = int(os.environ.get("ASSET_PRELOAD", "2"))  # datasets loaded in the background at start-up
+MAX_DATASETS = 8
+SESSION_TTL = 30 * 24 * 3600
+TOUCH_INTERVAL = 60  # seconds between last_used updates of an open dataset
+SKIP_ARTIFACTS = {"df_processed"}  # views of the data itself, cheap to rebuild
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="persist")
+_lock = threading.RLock()
+_saved = {}    # key -> artefact names already on disk
+_touched = {}  # key -> time of the last save
+_loading = {}  # key -> Future of store.Dataset
+_started = False
+
+
+def _path(*parts):
+    return os.path.join(CACHE_DIR, *parts)
+
+
+def _write_atomic(path, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _artifact_file(name):
+    return f"artifact-{hashlib.sha1(repr(name).encode('utf-8')).hexdigest()[:16]}.pkl"
+
+
+def catalog() -> dict:
+    try:
+        with open(_path("catalog.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _update_catalog(key, **fields):
+    with _lock:
+        entries = catalog()
+        entries.setdefault(key, {}).update(fields)
+        # keep only the most recently used datasets on disk
+        ranked = sorted(entries, key=lambda k: entries[k].get("last_used", 0), reverse=True)
+        for old in ranked[MAX_DATASETS:]:
+            del entries[old]
+            shutil.rmtree(_path("datasets", old), ignore_errors=True)
+        _write_atomic(_path("catalog.json"), json.dumps(entries, ensure_ascii=False, indent=1).encode("utf-8"))
+
+
+def _save(dataset):
+    key = dataset.key
+    with _lock:
+        saved = _saved.setdefault(key, set())
+    data_path = _path("datasets", key, "data.pkl")
+    if not os.path.exists(data_path):
+        with span("persist", label="data", rows=len(dataset)):
+            _write_atomic(data_path, pickle.dumps(dataset.df, protocol=5))
+        _update_catalog(key, rows=len(dataset), columns=len(dataset.df.columns), created=dataset.created,
+                        last_used=time.time())
+    for name, value in dataset.artifacts().items():
+        if name in saved or name[0] in SKIP_ARTIFACTS:
+            continue
+        try:
+            blob = pickle.dumps((FORMAT_VERSION, name, value), protocol=5)
+        except Exception:
+            pass  # not picklable: rebuilt on demand after a restart
+        else:
+            with span("persist", label=str(name[0])):
+                _write_atomic(_path("datasets", key, _artifact_file(name)), blob)
+        saved.add(name)
+    _update_catalog(key, last_used=time.time())
+
+
+def save_async(dataset):
+    """Persist `dataset` and any artefacts built since the last call on a background thread.
+
+    Cheap to call on every rerun: returns None when there is nothing new to write.
+    """
+    with _lock:
+        saved = _saved.get(dataset.key)
+        new = saved is None or any(
+            name not in saved and name[0] not in SKIP_ARTIFACTS for name in dataset.artifacts()
+        )
+        if not new and time.time() - _touched.get(dataset.key, 0) < TOUCH_INTERVAL:
+            return None
+        _touched[dataset.key] = time.time()
+    return _executor.submit(_save, dataset)
+
+
+def load(key):
+    """Load a persisted dataset and its artefacts into the dataset store."""
+    directory = _path("datasets", key)
+    with span("persist_load") as s:
+        with open(os.path.join(directory, "data.pkl"), "rb") as f:
+            df = pickle.load(f)
+        s.rows = len(df)
+        dataset = store.put(key, df)
+        names = set()
+        for filename in sorted(os.listdir(directory)):
+            if not (filename.startswith("artifact-") and filename.endswith(".pkl")):
+                continue
+            path = os.path.join(directory, filename)
+            try:
+                with open(path, "rb") as f:
+                    entry = pickle.load(f)
+                version, name, value = entry if len(entry) == 3 else (None,) + tuple(entry)
+            except Exception:
+                version = None
+            if version != FORMAT_VERSION:
+                os.remove(path)  # stale or unreadable artefact: rebuilt on demand
+                continue
+            dataset.artifact(name, lambda value=value: value)
+            names.add(name)
+    with _lock:
+        _saved.setdefault(key, set()).update(names)
+        _touched[key] = time.time()
+    return dataset
+
+
+def load_async(key):
+    """Future of the stored dataset `key`, loading it from disk if needed; None if it was never saved."""
+    dataset = store.get(key)
+    if dataset is not None:
+        future = Future()
+        future.set_result(dataset)
+        return future
+    if not re.fullmatch(r"[0-9a-f]{40}", key or "") or not os.path.exists(_path("datasets", key, "data.pkl")):
+        return None
+    with _lock:
+        future = _loading.get(key)
+        if future is None or (future.done() and (future.exception() is not None or store.get(key) is None)):
+            future = _executor.submit(load, key)
+            _loading[key] = future
+        return future
+
+
+def start(limit=PRELOAD):
+    """Once per process: preload the most recently used datasets and prune old sessions."""
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+    entries = catalog()
+    for key in sorted(entries, key=lambda k: entries[k].get("last_used", 0), reverse=True)[:limit]:
+        load_async(key)
+    sessions = _path("sessions")
+    if os.path.isdir(sessions):
+        for filename in os.listdir(sessions):
+            path = os.path.join(sessions, filename)
+            if time.time() - os.path.getmtime(path) > SESSION_TTL:
+                os.remove(path)
+
+
+def _session_path(sid):
+    # sid comes from the URL: accept only our own ids
+    if not re.fullmatch(r"[0-9a-f]{32}", sid or ""):
+        return None
+    return _path("sessions", f"{sid}.json")
+
+
+def save_session(sid, state: dict):
+    path = _session_path(sid)
+    if path is not None:
+        _write_atomic(path, json.dumps(state, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def load_session(sid):
+    path = _session_path(sid)
+    if path is None:
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
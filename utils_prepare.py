@@ -1,4 +1,5 @@
 
+import numpy as np
 import pandas as pd
 import re
 
@@ -7,6 +8,7 @@ COMMON_HEADERS = {
     "Asset Unique No": ["رقم الأصل الفريد", "رقم الأصل الفريد بالجهة", "الرقم التسلسلي", "Unique Asset Number", "Unique Asset Number in the entity"],
     "Description": ["وصف الأصل","Asset Description","Asset Description For Maintenance Purpose","الوصف"],
     "Tag Number": ["Tag number","رقم البطاقة","الوسم","الباركود"],
+    "Serial Number": ["Serial Number","Serial No","الرقم التسلسلي للمصنع"],
     "Unit of Measure": ["وحدة القياس","Base Unit of Measure"],
     "Quantity": ["العدد","Quantity"],
     "Manufacturer": ["المصنع","Manufacturer"],
@@ -36,33 +38,41 @@ def normalize_colname(c):
     c = re.sub(r"\s+", " ", c)
     return c
 
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_colnames(columns):
+    """normalize_colname over a whole header at once (list of str)."""
+    return [_WHITESPACE.sub(" ", str(c).strip()) for c in columns]
+
 def prepare_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     # drop unnamed empty columns
     cols = [c for c in df.columns if not (str(c).startswith("Unnamed") or str(c).strip()=="")]
     df = df[cols].copy()
-    df.columns = [normalize_colname(c) for c in df.columns]
+    df.columns = normalize_colnames(df.columns)
     return df
 
-def guess_columns(columns):
-    # Try to map internal keys to real columns by fuzzy name match
+def guess_columns(columns, keys=None):
+    # Try to map internal keys (all of COMMON_HEADERS, or just `keys`) to real columns by fuzzy name match
+    # (each header is normalized once; variants are tried in order, then columns in order)
+    columns = list(columns)
+    normalized = normalize_colnames(columns)
+    first = {}
+    for c, n in zip(columns, normalized):
+        first.setdefault(n, c)
     colmap = {}
-    for key, variants in COMMON_HEADERS.items():
+    for key in COMMON_HEADERS if keys is None else keys:
+        variants = COMMON_HEADERS[key]
         chosen = None
         # exact match
         for v in variants:
-            for c in columns:
-                if normalize_colname(c) == normalize_colname(v):
-                    chosen = c
-                    break
+            chosen = first.get(normalize_colname(v))
             if chosen:
                 break
         # contains match
         if not chosen:
             for v in variants:
-                for c in columns:
-                    if normalize_colname(v) in normalize_colname(c):
-                        chosen = c
-                        break
+                v = normalize_colname(v)
+                chosen = next((c for c, n in zip(columns, normalized) if v in n), None)
                 if chosen:
                     break
         colmap[key] = chosen if chosen in columns else None
@@ -85,3 +95,41 @@ def parse_coordinates(text):
         return (lat, lon)
     except Exception:
         return (None, None)
+
+_DECIMAL = r"[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?"
+# ASCII digits and blanks only, so the bulk parse can never disagree with float()
+_COORDINATE_PAIR = rf"^[ \t]*(?P<lat>{_DECIMAL})[ \t]*[,،][ \t]*(?P<lon>{_DECIMAL})[ \t]*$"
+
+try:  # Arrow's regex kernel is several times faster than pandas' per-value extract
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    def _extract_pairs(text):
+        pairs = pc.extract_regex(pa.array(text, type=pa.string(), from_pandas=True), pattern=_COORDINATE_PAIR)
+        # flatten() carries the null of unmatched rows into both fields
+        return tuple(np.array(pc.cast(field, pa.float64()).to_numpy(zero_copy_only=False))
+                     for field in pairs.flatten())
+except ImportError:
+    def _extract_pairs(text):
+        pairs = text.str.extract(_COORDINATE_PAIR)
+        return (pairs["lat"].astype("float64").to_numpy(copy=True),
+                pairs["lon"].astype("float64").to_numpy(copy=True))
+
+def parse_coordinates_series(values) -> pd.DataFrame:
+    """parse_coordinates over a column: a frame of float 'lat'/'lon' (NaN where invalid).
+
+    Plain decimal pairs are parsed in bulk; anything else (Arabic-Indic digits,
+    'inf', unusual whitespace...) goes through parse_coordinates one value at a time.
+    """
+    values = pd.Series(values, dtype=object)
+    text = values.astype("str")
+    lat, lon = _extract_pairs(text)
+    fast = ~np.isnan(lat)
+    out_of_range = (np.abs(lat) > 90) | (np.abs(lon) > 180)
+    lat[out_of_range] = lon[out_of_range] = np.nan
+
+    for i in np.flatnonzero(~fast & text.notna().to_numpy()):
+        a, b = parse_coordinates(values.iat[i])
+        if a is not None:
+            lat[i], lon[i] = a, b
+    return pd.DataFrame({"lat": lat, "lon": lon}, index=values.index)
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from utils_persist import CACHE_DIR
+from utils_prepare import COMMON_HEADERS, guess_columns, normalize_colnames
+
+# Saved column mappings, one per register layout:
+#   {signature: {"name", "colmap", "columns", "updated"}}
+# The signature is a hash of the normalized header set, so the same layout
+# (in any column order) gets the same mapping without running the guesser.
+PROFILES_PATH = os.environ.get("ASSET_PROFILES", os.path.join(CACHE_DIR, "profiles.json"))
+
+_lock = threading.Lock()
+
+
+def _key(name) -> str:
+    """A header name as profiles compare it: whitespace-normalized and case-folded."""
+    return normalize_colnames([name])[0].casefold()
+
+
+def signature(columns) -> str:
+    """Order-independent id of a header: sha1 of the sorted, normalized, case-folded names."""
+    names = sorted({_key(c) for c in columns})
+    return hashlib.sha1("\x1f".join(names).encode("utf-8")).hexdigest()[:16]
+
+
+def load_profiles() -> dict:
+    try:
+        with open(PROFILES_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write(profiles):
+    os.makedirs(os.path.dirname(PROFILES_PATH) or ".", exist_ok=True)
+    tmp = f"{PROFILES_PATH}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(profiles, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, PROFILES_PATH)
+
+
+def find(columns):
+    """The saved profile for this header, or None."""
+    return load_profiles().get(signature(columns))
+
+
+def save(columns, colmap: dict, name: str) -> dict:
+    """Save `colmap` as the mapping for every upload with this header set."""
+    columns = [str(c) for c in columns]
+    profile = {
+        "name": name,
+        "colmap": {key: colmap.get(key) if colmap.get(key) in columns else None for key in COMMON_HEADERS},
+        "columns": columns,
+        "updated": time.time(),
+    }
+    with _lock:
+        profiles = load_profiles()
+        profiles[signature(columns)] = profile
+        _write(profiles)
+    return profile
+
+
+def delete(columns):
+    with _lock:
+        profiles = load_profiles()
+        if profiles.pop(signature(columns), None) is not None:
+            _write(profiles)
+
+
+def resolve_columns(columns):
+    """(colmap, profile): the saved mapping for this header if there is one, else guess_columns (profile None).
+
+    Saved names are matched the way signature() matches headers (whitespace-
+    normalized, case-folded). Keys the profile has no entry for - added to
+    COMMON_HEADERS after it was saved - or whose column cannot be found are
+    filled in by guess_columns; a key saved as unmapped stays unmapped.
+    """
+    profile = find(columns)
+    if profile is None:
+        return guess_columns(columns), None
+    present = {}
+    for c in columns:
+        present.setdefault(_key(c), c)
+    saved = profile["colmap"]
+    colmap, missing = {}, []
+    for key in COMMON_HEADERS:
+        if key in saved and saved[key] is None:
+            colmap[key] = None
+            continue
+        colmap[key] = present.get(_key(saved[key])) if key in saved else None
+        if colmap[key] is None:
+            missing.append(key)
+    if missing:
+        colmap.update(guess_columns(columns, missing))
+    return colmap, profile
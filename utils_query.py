@@ -0,0 +1,193 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from utils_location import ARABIC_DIGITS, LEVEL_NAMES, LEVEL_PATTERNS, UNKNOWN, factorize_labels
+from utils_money import group_riyals, to_minor, total
+
+DIMENSIONS = ("city", "building", "floor", "room", "group")
+DIMENSION_NAMES = dict(LEVEL_NAMES, group="المجموعة المحاسبية")
+MEASURES = ("count", "cost", "nbv", "depreciation")
+MEASURE_NAMES = {"count": "عدد الأصول", "cost": "إجمالي التكلفة", "nbv": "صافي القيمة الدفترية",
+                 "depreciation": "الاستهلاك المتراكم"}
+
+MEASURE_PATTERNS = {
+    "count": r'(كم عدد|ما عدد|عدد|كم يوجد|كم لدينا|كم أصل)',
+    "cost": r'(تكلف|سعر|ثمن|مبلغ|إجمالي القيمة)',
+    "nbv": r'(دفتري|صافي القيمة|القيمة الصافية)',
+    "depreciation": r'(استهلاك|إهلاك|اهلاك)',
+}
+# "حسب المدينة"، "لكل مبنى"، "بحسب المجموعات"
+GROUP_PATTERN = r'(?:حسب|بحسب|لكل|على مستوى)\s+(?:كل\s+)?(\S+)'
+GROUP_WORDS = {"city": ("مدين", "مدن"), "building": ("مبن", "مباني"), "floor": ("دور", "أدوار", "طابق", "طوابق"),
+               "room": ("غرف", "مكتب", "مكاتب"), "group": ("مجموع",)}
+_NUMBER = r'([\d][\d,]*(?:\.\d+)?)\s*(ألف|الف|مليون)?'
+MIN_COST_PATTERN = r'(?:أكثر من|أكبر من|أعلى من|فوق|تزيد عن|يزيد عن|تتجاوز|تفوق)\s*' + _NUMBER
+MAX_COST_PATTERN = r'(?:أقل من|اقل من|دون|تحت|لا تتجاوز|لا تزيد عن)\s*' + _NUMBER
+BETWEEN_COST_PATTERN = r'بين\s*' + _NUMBER + r'\s*و\s*' + _NUMBER
+_SCALE = {"ألف": 1e3, "الف": 1e3, "مليون": 1e6}
+# "وكم تكلفتها؟"، "منها في الرياض"، "وماذا عن جدة؟"
+# a leading "و" only counts as the conjunction: standalone or attached to a question word
+# ("و كم", "وكم", "وما"), not the first letter of a word ("وحدات", "وزارة")
+FOLLOW_UP_PATTERN = (r'(^\s*و(?:\s|(?:كم|ما|ماذا|هل|أين|كيف)\b)|منها|من بينها|هذه الأصول|تلك الأصول|هذه النتائج|ماذا عن'
+                     r'|(?:تكلفت|قيمت|عدد|استهلاك|مجموع)(?:ها|هم))')
+
+
+def _amount(number, scale):
+    return float(number.replace(",", "")) * _SCALE.get(scale, 1)
+
+
+def is_follow_up(question: str) -> bool:
+    """True when a question refers back to the previous result set."""
+    return re.search(FOLLOW_UP_PATTERN, question) is not None
+
+
+class ResultContext:
+    """A session's last result set: the question and its row positions (not a frame copy)."""
+
+    def __init__(self, dataset_key, question, rows):
+        self.dataset_key = dataset_key
+        self.question = question
+        rows = np.asarray(rows)
+        self.rows = rows.astype(np.int32) if rows.size == 0 or rows.max() < 2**31 else rows
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class QueryPlan:
+    """A question reduced to filters, a cost range, measures and an optional group-by."""
+
+    def __init__(self, filters=None, cost_range=(None, None), measures=(), group_by=None):
+        self.filters = filters or {}
+        self.cost_range = cost_range
+        self.measures = list(measures)
+        self.group_by = group_by
+
+    @property
+    def is_empty(self):
+        return not (self.measures or self.filters or self.group_by or self.cost_range != (None, None))
+
+    @property
+    def is_compound(self):
+        """True when one handler can't answer it: several measures, a filter or a grouping."""
+        filtered = bool(self.filters) or self.cost_range != (None, None)
+        return bool(self.measures) and (len(self.measures) > 1 or filtered or self.group_by is not None)
+
+    def __repr__(self):
+        return (f"QueryPlan(filters={self.filters}, cost_range={self.cost_range}, "
+                f"measures={self.measures}, group_by={self.group_by})")
+
+
+class QueryEngine:
+    """Executes query plans over one register with precomputed dimension codes.
+
+    `cols` maps the DIMENSIONS, "cost" and "nbv" to column names;
+    missing columns are skipped. Each plan is one boolean mask over code arrays
+    plus one bincount per measure, optionally restricted to given row positions.
+    Amounts are summed exactly in halalas (utils_money).
+    """
+
+    def __init__(self, df: pd.DataFrame, cols: dict):
+        self.size = len(df)
+        self.codes, self.labels, self._lookup = {}, {}, {}
+        for dim in DIMENSIONS:
+            col = cols.get(dim)
+            if col in df.columns:
+                codes, labels = factorize_labels(df[col])
+                self.codes[dim], self.labels[dim] = codes, labels
+                lookup = {}
+                for code, label in enumerate(labels):
+                    lookup.setdefault(str(label).casefold(), []).append(code)
+                self._lookup[dim] = lookup
+        self.values = {}
+        for measure in ("cost", "nbv"):
+            col = cols.get(measure)
+            if col in df.columns:
+                self.values[measure] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        if "cost" in self.values and "nbv" in self.values:
+            self.values["depreciation"] = self.values["cost"] - self.values["nbv"]
+        self.minor = {measure: to_minor(arr) for measure, arr in self.values.items() if measure != "depreciation"}
+        if "depreciation" in self.values:
+            self.minor["depreciation"] = self.minor["cost"] - self.minor["nbv"]
+
+    def parse(self, question: str) -> QueryPlan:
+        """Build a plan from an Arabic question, e.g. 'كم عدد وتكلفة الأصول في الرياض حسب المبنى'."""
+        text = question.translate(ARABIC_DIGITS).casefold()
+        measures = [m for m in MEASURES if re.search(MEASURE_PATTERNS[m], text)
+                    and (m == "count" or m in self.values)]
+
+        group_by = None
+        for word in re.findall(GROUP_PATTERN, text):
+            group_by = next((dim for dim, stems in GROUP_WORDS.items()
+                             if dim in self.codes and any(s in word for s in stems)), None)
+            if group_by:
+                break
+
+        # "حسب المدينة" names a grouping, not the city of that name
+        rest = re.sub(GROUP_PATTERN, " ", text)
+        filters = {}
+        for dim in ("city", "group"):
+            if dim not in self.labels:
+                continue
+            for label in sorted(self.labels[dim], key=lambda l: -len(str(l))):
+                label = str(label)
+                # bare numbers (group codes) would collide with amounts in the question
+                if label != UNKNOWN and len(label) > 2 and not label.replace(".", "").isdigit() \
+                        and label.casefold() in rest:
+                    filters[dim] = label
+                    break
+        for dim, pattern in LEVEL_PATTERNS.items():
+            match = re.search(pattern, rest) if dim in self.labels else None
+            if match:
+                filters[dim] = match.group(1)
+
+        low = high = None
+        between = re.search(BETWEEN_COST_PATTERN, text)
+        if between:
+            low, high = sorted((_amount(*between.group(1, 2)), _amount(*between.group(3, 4))))
+        else:
+            match = re.search(MIN_COST_PATTERN, text)
+            if match:
+                low = _amount(*match.groups())
+            match = re.search(MAX_COST_PATTERN, text)
+            if match:
+                high = _amount(*match.groups())
+        if "cost" not in self.values:
+            low = high = None
+
+        return QueryPlan(filters, (low, high), measures, group_by)
+
+    def mask(self, plan: QueryPlan) -> np.ndarray:
+        mask = np.ones(self.size, dtype=bool)
+        for dim, value in plan.filters.items():
+            wanted = self._lookup[dim].get(str(value).casefold(), [])
+            mask &= np.isin(self.codes[dim], wanted)
+        low, high = plan.cost_range
+        if low is not None:
+            mask &= self.values["cost"] > low
+        if high is not None:
+            mask &= self.values["cost"] < high
+        return mask
+
+    def execute(self, plan: QueryPlan, rows=None):
+        """(result frame, matching row positions); one row per group, or a single 'total' row.
+
+        With `rows`, only those row positions are considered (e.g. a previous result set).
+        """
+        mask = self.mask(plan)
+        rows = np.flatnonzero(mask) if rows is None else rows[mask[rows]]
+        measures = plan.measures or ["count"]
+        if plan.group_by is None:
+            out = {m: len(rows) if m == "count" else float(total(self.minor[m][rows])) for m in measures}
+            return pd.DataFrame(out, index=pd.Index(["total"])), rows
+
+        codes = self.codes[plan.group_by][rows]
+        size = len(self.labels[plan.group_by])
+        out = pd.DataFrame(index=pd.Index(self.labels[plan.group_by], name=plan.group_by))
+        counts = np.bincount(codes, minlength=size)
+        for m in measures:
+            out[m] = counts if m == "count" else group_riyals(codes, self.minor[m][rows], size)
+        out = out[counts > 0]
+        return out.sort_values(measures[0], ascending=False), rows
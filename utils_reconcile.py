@@ -0,0 +1,150 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from utils_location import location_keys
+from utils_prepare import COMMON_HEADERS, normalize_colname
+
+ARABIC_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
+TAG_HEADERS = COMMON_HEADERS["Tag Number"] + ["tag", "barcode", "Barcode", "الوسم", "رقم الوسم"]
+UNIQUE_HEADERS = COMMON_HEADERS["Asset Unique No"]
+BUILDING_HEADERS = COMMON_HEADERS["Building"] + ["building", "المبنى"]
+FLOOR_HEADERS = COMMON_HEADERS["Floor"] + ["floor", "الدور", "الطابق"]
+ROOM_HEADERS = COMMON_HEADERS["Room/Office"] + ["room", "الغرفة", "المكتب"]
+LOCATION_LEVELS = {"building": BUILDING_HEADERS, "floor": FLOOR_HEADERS, "room": ROOM_HEADERS}
+
+
+def normalize_keys(values) -> pd.Series:
+    """Tags/asset numbers for matching: Latin digits, upper case, no spaces, no float '.0' tail."""
+    s = pd.Series(values).astype("string").str.translate(ARABIC_DIGITS)
+    s = s.str.upper().str.replace(r"\s+", "", regex=True).str.replace(r"^(\d+)\.0+$", r"\1", regex=True)
+    return s.mask(s == "")
+
+
+def _find_column(columns, variants):
+    wanted = {normalize_colname(v).casefold() for v in variants}
+    for c in columns:
+        if normalize_colname(c).casefold() in wanted:
+            return c
+    return None
+
+
+def read_scans(data: bytes, filename: str) -> pd.DataFrame:
+    """Load a scan file (CSV, Excel or a plain list of tags) into column 'tag' and optionally 'building', 'floor', 'room'."""
+    name = filename.lower()
+    if name.endswith((".xlsx", ".xls")):
+        raw = pd.read_excel(io.BytesIO(data), dtype=str)
+    elif name.endswith(".csv"):
+        raw = pd.read_csv(io.BytesIO(data), dtype=str, encoding="utf-8-sig")
+    else:
+        lines = data.decode("utf-8-sig", errors="replace").splitlines()
+        return pd.DataFrame({"tag": [l.strip() for l in lines if l.strip()]})
+
+    tag_col = _find_column(raw.columns, TAG_HEADERS)
+    if tag_col is None:
+        # headerless list: the first "column name" is itself a scanned tag
+        raw = pd.concat([pd.DataFrame({raw.columns[0]: [raw.columns[0]]}), raw], ignore_index=True)
+        tag_col = raw.columns[0]
+    scans = pd.DataFrame({"tag": raw[tag_col]})
+    for level, headers in LOCATION_LEVELS.items():
+        col = _find_column(raw.columns, headers)
+        if col is not None:
+            scans[level] = raw[col]
+    return scans.dropna(subset=["tag"]).reset_index(drop=True)
+
+
+def _first_positions(keys: pd.Series) -> pd.Series:
+    # key -> first row position, for a hash join with Index.get_indexer
+    positions = pd.Series(np.arange(len(keys)), index=keys.to_numpy())
+    return positions[~keys.isna().to_numpy() & ~keys.duplicated().to_numpy()]
+
+
+def reconcile(df: pd.DataFrame, cols: dict, scans: pd.DataFrame) -> dict:
+    """Match scans against the register on normalized tag, then unique asset number.
+
+    `cols` maps "tag", "unique", "building", "floor" and "room" to register
+    columns. Locations are compared on the composite building › floor › room
+    key (utils_location.location_keys) over the levels both the scans and the
+    register carry, since room numbers repeat across buildings and floors.
+    Returns a dict:
+      found        register row + scan index per matched scan, with wrong_location flags
+      missing      register rows not scanned (within the scanned locations when scans carry them)
+      unexpected   scans matching no register asset
+      duplicates   scans of an asset already scanned
+      by_location  found / missing / wrong_location / unexpected counts per location
+    """
+    n = len(df)
+    scan_keys = normalize_keys(scans["tag"])
+    pos = np.full(len(scans), -1, dtype=np.int64)
+    for key in ("tag", "unique"):
+        col = cols.get(key)
+        if col in df.columns:
+            lookup = _first_positions(normalize_keys(df[col]))
+            todo = pos < 0
+            pos[todo] = lookup.index.get_indexer(scan_keys[todo].to_numpy())
+            hit = todo.copy()
+            hit[todo] = pos[todo] >= 0
+            pos[hit] = lookup.to_numpy()[pos[hit]]
+
+    matched = pos >= 0
+    first_scan = matched & ~pd.Series(pos).duplicated().to_numpy()
+    duplicates = scans[matched & ~first_scan]
+
+    register_levels = [level for level in LOCATION_LEVELS if cols.get(level) in df.columns]
+    shared = [level for level in register_levels if level in scans.columns]
+    has_locations = bool(shared)
+    register_locations = (location_keys(df, [cols[level] for level in shared or register_levels])
+                          if register_levels else None)
+    scan_locations = location_keys(scans, shared) if has_locations else None
+
+    found = pd.DataFrame({"row": pos[first_scan], "scan": np.flatnonzero(first_scan)})
+    if has_locations:
+        reg = register_locations.to_numpy()[found["row"].to_numpy()]
+        seen = scan_locations.to_numpy()[found["scan"].to_numpy()]
+        found["wrong_location"] = ~pd.isna(seen) & (pd.Series(reg).fillna("") != pd.Series(seen)).to_numpy()
+        found["scanned_location"] = seen
+    else:
+        found["wrong_location"] = False
+
+    scanned = np.zeros(n, dtype=bool)
+    scanned[found["row"].to_numpy()] = True
+    in_scope = np.ones(n, dtype=bool)
+    if has_locations:
+        in_scope = register_locations.isin(scan_locations.dropna().unique()).to_numpy()
+    missing = np.flatnonzero(in_scope & ~scanned)
+    unexpected = scans[~matched]
+
+    if register_locations is not None:
+        location_of_found = register_locations.to_numpy()[found["row"].to_numpy()]
+        parts = [
+            pd.DataFrame({"location": location_of_found, "found": 1,
+                          "wrong_location": found["wrong_location"].astype(int)}),
+            pd.DataFrame({"location": register_locations.to_numpy()[missing], "missing": 1}),
+        ]
+        if scan_locations is not None:
+            parts.append(pd.DataFrame({"location": scan_locations.to_numpy()[~matched], "unexpected": 1}))
+        by_location = pd.concat(parts, ignore_index=True).fillna({"location": "غير محدد"}).fillna(0)
+        counts = [c for c in ("found", "missing", "wrong_location", "unexpected") if c in by_location]
+        by_location = by_location.groupby("location")[counts].sum().astype(int).sort_values("missing", ascending=False)
+    else:
+        by_location = pd.DataFrame()
+
+    return {"found": found, "missing": missing, "unexpected": unexpected,
+            "duplicates": duplicates, "by_location": by_location}
+
+
+def report_xlsx(df: pd.DataFrame, result: dict, columns) -> bytes:
+    """Reconciliation report workbook: per-location summary, missing, wrong location and unexpected sheets."""
+    columns = [c for c in columns if c in df.columns]
+    found = result["found"]
+    wrong = found[found["wrong_location"]]
+    wrong_sheet = df.take(wrong["row"].to_numpy())[columns].assign(
+        **({"الموقع الممسوح": wrong["scanned_location"].to_numpy()} if "scanned_location" in wrong else {}))
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
+        result["by_location"].to_excel(writer, sheet_name="حسب الموقع")
+        df.take(result["missing"])[columns].to_excel(writer, sheet_name="مفقود", index=False)
+        wrong_sheet.to_excel(writer, sheet_name="موقع خاطئ", index=False)
+        result["unexpected"].to_excel(writer, sheet_name="غير متوقع", index=False)
+    return buf.getvalue()
@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype, is_bool_dtype
+
+from utils_metrics import span
+from utils_persist import CACHE_DIR, MAX_DATASETS, SESSION_TTL
+from utils_reconcile import normalize_keys
+
+# Read-only, memory-mapped copy of a register for single-record lookups:
+#   meta.json      columns (name, kind, slot), row count, key fields
+#   numbers.npy    float64 [rows, numeric columns]; dates are int64 seconds since the epoch in
+#                  dates.npy (NaT = min int64), which covers dates past 2262 unlike nanoseconds
+#   offsets.npy    int64 [string runs, rows + 1] byte offsets into strings.bin (one run per
+#                  string column, plus one per key field holding its normalized keys)
+#   nulls.npy      bool [string runs, rows]
+#   strings.bin    UTF-8 heap
+#   index-<field>-slots.npy / -hashes.npy   open-addressing hash table (row, key hash) per key field
+# Only the pages a lookup touches are read, so an asset card never needs the
+# whole frame resident.
+ROWSTORE_DIR = os.path.join(CACHE_DIR, "rowstore")
+# stores are pruned like the persisted datasets: the most recently opened are
+# kept, and any not opened for SESSION_TTL is removed
+MAX_STORES = MAX_DATASETS
+STORE_VERSION = 2  # part of the directory name; bump when the file layout changes
+LOAD_FACTOR = 0.5
+_EMPTY = -1
+
+
+def _hash(keys: np.ndarray) -> np.ndarray:
+    # pandas' hash is seeded with a fixed key, so hashes are stable across processes
+    return pd.util.hash_array(keys, categorize=False)
+
+
+def build_index(keys: pd.Series):
+    """Open-addressing (linear probing) table of first-occurrence row per normalized key.
+
+    Insertion is vectorized in rounds: every pending key probes its current
+    slot, the lowest row wins each free slot, keys equal to the slot's key are
+    duplicates and stop, and the rest move one slot on.
+    Returns (slots, hashes): row (or -1) and key hash per slot.
+    """
+    keys = keys.to_numpy(dtype=object, na_value=None)
+    rows = np.flatnonzero(pd.notna(keys))
+    size = 1 << max(4, int(np.ceil(np.log2(max(len(rows), 1) / LOAD_FACTOR))))
+    mask = size - 1
+    slots = np.full(size, _EMPTY, dtype=np.int64)
+    hashes = np.zeros(size, dtype=np.uint64)
+
+    key_hash = _hash(keys[rows])
+    pending = rows
+    pending_hash = key_hash
+    pos = (key_hash & np.uint64(mask)).astype(np.int64)
+    while len(pending):
+        free = slots[pos] == _EMPTY
+        if free.any():
+            claimed, first = np.unique(pos[free], return_index=True)  # pending is in row order
+            slots[claimed] = pending[free][first]
+            hashes[claimed] = pending_hash[free][first]
+        occupant = slots[pos]
+        placed = occupant == pending
+        duplicate = ~placed & (hashes[pos] == pending_hash) & (keys[occupant] == keys[pending])
+        moving = ~(placed | duplicate)
+        pending, pending_hash = pending[moving], pending_hash[moving]
+        pos = (pos[moving] + 1) & mask
+    return slots, hashes
+
+
+def _kind(s: pd.Series) -> str:
+    if is_datetime64_any_dtype(s.dtype):
+        return "date"
+    if is_numeric_dtype(s.dtype) and not is_bool_dtype(s.dtype):
+        return "number"
+    return "string"
+
+
+def _string_runs(values: pd.Series):
+    """(UTF-8 bytes, int64 offsets [n + 1], null mask) of a column."""
+    nulls = values.isna().to_numpy()
+    text = values.astype(object).where(~nulls, "").map(str)
+    try:
+        import pyarrow as pa
+
+        arr = pa.array(text.to_numpy(), type=pa.large_string())
+        _, offsets, data = arr.buffers()
+        offsets = np.frombuffer(offsets, dtype=np.int64, count=len(arr) + 1)
+        heap = data.to_pybytes()[offsets[0]:offsets[-1]] if data is not None else b""
+        return heap, offsets - offsets[0], nulls
+    except ImportError:
+        encoded = [t.encode("utf-8") for t in text]
+        lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+        return b"".join(encoded), np.concatenate([[0], np.cumsum(lengths)]), nulls
+
+
+def build(df: pd.DataFrame, directory: str, keys: dict):
+    """Write the row store of `df` to `directory`; `keys` maps lookup fields ("unique", "tag") to columns."""
+    tmp = f"{directory}.{threading.get_ident()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    columns, numbers, dates, heaps, offsets, nulls = [], [], [], [], [], []
+    position = 0
+
+    def add_strings(values):
+        nonlocal position
+        data, offs, null = _string_runs(values)
+        heaps.append(data)
+        offsets.append(offs + position)
+        nulls.append(null)
+        position += len(data)
+        return len(heaps) - 1
+
+    for name in df.columns:
+        s = df[name]
+        kind = _kind(s)
+        if kind == "number":
+            columns.append({"name": str(name), "kind": kind, "slot": len(numbers)})
+            numbers.append(s.to_numpy(dtype="float64", na_value=np.nan))
+        elif kind == "date":
+            columns.append({"name": str(name), "kind": kind, "slot": len(dates)})
+            dates.append(s.to_numpy(dtype="datetime64[s]").view(np.int64))
+        else:
+            columns.append({"name": str(name), "kind": kind, "slot": add_strings(s)})
+
+    # normalized keys are stored too, so a lookup verifies its match without re-normalizing
+    indexed, tables = {}, {}
+    for field, col in keys.items():
+        if col in df.columns:
+            normalized = normalize_keys(df[col])
+            tables[field] = build_index(normalized)
+            indexed[field] = {"column": str(col), "slot": add_strings(normalized)}
+
+    n = len(df)
+    np.save(os.path.join(tmp, "numbers.npy"), np.column_stack(numbers) if numbers else np.empty((n, 0)))
+    np.save(os.path.join(tmp, "dates.npy"), np.column_stack(dates) if dates else np.empty((n, 0), dtype=np.int64))
+    np.save(os.path.join(tmp, "offsets.npy"), np.vstack(offsets) if offsets else np.zeros((0, n + 1), dtype=np.int64))
+    np.save(os.path.join(tmp, "nulls.npy"), np.vstack(nulls) if nulls else np.zeros((0, n), dtype=bool))
+    with open(os.path.join(tmp, "strings.bin"), "wb") as f:
+        for data in heaps:
+            f.write(data)
+
+    for field, (slots, hashes) in tables.items():
+        np.save(os.path.join(tmp, f"index-{field}-slots.npy"), slots)
+        np.save(os.path.join(tmp, f"index-{field}-hashes.npy"), hashes)
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"rows": n, "columns": columns, "keys": indexed}, f, ensure_ascii=False)
+    if os.path.isdir(directory):
+        shutil.rmtree(tmp, ignore_errors=True)  # built concurrently by another worker
+    else:
+        os.replace(tmp, directory)
+
+
+class RowStore:
+    """Memory-mapped register: record(row) and O(1) find(key) without loading the frame."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.rows = meta["rows"]
+        self.columns = meta["columns"]
+        self.keys = meta["keys"]
+
+        def mapped(name):
+            return np.load(os.path.join(directory, name), mmap_mode="r")
+
+        self._numbers, self._dates = mapped("numbers.npy"), mapped("dates.npy")
+        self._offsets, self._nulls = mapped("offsets.npy"), mapped("nulls.npy")
+        size = os.path.getsize(os.path.join(directory, "strings.bin"))
+        self._heap = np.memmap(os.path.join(directory, "strings.bin"), dtype=np.uint8, mode="r") if size else b""
+        self._index = {field: (mapped(f"index-{field}-slots.npy"), mapped(f"index-{field}-hashes.npy"))
+                       for field in self.keys}
+
+    # memory maps are not picklable; a pickled store reopens its directory
+    def __getstate__(self):
+        return {"directory": self.directory}
+
+    def __setstate__(self, state):
+        self.__init__(state["directory"])
+
+    def __len__(self):
+        return self.rows
+
+    def _string(self, slot, row):
+        if self._nulls[slot, row]:
+            return None
+        start, end = self._offsets[slot, row], self._offsets[slot, row + 1]
+        return bytes(self._heap[start:end]).decode("utf-8")
+
+    def value(self, row, column):
+        if column["kind"] == "number":
+            v = float(self._numbers[row, column["slot"]])
+            return None if np.isnan(v) else v
+        if column["kind"] == "date":
+            v = int(self._dates[row, column["slot"]])
+            return None if v == np.iinfo(np.int64).min else pd.Timestamp(v, unit="s")
+        return self._string(column["slot"], row)
+
+    def record(self, row) -> dict:
+        """{column: value} of one row (None for missing values)."""
+        return {c["name"]: self.value(row, c) for c in self.columns}
+
+    def find(self, key, fields=None):
+        """Row of the first asset whose key field (unique number, then tag by default) equals `key`."""
+        normalized = normalize_keys(pd.Series([key], dtype=object)).iloc[0]
+        if pd.isna(normalized):
+            return None
+        h = _hash(np.array([normalized], dtype=object))[0]
+        for field in fields or ("unique", "tag"):
+            if field not in self._index:
+                continue
+            slots, hashes = self._index[field]
+            key_slot = self.keys[field]["slot"]
+            mask = len(slots) - 1
+            pos = int(h & np.uint64(mask))
+            while slots[pos] != _EMPTY:
+                row = int(slots[pos])
+                if hashes[pos] == h and self._string(key_slot, row) == normalized:
+                    return row
+                pos = (pos + 1) & mask
+        return None
+
+
+def prune(keep=()):
+    """Remove all but the MAX_STORES most recently opened stores, and any unused for SESSION_TTL."""
+    try:
+        entries = [e for e in os.scandir(ROWSTORE_DIR) if e.is_dir()]
+    except FileNotFoundError:
+        return
+    now = time.time()
+    kept = 0
+    for mtime, path in sorted(((e.stat().st_mtime, e.path) for e in entries), reverse=True):
+        building = path.endswith(".tmp")  # a build in progress, unless it is stale
+        kept += not building
+        if path not in keep and (now - mtime > SESSION_TTL or (not building and kept > MAX_STORES)):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def open_store(dataset_key: str, df: pd.DataFrame, keys: dict) -> RowStore:
+    """The row store of a dataset (by content key and key columns), building it on first use."""
+    tag = hashlib.sha1(json.dumps(keys, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:8]
+    directory = os.path.join(ROWSTORE_DIR, f"{dataset_key}-{tag}-v{STORE_VERSION}")
+    if not os.path.exists(os.path.join(directory, "meta.json")):
+        os.makedirs(ROWSTORE_DIR, exist_ok=True)
+        with span("rowstore_build", rows=len(df)):
+            build(df, directory, keys)
+        prune(keep=(directory,))
+    else:
+        os.utime(directory)  # last opened, for prune()
+    return RowStore(directory)
@@ -0,0 +1,106 @@
+import re
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Equivalent asset terms. Char n-grams relate spelling variants ("كمبيوتر" /
+# "الكمبيوتر") but not synonyms, so a query mentioning any term of a group is
+# expanded with the rest of the group before vectorizing.
+SYNONYMS = [
+    ["حاسب آلي", "حاسب", "حاسوب", "كمبيوتر", "كومبيوتر", "computer", "laptop", "لابتوب", "notebook", "desktop", "pc"],
+    ["طابعة", "printer", "ماسح ضوئي", "scanner"],
+    ["مكيف", "تكييف", "air conditioner", "split"],
+    ["شاشة", "monitor", "display", "screen", "تلفزيون", "tv"],
+    ["كرسي", "مقعد", "chair"],
+    ["طاولة", "desk", "table"],
+    ["سيارة", "مركبة", "vehicle", "car", "truck"],
+    ["هاتف", "جوال", "phone", "mobile"],
+    ["ثلاجة", "refrigerator", "fridge"],
+    ["خادم", "سيرفر", "server"],
+]
+
+# below MIN_SCORE a description is only returned when it shares a word with the
+# (expanded) query: char n-grams alone score unrelated short texts around 0.3
+MIN_SCORE = 0.45
+
+_DIACRITICS = re.compile(r"[ً-ْـ]")
+_ARABIC_FOLD = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ة": "ه", "ى": "ي"})
+
+
+def normalize_text(text) -> str:
+    """Lower-case, drop Arabic diacritics/tatweel and fold alef/taa marbuta/alef maqsura variants."""
+    text = _DIACRITICS.sub("", str(text).lower())
+    return re.sub(r"\s+", " ", text.translate(_ARABIC_FOLD)).strip()
+
+
+_SYNONYM_GROUPS = [[normalize_text(t) for t in group] for group in SYNONYMS]
+
+
+def _mentions(term, text):
+    # Arabic terms may carry attached prefixes (ال، بال...), Latin terms must match whole words
+    if term.isascii():
+        return re.search(rf"(?<!\w){re.escape(term)}(?!\w)", text) is not None
+    return term in text
+
+
+def expand_query(query: str) -> str:
+    text = normalize_text(query)
+    extra = [
+        t for group in _SYNONYM_GROUPS if any(_mentions(t, text) for t in group)
+        for t in group if not _mentions(t, text)
+    ]
+    return " ".join([text] + extra)
+
+
+class SemanticIndex:
+    """Offline similarity index over asset descriptions.
+
+    Only distinct descriptions are vectorized (registers repeat them heavily)
+    with character 2-4-grams into a float32 CSC matrix, so a query only touches
+    the columns of its own n-grams. `codes` maps every row to its description.
+    """
+
+    def __init__(self, descriptions, max_features=2**18):
+        codes, uniques = pd.factorize(pd.Series(descriptions).astype("string"))
+        self.codes = codes
+        self.descriptions = np.asarray(uniques, dtype=object)
+        self.counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        self.vectorizer = TfidfVectorizer(
+            analyzer="char_wb", ngram_range=(2, 4), preprocessor=normalize_text,
+            sublinear_tf=True, max_features=max_features, dtype=np.float32,
+        )
+        if len(uniques):
+            self.matrix = self.vectorizer.fit_transform(self.descriptions).tocsc()
+        else:
+            self.matrix = None
+
+    def __len__(self):
+        return len(self.descriptions)
+
+    def search(self, query: str, k=10, min_score=MIN_SCORE):
+        """Top-k distinct descriptions as (unique ids, cosine scores), best first.
+
+        Descriptions scoring under `min_score` are kept only if they share a word
+        with the query or its synonyms; no match returns empty arrays.
+        """
+        if self.matrix is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        expanded = expand_query(query)
+        q = self.vectorizer.transform([expanded])
+        if q.nnz == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        scores = np.asarray(self.matrix[:, q.indices] @ q.data).ravel()
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        words = set(expanded.split())
+        keep = [scores[i] >= min_score or not words.isdisjoint(normalize_text(self.descriptions[i]).split())
+                for i in top]
+        top = top[np.asarray(keep, dtype=bool)]
+        top = top[scores[top] > 0]
+        return top, scores[top]
+
+    def rows(self, unique_ids) -> np.ndarray:
+        """Row positions of every asset whose description is one of `unique_ids`."""
+        return np.flatnonzero(np.isin(self.codes, unique_ids))
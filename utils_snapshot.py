@@ -0,0 +1,197 @@
+import io
+import json
+import os
+import re
+import stat
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils_export import write_parquet
+from utils_location import normalize_label
+from utils_metrics import span
+from utils_money import to_minor, to_riyals, total
+from utils_persist import CACHE_DIR
+from utils_reconcile import normalize_keys
+
+# Monthly (or any period) versions of the register, for period-over-period diffs.
+#   snapshots/<id>/data.parquet   the prepared register, columnar, read-only
+#   snapshots/<id>/meta.json      label, dataset key, row count and column mapping
+# A snapshot is never rewritten: saving the same register under the same label
+# returns the existing version.
+SNAPSHOT_DIR = os.environ.get("ASSET_SNAPSHOT_DIR", os.path.join(CACHE_DIR, "snapshots"))
+LOCATION_FIELDS = ("city", "building", "floor", "room")
+
+
+def _snapshot_id(label, dataset_key):
+    safe = re.sub(r"[^\w\-]+", "_", str(label), flags=re.UNICODE).strip("_") or "snapshot"
+    return f"{safe}-{dataset_key[:8]}"
+
+
+def _read_only(path):
+    os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+
+
+def create(df: pd.DataFrame, label: str, dataset_key: str, cols: dict) -> dict:
+    """Save `df` as the snapshot `label`; `cols` maps diff fields ("unique", "cost", ...) to columns."""
+    snapshot_id = _snapshot_id(label, dataset_key)
+    directory = os.path.join(SNAPSHOT_DIR, snapshot_id)
+    meta_path = os.path.join(directory, "meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    os.makedirs(directory, exist_ok=True)
+    tmp = os.path.join(directory, "data.parquet.tmp")
+    with span("snapshot_save", rows=len(df)):
+        write_parquet(df, tmp)
+    os.replace(tmp, os.path.join(directory, "data.parquet"))
+    meta = {
+        "id": snapshot_id, "label": str(label), "dataset_key": dataset_key, "created": time.time(),
+        "rows": len(df), "cols": {k: str(v) for k, v in cols.items() if v in df.columns},
+    }
+    with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+    os.replace(f"{meta_path}.tmp", meta_path)
+    _read_only(os.path.join(directory, "data.parquet"))
+    _read_only(meta_path)
+    return meta
+
+
+def list_snapshots() -> list:
+    """Metadata of every saved snapshot, oldest label first."""
+    if not os.path.isdir(SNAPSHOT_DIR):
+        return []
+    snapshots = []
+    for name in os.listdir(SNAPSHOT_DIR):
+        try:
+            with open(os.path.join(SNAPSHOT_DIR, name, "meta.json"), encoding="utf-8") as f:
+                snapshots.append(json.load(f))
+        except (FileNotFoundError, ValueError):
+            continue  # incomplete write
+    return sorted(snapshots, key=lambda m: (m["label"], m["created"]))
+
+
+def load(snapshot_id: str, columns=None) -> pd.DataFrame:
+    """Read a snapshot, optionally only `columns` (Parquet column projection)."""
+    path = os.path.join(SNAPSHOT_DIR, snapshot_id, "data.parquet")
+    with span("snapshot_load") as s:
+        df = pd.read_parquet(path, columns=columns)
+        s.rows = len(df)
+    return df
+
+
+def _numeric(df, col):
+    if col not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _minor(df, col):
+    """int64 halalas of an amount column (0 when missing), for exact totals and comparisons."""
+    if col not in df.columns:
+        return np.zeros(len(df), dtype=np.int64)
+    return to_minor(df[col])
+
+
+def diff(old: pd.DataFrame, new: pd.DataFrame, old_cols: dict, new_cols: dict) -> dict:
+    """Changes between two versions of the register, matched on the unique asset number.
+
+    Returns a dict of:
+      added        positions in `new` of assets absent from `old`
+      disposed     positions in `old` of assets absent from `new`
+      transferred  frame (old, new, moved levels) of assets whose city/building/floor/room changed
+      revalued     frame (old, new, cost_old, cost_new, delta) of assets whose cost changed
+      summary      counts, totals and NBV movement of the matched assets (amounts as exact Decimals)
+    Duplicate asset numbers are matched on their first occurrence. Costs are
+    compared in halalas, so any difference of at least 0.01 is a revaluation.
+    """
+    with span("snapshot_diff", rows=len(old) + len(new)):
+        old_keys = normalize_keys(old[old_cols["unique"]])
+        new_keys = normalize_keys(new[new_cols["unique"]])
+        first_new = ~new_keys.duplicated().to_numpy() & new_keys.notna().to_numpy()
+        new_positions = np.flatnonzero(first_new)
+        index = pd.Index(new_keys.to_numpy()[first_new])
+        pos = index.get_indexer(old_keys.to_numpy())
+        pos[old_keys.isna().to_numpy() | old_keys.duplicated().to_numpy()] = -1
+        matched = pos >= 0
+        old_rows = np.flatnonzero(matched)
+        new_rows = new_positions[pos[matched]]
+
+        seen = np.zeros(len(new), dtype=bool)
+        seen[new_rows] = True
+        added = np.flatnonzero(~seen & new_keys.notna().to_numpy())
+        disposed = np.flatnonzero(~matched & old_keys.notna().to_numpy())
+
+        moved = np.zeros(len(old_rows), dtype=bool)
+        levels = {}
+        for level in LOCATION_FIELDS:
+            oc, nc = old_cols.get(level), new_cols.get(level)
+            if oc in old.columns and nc in new.columns:
+                a = normalize_label(old[oc].take(old_rows)).to_numpy()
+                b = normalize_label(new[nc].take(new_rows)).to_numpy()
+                levels[level] = a != b
+                moved |= levels[level]
+        transferred = pd.DataFrame({"old": old_rows[moved], "new": new_rows[moved]})
+        for level, changed in levels.items():
+            transferred[level] = changed[moved]
+
+        minor_old = _minor(old, old_cols.get("cost"))
+        minor_new = _minor(new, new_cols.get("cost"))
+        delta = minor_new[new_rows] - minor_old[old_rows]
+        changed = delta != 0
+        revalued = pd.DataFrame({"old": old_rows[changed], "new": new_rows[changed],
+                                 "cost_old": _numeric(old, old_cols.get("cost"))[old_rows][changed],
+                                 "cost_new": _numeric(new, new_cols.get("cost"))[new_rows][changed],
+                                 "delta": to_riyals(delta[changed])})
+
+        nbv_old = _minor(old, old_cols.get("nbv"))
+        nbv_new = _minor(new, new_cols.get("nbv"))
+        summary = {
+            "old_rows": len(old), "new_rows": len(new), "matched": int(matched.sum()),
+            "added": len(added), "disposed": len(disposed),
+            "transferred": len(transferred), "revalued": len(revalued),
+            "added_cost": total(minor_new[added]),
+            "disposed_cost": total(minor_old[disposed]),
+            "revaluation": total(delta[changed]),
+            "nbv_movement": total(nbv_new[new_rows]) - total(nbv_old[old_rows]),
+        }
+    return {"added": added, "disposed": disposed, "transferred": transferred,
+            "revalued": revalued, "summary": summary}
+
+
+def tables(old: pd.DataFrame, new: pd.DataFrame, result: dict, old_cols: dict, new_cols: dict, shown=()) -> dict:
+    """Display frames of a diff: the added/disposed rows and the transfers/revaluations side by side.
+
+    `shown` are extra fields (keys of the column maps, e.g. "description") to include.
+    """
+    def pick(frame, cols, rows):
+        names = [cols[f] for f in ("unique", *shown) if cols.get(f) in frame.columns]
+        return frame[names].take(rows).reset_index(drop=True)
+
+    transferred, revalued = result["transferred"], result["revalued"]
+    moves = pick(new, new_cols, transferred["new"].to_numpy())
+    for level in LOCATION_FIELDS:
+        if level in transferred:
+            moves[f"{level}_old"] = old[old_cols[level]].take(transferred["old"].to_numpy()).to_numpy()
+            moves[f"{level}_new"] = new[new_cols[level]].take(transferred["new"].to_numpy()).to_numpy()
+    changes = pick(new, new_cols, revalued["new"].to_numpy())
+    for name in ("cost_old", "cost_new", "delta"):
+        changes[name] = revalued[name].to_numpy()
+    return {
+        "added": pick(new, new_cols, result["added"]),
+        "disposed": pick(old, old_cols, result["disposed"]),
+        "transferred": moves,
+        "revalued": changes,
+    }
+
+
+def report_xlsx(summary: dict, frames: dict, names: dict) -> bytes:
+    """Diff workbook: the summary and one sheet per change type (`names` are the sheet titles)."""
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
+        pd.Series(summary, name="value").to_frame().to_excel(writer, sheet_name=names.get("summary", "summary"))
+        for kind, frame in frames.items():
+            frame.to_excel(writer, sheet_name=names.get(kind, kind), index=False)
+    return buf.getvalue()
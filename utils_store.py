@@ -0,0 +1,179 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Process-wide, content-addressed store of prepared registers. All Streamlit
+# sessions run inside one server process, so keeping a single read-only copy
+# here (instead of one per session) is what lets identical uploads share data.
+MAX_IDLE = 2  # unreferenced datasets kept warm for quick re-uploads
+
+_lock = threading.RLock()
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="dataset-jobs")
+_datasets = {}
+_idle = OrderedDict()
+
+
+def freeze(df: pd.DataFrame) -> pd.DataFrame:
+    """The frame rebuilt on read-only views of its numpy columns, so shared data cannot be mutated in place.
+
+    Only public API is used: each numpy-backed column becomes a read-only view
+    (no copy) and the frame is assembled without copying; dates and extension
+    columns (strings, nullable integers, categoricals...) are kept as they are.
+    """
+    columns = {}
+    for i in range(df.shape[1]):
+        s = df.iloc[:, i]
+        if isinstance(s.dtype, np.dtype) and s.dtype.kind in "biufcO":
+            values = s.to_numpy(copy=False).view()
+            values.flags.writeable = False
+            columns[i] = values
+        else:
+            columns[i] = s.array
+    frozen = pd.DataFrame(columns, index=df.index, copy=False)
+    frozen.columns = df.columns
+    frozen.attrs = dict(df.attrs)
+    return frozen
+
+
+class Dataset:
+    """One immutable prepared register plus the artefacts (indexes, aggregates) built on it."""
+
+    def __init__(self, key, df):
+        self.key = key
+        self.df = freeze(df)
+        self.refs = 0
+        self.created = time.time()
+        self.last_used = self.created
+        self._artifacts = {}
+        self._building = {}
+        self._jobs = {}
+        self._artifact_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.df)
+
+    def artifact(self, name, builder):
+        """Return the artefact `name`, building it once with `builder()` across all sessions.
+
+        `name` should include the columns the artefact depends on, e.g.
+        ("location_tree", city_col, building_col), so a different column mapping
+        gets its own entry.
+        """
+        with self._artifact_lock:
+            if name in self._artifacts:
+                return self._artifacts[name]
+            build_lock = self._building.setdefault(name, threading.Lock())
+        with build_lock:
+            with self._artifact_lock:
+                if name in self._artifacts:
+                    return self._artifacts[name]
+            value = builder()
+            with self._artifact_lock:
+                self._artifacts[name] = value
+                self._building.pop(name, None)
+            return value
+
+    def artifact_async(self, name, builder):
+        """Like artifact() but builds on a background thread; returns a Future of the artefact."""
+        with self._artifact_lock:
+            if name in self._artifacts:
+                future = Future()
+                future.set_result(self._artifacts[name])
+                return future
+            future = self._jobs.get(name)
+            if future is None or (future.done() and future.exception() is not None):
+                future = _executor.submit(self.artifact, name, builder)
+                self._jobs[name] = future
+            return future
+
+    def job(self, name):
+        """The background build of `name` (pending or finished), or None if never started."""
+        with self._artifact_lock:
+            return self._jobs.get(name)
+
+    def artifacts(self):
+        with self._artifact_lock:
+            return dict(self._artifacts)
+
+
+class Lease:
+    """A reference to a stored dataset; releasing it (or dropping it) decrements the count.
+
+    Keep one in st.session_state: when the session ends or switches datasets the
+    lease is garbage-collected and the dataset becomes eligible for eviction.
+    """
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self._finalizer = weakref.finalize(self, release, dataset.key)
+
+    @property
+    def key(self):
+        return self.dataset.key
+
+    @property
+    def df(self):
+        return self.dataset.df
+
+    def release(self):
+        self._finalizer()
+
+
+def put(key, df) -> Dataset:
+    """Store `df` under `key` unless an entry already exists; return the stored dataset."""
+    with _lock:
+        dataset = _datasets.get(key)
+        if dataset is None:
+            dataset = Dataset(key, df)
+            _datasets[key] = dataset
+            _mark_idle(dataset)
+        return dataset
+
+
+def get(key):
+    with _lock:
+        return _datasets.get(key)
+
+
+def acquire(dataset) -> Lease:
+    """Take a Lease on `dataset`, re-registering it if it was evicted meanwhile."""
+    with _lock:
+        dataset = _datasets.setdefault(dataset.key, dataset)
+        dataset.refs += 1
+        dataset.last_used = time.time()
+        _idle.pop(dataset.key, None)
+        return Lease(dataset)
+
+
+def release(key):
+    with _lock:
+        dataset = _datasets.get(key)
+        if dataset is None:
+            return
+        dataset.refs = max(dataset.refs - 1, 0)
+        if dataset.refs == 0:
+            _mark_idle(dataset)
+
+
+def _mark_idle(dataset):
+    if dataset.refs:
+        return
+    _idle[dataset.key] = dataset
+    _idle.move_to_end(dataset.key)
+    while len(_idle) > MAX_IDLE:
+        key, _ = _idle.popitem(last=False)
+        _datasets.pop(key, None)
+
+
+def stats():
+    """Rows, reference count and number of artefacts per stored dataset."""
+    with _lock:
+        return [
+            {"key": d.key[:12], "rows": len(d), "refs": d.refs, "artifacts": len(d.artifacts())}
+            for d in _datasets.values()
+        ]